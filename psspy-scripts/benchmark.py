@@ -0,0 +1,240 @@
+"""
+Pipeline Benchmark
+Times the full run_case_simulation() path on the fake PSS/E backend (see
+fake_psse/psspy.py): from the case files, from a restored snapshot and as a result
+cache hit, replaying the case's recorded run and on synthetic systems of larger
+sizes (channel files are read in the get_data phase of those runs). Also times the
+PSS/E-independent stages on their own (demultiplexing, result store, CSV export) and the import time of the entry-point
+modules in a fresh interpreter. Timings are compared against a saved baseline so
+regressions show up before they reach a sweep.
+
+    python benchmark.py --pipeline-buses 118 2000 --save baseline.json
+    python benchmark.py --compare baseline.json --tolerance 0.25
+"""
+
+import argparse
+import functools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from loguru import logger
+
+from channels import demux_channels
+from result_store import load_run, save_run, write_csv
+
+QUANTITIES = ('POWR', 'FREQ', 'VOLT', 'SPD')
+
+# Modules whose import time is tracked (none of them should start PSS/E or load pandas needlessly)
+STARTUP_MODULES = ('helpers', 'sweep', 'main', 'cli', 'metrics', 'render')
+
+# Fake backend settings (see fake_psse/psspy.py)
+FAKE_BUSES_ENV = "PSSPY_FAKE_BUSES"
+FAKE_REPLAY_ENV = "PSSPY_FAKE_REPLAY"
+
+
+def synthetic_run(n_buses, n_steps=2000, seed=0):
+    """
+    Channel data shaped like dyntools.CHNF.get_data for a system of n_buses buses,
+    with one machine per four buses (POWR and SPD) and FREQ and VOLT on every bus.
+    """
+    rng = np.random.default_rng(seed)
+    n_machines = max(1, n_buses // 4)
+    time_axis = np.linspace(0.0, 20.0, n_steps)
+
+    identifiers = {0: 'Time(s)'}
+    channel = 1
+    for bus in range(1, n_machines + 1):
+        identifiers[channel] = f"POWR {bus}[BUS{bus} 16.500]1"
+        identifiers[channel + 1] = f"SPD {bus}[BUS{bus} 16.500]1"
+        channel += 2
+    for bus in range(1, n_buses + 1):
+        identifiers[channel] = f"FREQ {bus}[BUS{bus} 230.00]"
+        identifiers[channel + 1] = f"VOLT {bus}[BUS{bus} 230.00]"
+        channel += 2
+
+    damping = np.exp(-0.3 * time_axis) * np.sin(2 * np.pi * 1.2 * time_axis)
+    data = {'time': time_axis}
+    for channel in range(1, len(identifiers)):
+        data[channel] = (rng.normal(0.0, 0.01) + 0.05 * rng.random() * damping).astype(np.float32)
+    return "synthetic run", identifiers, data
+
+
+def _timed(function, repeat):
+    """Best wall-clock time of a function over a number of repetitions, with its last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def benchmark_size(n_buses, n_steps, repeat, workdir):
+    """Time every post-processing stage for one system size; returns stage -> seconds"""
+    _, e, z = synthetic_run(n_buses, n_steps)
+    timings = {}
+
+    timings["demux"], blocks = _timed(lambda: demux_channels(e, z, quantities=QUANTITIES), repeat)
+    metadata = {"case": f"synthetic_{n_buses}", "runtime": 20}
+
+    store_base = os.path.join(workdir, f"bus{n_buses}")
+    timings["save_npz"], store_path = _timed(lambda: save_run(store_base, blocks, metadata, fmt="npz"), repeat)
+    timings["load_npz"], _ = _timed(lambda: [load_run(store_path)[q].values.sum() for q in QUANTITIES], repeat)
+    timings["write_csv"], _ = _timed(lambda: write_csv(blocks, workdir, f"bus{n_buses}"), repeat)
+    return timings
+
+
+def benchmark_pipeline(case_folder, disturbance_type, n_buses=None, repeat=3, workdir="."):
+    """
+    Time run_case_simulation end to end on the fake backend, in workdir (a scratch copy of
+    the case): from the case files (cold), from a restored snapshot and as a result cache
+    hit. n_buses replaces the case by a synthetic system of that size, otherwise the
+    case's recorded results are replayed. Returns stage -> seconds.
+    """
+    import helpers
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    shutil.copytree(os.path.join(here, "case_data", case_folder), os.path.join(workdir, "case_data", case_folder),
+                    dirs_exist_ok=True)
+    settings = {FAKE_BUSES_ENV: str(n_buses) if n_buses else "",
+                FAKE_REPLAY_ENV: "" if n_buses else os.path.join(here, "results")}
+    previous = {name: os.environ.get(name) for name in settings}
+    cwd = os.getcwd()
+    os.environ.update(settings)
+    os.chdir(workdir)
+    try:
+        helpers.use_backend("fake")
+        helpers.init_psse(200000)
+
+        def run(**options):
+            if helpers.run_case_simulation(case_folder, disturbance_type, **options) is None:
+                raise RuntimeError(f"Benchmark run of {case_folder} ({disturbance_type}) failed")
+
+        timings = {}
+        timings["pipeline_cold"], _ = _timed(functools.partial(run, use_snapshot=False, use_cache=False), repeat)
+        run(use_cache=False)  # prepares the snapshot
+        timings["pipeline_snapshot"], _ = _timed(functools.partial(run, use_cache=False), repeat)
+        run(force=True)  # stores the cache entry
+        timings["pipeline_cached"], _ = _timed(run, repeat)
+        return timings
+    finally:
+        os.chdir(cwd)
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _log_timings(label, timings):
+    logger.info(f"{label}: " + ", ".join(f"{stage} {seconds * 1e3:.1f} ms" for stage, seconds in timings.items()))
+
+
+def run_benchmarks(sizes, n_steps=2000, repeat=3, pipeline_buses=(), case_folder="case_NRE",
+                   disturbance_type="line_fault"):
+    """
+    Run the post-processing benchmark for every system size and the pipeline benchmark
+    for the case and each synthetic system size (None to skip the pipeline);
+    returns {size or pipeline label: {stage: seconds}}
+    """
+    workdir = tempfile.mkdtemp(prefix="psspy_benchmark_")
+    try:
+        results = {}
+        for n_buses in sizes:
+            results[str(n_buses)] = benchmark_size(n_buses, n_steps, repeat, workdir)
+            _log_timings(f"{n_buses} buses", results[str(n_buses)])
+        if pipeline_buses is not None:
+            for n_buses in (None, *pipeline_buses):
+                label = f"pipeline {n_buses} buses" if n_buses else f"pipeline {case_folder}"
+                results[label] = benchmark_pipeline(case_folder, disturbance_type, n_buses, repeat,
+                                                    os.path.join(workdir, label.replace(" ", "_")))
+                _log_timings(label, results[label])
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def import_time(module, repeat=3):
+    """Best time (s) to import a module in a fresh interpreter, None if it cannot be imported here"""
+    code = f"import time; t0 = time.perf_counter(); import {module}; print(time.perf_counter() - t0)"
+    best = None
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        if process.returncode != 0:
+            logger.warning(f"Cannot import {module}: {process.stderr.strip().splitlines()[-1]}")
+            return None
+        seconds = float(process.stdout.split()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def startup_benchmark(modules=STARTUP_MODULES, repeat=3):
+    """Import time of every entry-point module; returns {module: seconds}"""
+    timings = {}
+    for module in modules:
+        seconds = import_time(module, repeat)
+        if seconds is not None:
+            timings[module] = seconds
+    logger.info("Import times: " + ", ".join(f"{module} {seconds * 1e3:.1f} ms" for module, seconds in timings.items()))
+    return timings
+
+
+def compare(results, baseline, tolerance=0.25):
+    """List (size, stage, baseline, current) for stages more than tolerance slower than the baseline"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if reference is not None and seconds > reference * (1 + tolerance):
+                regressions.append((size, stage, reference, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation pipeline on the fake PSS/E backend")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[9, 118, 2000],
+                        help="system sizes in buses of the post-processing benchmark")
+    parser.add_argument("--pipeline-buses", type=int, nargs="*", default=[2000],
+                        help="synthetic system sizes of the pipeline benchmark, besides the case itself")
+    parser.add_argument("--case", default="case_NRE", help="case folder of the pipeline benchmark")
+    parser.add_argument("--disturbance", default="line_fault", help="disturbance type of the pipeline benchmark")
+    parser.add_argument("--no-pipeline", action="store_true", help="skip the pipeline benchmark")
+    parser.add_argument("--steps", type=int, default=2000, help="time steps per run")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per stage (best time is kept)")
+    parser.add_argument("--save", metavar="FILE", help="write the timings as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the timings against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--no-startup", action="store_true", help="skip the module import time benchmark")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.steps, args.repeat, None if args.no_pipeline else args.pipeline_buses,
+                             args.case, args.disturbance)
+    if not args.no_startup:
+        results["startup"] = startup_benchmark(repeat=args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Baseline saved: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for size, stage, reference, seconds in regressions:
+            where = f"import {stage}" if size == "startup" else f"{size} buses, {stage}"
+            logger.error(f"{where}: {seconds * 1e3:.1f} ms (baseline {reference * 1e3:.1f} ms)")
+        if regressions:
+            sys.exit(1)
+        logger.info("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Case Data Parser
+Reads the network tables of PSS/E .raw power flow files (revisions 31-33, other
+revisions are rejected) and the model records of .dyr dynamics files into NumPy structured arrays, without a
+PSS/E session. Parsed cases are cached in a binary sidecar next to the source
+file (<file>.npz), so opening an unchanged case again skips the text parsing.
+"""
+
+import csv
+import os
+import re
+import numpy as np
+from loguru import logger
+
+# Bump when the array layouts below change, so stale sidecars are re-parsed
+PARSER_VERSION = 2
+
+RAW_REVISIONS = (31, 32, 33)
+
+# Order of the data sections following the three header lines
+RAW_SECTIONS = [
+    "bus", "load", "fixed_shunt", "generator", "branch", "transformer", "area",
+    "two_terminal_dc", "vsc_dc", "impedance_correction", "multi_terminal_dc",
+    "multi_section_line", "zone", "inter_area_transfer", "owner", "facts",
+    "switched_shunt", "gne", "induction_machine",
+]
+
+BUS_DTYPE = np.dtype([
+    ('number', np.int64), ('name', 'U12'), ('base_kv', np.float64), ('type', np.int32),
+    ('area', np.int32), ('zone', np.int32), ('owner', np.int32), ('vm', np.float64), ('va', np.float64),
+])
+
+LOAD_DTYPE = np.dtype([
+    ('bus', np.int64), ('id', 'U2'), ('status', np.int32), ('area', np.int32), ('zone', np.int32),
+    ('p', np.float64), ('q', np.float64),
+])
+
+GENERATOR_DTYPE = np.dtype([
+    ('bus', np.int64), ('id', 'U2'), ('pg', np.float64), ('qg', np.float64), ('qt', np.float64),
+    ('qb', np.float64), ('vs', np.float64), ('ireg', np.int64), ('mbase', np.float64),
+    ('status', np.int32), ('pt', np.float64), ('pb', np.float64),
+])
+
+BRANCH_DTYPE = np.dtype([
+    ('from_bus', np.int64), ('to_bus', np.int64), ('ckt', 'U2'), ('r', np.float64), ('x', np.float64),
+    ('b', np.float64), ('rate_a', np.float64), ('status', np.int32),
+])
+
+TRANSFORMER_DTYPE = np.dtype([
+    ('from_bus', np.int64), ('to_bus', np.int64), ('third_bus', np.int64), ('ckt', 'U2'),
+    ('status', np.int32), ('r12', np.float64), ('x12', np.float64), ('sbase12', np.float64),
+])
+
+RAW_TABLES = {
+    "buses": BUS_DTYPE,
+    "loads": LOAD_DTYPE,
+    "generators": GENERATOR_DTYPE,
+    "branches": BRANCH_DTYPE,
+    "transformers": TRANSFORMER_DTYPE,
+}
+
+# A "/" that is not inside a quoted string starts a comment
+_COMMENT = re.compile(r"/(?=(?:[^']*'[^']*')*[^']*$)")
+
+# Integer constants (ICONs) at the start of a .dyr record, before the model's CONs; models not listed have none
+DYR_ICON_COUNTS = {
+    "REGCA1": 1,   # LVPLSW
+    "REECB1": 5,   # monitored bus, PFFLAG, VFLAG, QFLAG, PQFLAG
+    "REPCA1": 7,   # IREG, from/to bus and id of the monitored branch, VCFLAG, REFFLAG, FFLAG
+}
+
+# .dyr tokens: quoted strings, the record terminator "/", or bare values separated by commas or spaces
+_DYR_TOKEN = re.compile(r"'([^']*)'|(/)|([^\s,/']+)")
+
+
+def _strip_comment(line):
+    return _COMMENT.split(line, maxsplit=1)[0]
+
+
+def _is_section_end(line):
+    """Section terminator: a record starting with 0 (or Q at the end of the file)"""
+    record = _strip_comment(line).strip()
+    return record in ("0", "Q") or record.startswith(("0 ", "0,"))
+
+
+def split_raw_sections(path):
+    """Return the header lines and a dict of section name -> raw record lines"""
+    with open(path, "r", encoding="latin-1") as f:
+        lines = f.read().splitlines()
+
+    header = lines[:3]
+    sections = {}
+    current = []
+    section_number = 0
+    for line in lines[3:]:
+        if section_number >= len(RAW_SECTIONS):
+            break
+        if _is_section_end(line):
+            sections[RAW_SECTIONS[section_number]] = current
+            current = []
+            section_number += 1
+            if line.strip().startswith("Q"):
+                break
+        else:
+            current.append(line)
+    return header, sections
+
+
+def parse_records(lines):
+    """Split comma separated records into lists of tokens, with quotes and comments removed"""
+    rows = csv.reader((_strip_comment(line) for line in lines), quotechar="'", skipinitialspace=True)
+    return [[token.strip() for token in row] for row in rows]
+
+
+def _transformer_records(lines):
+    """Group transformer lines into records: 4 lines for two-winding, 5 for three-winding"""
+    records = []
+    rows = parse_records(lines)
+    i = 0
+    while i < len(rows):
+        k_bus = int(rows[i][2])
+        n_lines = 4 if k_bus == 0 else 5
+        records.append(rows[i:i + n_lines])
+        i += n_lines
+    return records
+
+
+def _field(row, i, kind=float, default=0):
+    """Token i of a record converted to kind; blank or missing tokens give the default"""
+    if i < len(row) and row[i] != "":
+        return kind(float(row[i])) if kind is int else kind(row[i])
+    return default
+
+
+def _table(rows, dtype, convert):
+    """Structured array of the given dtype built from converted record tuples"""
+    return np.array([convert(row) for row in rows], dtype=dtype)
+
+
+def bus_index(numbers):
+    """
+    Dense lookup from bus number to row: index[number] is the row of that bus,
+    -1 for numbers not in the case. Use it to map any bus column to bus rows,
+    e.g. index[case["branches"]["from_bus"]].
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    index = np.full(int(numbers.max()) + 1 if numbers.size else 1, -1, dtype=np.int64)
+    index[numbers] = np.arange(numbers.size)
+    return index
+
+
+def raw_revision(header):
+    """Format revision (REV field) of the first header line; ValueError if it is missing or not supported"""
+    fields = parse_records(header[:1])[0] if header else []
+    revision = _field(fields, 2, int, default=None)
+    if revision not in RAW_REVISIONS:
+        raise ValueError(f"Unsupported .raw revision {revision} (supported: {', '.join(map(str, RAW_REVISIONS))})")
+    return revision
+
+
+def parse_raw(path):
+    """Parse the bus, load, generator, branch and transformer tables of a .raw file"""
+    header, sections = split_raw_sections(path)
+
+    if raw_revision(header) == 31:
+        # I, NAME, BASKV, IDE, GL, BL, AREA, ZONE, VM, VA, OWNER
+        bus_record = lambda row: (
+            int(row[0]), row[1], float(row[2]), int(row[3]), int(row[6]), int(row[7]), int(row[10]),
+            float(row[8]), float(row[9]),
+        )
+    else:
+        # I, NAME, BASKV, IDE, AREA, ZONE, OWNER, VM, VA, ...
+        bus_record = lambda row: (
+            int(row[0]), row[1], float(row[2]), int(row[3]), int(row[4]), int(row[5]), int(row[6]),
+            float(row[7]), float(row[8]),
+        )
+    buses = _table(parse_records(sections.get("bus", [])), BUS_DTYPE, bus_record)
+
+    loads = _table(parse_records(sections.get("load", [])), LOAD_DTYPE, lambda row: (
+        int(row[0]), row[1], int(row[2]), int(row[3]), int(row[4]), float(row[5]), float(row[6]),
+    ))
+
+    generators = _table(parse_records(sections.get("generator", [])), GENERATOR_DTYPE, lambda row: (
+        int(row[0]), row[1], float(row[2]), float(row[3]), float(row[4]), float(row[5]), float(row[6]),
+        _field(row, 7, int), float(row[8]), int(row[14]), _field(row, 16), _field(row, 17),
+    ))
+
+    branches = _table(parse_records(sections.get("branch", [])), BRANCH_DTYPE, lambda row: (
+        int(row[0]), abs(int(row[1])), row[2], float(row[3]), float(row[4]), float(row[5]),
+        _field(row, 6), int(row[13]),
+    ))
+
+    transformers = _table(_transformer_records(sections.get("transformer", [])), TRANSFORMER_DTYPE, lambda record: (
+        int(record[0][0]), int(record[0][1]), int(record[0][2]), record[0][3], int(record[0][11]),
+        float(record[1][0]), float(record[1][1]), _field(record[1], 2, default=np.nan),
+    ))
+
+    return {
+        "header": header,
+        "buses": buses,
+        "loads": loads,
+        "generators": generators,
+        "branches": branches,
+        "transformers": transformers,
+        "bus_index": bus_index(buses["number"]),
+    }
+
+
+def _dyr_value(token, quoted):
+    """Numeric value of a .dyr parameter; quoted ids such as '0 ' are read as numbers when they are numeric"""
+    try:
+        return float(token.strip())
+    except ValueError:
+        if quoted:
+            return np.nan
+        raise
+
+
+def _dyr_text(path):
+    """Text of a .dyr file with // comments blanked out, so offsets still match the file"""
+    with open(path, "r", encoding="latin-1") as f:
+        text = f.read()
+    return re.sub(r"//[^\n]*", lambda match: " " * len(match.group()), text)
+
+
+def _dyr_record_tokens(path):
+    """Yield the token matches of each "/"-terminated record of a .dyr file"""
+    tokens = []
+    for match in _DYR_TOKEN.finditer(_dyr_text(path)):
+        if match.group(2):
+            if len(tokens) >= 3:
+                yield tokens
+            elif tokens:
+                logger.warning(f"{os.path.basename(path)}: skipping incomplete record {[t.group() for t in tokens]}")
+            tokens = []
+        else:
+            tokens.append(match)
+
+
+def _token_value(match):
+    quoted = match.group(1) is not None
+    return match.group(1) if quoted else match.group(3), quoted
+
+
+def _record_key(tokens):
+    """(bus, model, id) of a .dyr record"""
+    bus = int(float(_token_value(tokens[0])[0]))
+    return bus, _token_value(tokens[1])[0].strip().upper(), _token_value(tokens[2])[0].strip()
+
+
+def dyr_records(path):
+    """
+    Yield (bus, model, id, parameters) for every record of a .dyr file.
+    Handles // comment lines, comma or space separators and records spanning lines.
+    """
+    for tokens in _dyr_record_tokens(path):
+        bus, model, device_id = _record_key(tokens)
+        parameters = [_dyr_value(*_token_value(token)) for token in tokens[3:]]
+        yield bus, model, device_id, parameters
+
+
+def write_dyr_variant(source, target, changes):
+    """
+    Copy a .dyr file with some parameters replaced, leaving everything else (comments,
+    layout, quoted values) as it was. changes maps (bus, model, id, CON index) to the
+    new value, the index counting the model's CONs from 0 (after any ICONs, see
+    DYR_ICON_COUNTS), as change_plmod_con does from 1. Returns the number of parameters replaced.
+    """
+    with open(source, "r", encoding="latin-1") as f:
+        text = f.read()
+
+    by_record = {}
+    for (bus, model, device_id, index), value in changes.items():
+        by_record.setdefault((int(bus), model.upper(), str(device_id).strip()), []).append((index, value))
+
+    replacements = []
+    for tokens in _dyr_record_tokens(source):
+        key = _record_key(tokens)
+        first_con = 3 + DYR_ICON_COUNTS.get(key[1], 0)
+        for index, value in by_record.get(key, []):
+            if first_con + index >= len(tokens):
+                raise IndexError(f"{key} has no CON {index}")
+            token = tokens[first_con + index]
+            replacements.append((token.start(), token.end(), f"{value:.6G}"))
+
+    for start, end, value in sorted(replacements, reverse=True):
+        text = text[:start] + value + text[end:]
+    with open(target, "w", encoding="latin-1") as f:
+        f.write(text)
+    return len(replacements)
+
+
+def parse_dyr(path):
+    """
+    Parse a .dyr file into a dict of model name -> structured array with fields
+    bus, id and params (float array padded with NaN to the longest record of that model)
+    """
+    grouped = {}
+    for bus, model, device_id, parameters in dyr_records(path):
+        grouped.setdefault(model, []).append((bus, device_id, parameters))
+
+    models = {}
+    for model, records in grouped.items():
+        n_params = max(len(parameters) for _, _, parameters in records)
+        dtype = np.dtype([('bus', np.int64), ('id', 'U2'), ('params', np.float64, (n_params,))])
+        table = np.zeros(len(records), dtype=dtype)
+        table['params'] = np.nan
+        for row, (bus, device_id, parameters) in enumerate(records):
+            table[row]['bus'] = bus
+            table[row]['id'] = device_id
+            table[row]['params'][:len(parameters)] = parameters
+        models[model] = table
+    return models
+
+
+def sidecar_path(path):
+    return f"{path}.npz"
+
+
+def _source_stamp(path):
+    """Parser version, size and modification time identifying the parsed source file"""
+    stat = os.stat(path)
+    return np.array([PARSER_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _load_sidecar(path):
+    """Arrays of a sidecar that matches the source file, else None"""
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        with np.load(sidecar, allow_pickle=False) as data:
+            if not np.array_equal(data["_stamp"], _source_stamp(path)):
+                return None
+            return {name: data[name] for name in data.files if name != "_stamp"}
+    except (OSError, ValueError, KeyError) as ex:
+        logger.debug(f"Ignoring unreadable sidecar {sidecar}: {ex}")
+        return None
+
+
+def _write_sidecar(path, arrays):
+    """Write the parsed arrays next to the source file (skipped where the folder is read-only)"""
+    sidecar = sidecar_path(path)
+    tmp_path = f"{sidecar}.tmp{os.getpid()}.npz"
+    try:
+        np.savez(tmp_path, _stamp=_source_stamp(path), **arrays)
+        os.replace(tmp_path, sidecar)
+    except OSError as ex:
+        logger.debug(f"Could not write sidecar {sidecar}: {ex}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_raw(path, use_sidecar=True):
+    """
+    Read a .raw file as a dict with the header lines, the structured arrays
+    buses, loads, generators, branches and transformers, and bus_index (see bus_index())
+    """
+    arrays = _load_sidecar(path) if use_sidecar else None
+    if arrays is not None:
+        case = {name: arrays[name] for name in RAW_TABLES}
+        case["header"] = arrays["header"].tolist()
+        case["bus_index"] = arrays["bus_index"]
+        return case
+
+    case = parse_raw(path)
+    if use_sidecar:
+        _write_sidecar(path, {**{name: case[name] for name in RAW_TABLES},
+                              "header": np.array(case["header"]), "bus_index": case["bus_index"]})
+    return case
+
+
+def read_dyr(path, use_sidecar=True):
+    """Read a .dyr file as a dict of model name -> structured array (see parse_dyr())"""
+    arrays = _load_sidecar(path) if use_sidecar else None
+    if arrays is not None:
+        return arrays
+
+    models = parse_dyr(path)
+    if use_sidecar:
+        _write_sidecar(path, models)
+    return models
@@ -0,0 +1,343 @@
+"""
+Results Catalog
+Indexes the metadata of every stored run under results/ (case, contingency,
+disturbance, runtime, input digests, creation time, channel labels) in a SQLite
+database, and serves the traces of matching runs as one lazily loaded
+(runs x time x channels) array. Each run's block stays memory-mapped in its own
+result file and only the selected runs and channels are read. The index is
+updated incrementally: only new, changed or removed result files are touched.
+
+    python catalog.py                                   # update the index
+    python catalog.py --case case_RE --disturbance line_fault --quantity VOLT --channels BUS5
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import numpy as np
+from loguru import logger
+from result_store import STORE_EXTENSIONS, load_run, resample, save_run
+
+CATALOG_PATH = "cache/catalog.sqlite"
+
+# Run columns that can be queried; everything else stays in the metadata JSON
+RUN_COLUMNS = ("case_folder", "contingency", "disturbance", "channel_option", "runtime", "scenario", "sample",
+               "decimation", "early_stop", "backend", "created", "input_digest", "format", "n_steps", "t_end")
+
+# Bumped when the tables or the form of the stored paths change; an index of another version is rebuilt from the result files
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    case_folder TEXT, contingency TEXT, disturbance TEXT, channel_option TEXT, runtime REAL,
+    scenario TEXT, sample TEXT, decimation INTEGER, early_stop INTEGER, backend TEXT, created TEXT, input_digest TEXT,
+    format TEXT, n_steps INTEGER, t_end REAL,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS channels (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    quantity TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_case ON runs(case_folder, disturbance, contingency);
+CREATE INDEX IF NOT EXISTS channels_label ON channels(quantity, label);
+CREATE INDEX IF NOT EXISTS channels_run ON channels(run_id);
+"""
+
+# Legacy per-quantity CSV exports: <case>_<disturbance>_<channels>_<runtime>s_<QUANTITY>.csv
+_CSV_NAME = re.compile(r"^(?P<disturbance>line_fault|gen_change|outage|bus_fault)_(?P<channels>.+)_(?P<runtime>[\d.]+)s"
+                       r"_(?P<quantity>POWR|FREQ|VOLT|SPEED)\.csv$")
+
+
+def catalog_path(path):
+    """Form of a result file path in the catalog: normalised, with / separators on every platform"""
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def import_csv_runs(results_root="results", result_format="npz"):
+    """
+    Store legacy CSV exports (results/<contingency>/<case>/*_<QUANTITY>.csv) as result
+    files next to them, so they can be catalogued. Runs already stored are skipped.
+    Returns the number of runs imported.
+    """
+    import pandas as pd
+
+    groups = {}
+    for folder, _, files in os.walk(results_root):
+        case_folder = os.path.basename(folder)
+        for name in files:
+            if not name.startswith(f"{case_folder}_"):
+                continue
+            match = _CSV_NAME.match(name[len(case_folder) + 1:])
+            if match is not None:
+                stem = name[:-len(f"_{match['quantity']}.csv")]
+                groups.setdefault((folder, stem), (match, {}))[1][match["quantity"]] = os.path.join(folder, name)
+
+    extension = STORE_EXTENSIONS[result_format]
+    imported = 0
+    for (folder, stem), (match, paths) in sorted(groups.items(), key=lambda item: item[0]):
+        if os.path.exists(os.path.join(folder, stem + extension)):
+            continue
+        blocks = {quantity: pd.read_csv(path, index_col=0) for quantity, path in paths.items()}
+        metadata = {
+            "case": os.path.basename(folder),
+            "contingency": os.path.basename(os.path.dirname(folder)),
+            "disturbance": match["disturbance"],
+            "channel_option": match["channels"],
+            "runtime": float(match["runtime"]),
+            "imported_from": "csv",
+        }
+        save_run(os.path.join(folder, stem), blocks, metadata, fmt=result_format)
+        imported += 1
+    if imported:
+        logger.info(f"Imported {imported} CSV runs into the result store")
+    return imported
+
+
+class TraceArray:
+    """
+    One quantity of many catalogued runs as a (runs x time x channels) array with
+    labeled axes: runs (run ids), time (the longest run's time axis) and channels.
+    Nothing is read until the array is indexed; runs on a different time axis
+    (stopped early, decimated) are resampled, NaN past their end or where a run
+    lacks a channel.
+    """
+
+    def __init__(self, quantity, runs, positions, channels, time):
+        self.quantity = quantity
+        self.runs = runs              # catalog rows (dicts), one per run
+        self._positions = positions   # per run: column of each channel in its file, -1 if missing
+        self.channels = channels
+        self.time = time
+
+    @property
+    def shape(self):
+        return len(self.runs), len(self.time), len(self.channels)
+
+    @property
+    def run_ids(self):
+        return [run["id"] for run in self.runs]
+
+    def sel(self, runs=None, channels=None):
+        """Subset by run ids and/or channel labels, still without reading any data"""
+        rows = range(len(self.runs)) if runs is None else [self.run_ids.index(run_id) for run_id in runs]
+        cols = range(len(self.channels)) if channels is None else [self.channels.index(label) for label in channels]
+        return TraceArray(self.quantity, [self.runs[i] for i in rows],
+                          [self._positions[i][list(cols)] for i in rows],
+                          [self.channels[j] for j in cols], self.time)
+
+    def __getitem__(self, key):
+        """NumPy indexing over (runs, time, channels); only the selected runs and channels are read"""
+        key = key if isinstance(key, tuple) else (key,)
+        key = key + (slice(None),) * (3 - len(key))
+        rows = np.arange(len(self.runs))[key[0]]
+        cols = np.arange(len(self.channels))[key[2]]
+        values = self._read(np.atleast_1d(rows), np.atleast_1d(cols))
+        values = values[:, key[1], :]
+        if np.ndim(rows) == 0:
+            values = values[0]
+        if np.ndim(cols) == 0:
+            values = values[..., 0]
+        return values
+
+    def to_numpy(self):
+        return self[:, :, :]
+
+    def _read(self, rows, cols):
+        values = np.full((len(rows), len(self.time), len(cols)), np.nan)
+        for out, row in enumerate(rows):
+            positions = self._positions[row][cols]
+            present = positions >= 0
+            if not present.any():
+                continue
+            stored = load_run(self.runs[row]["path"])
+            block = stored.array(self.quantity)[:, positions[present]]  # reads only these columns
+            values[out][:, present] = resample(self.time, np.asarray(stored.time, dtype=np.float64),
+                                               np.asarray(block, dtype=np.float64))
+        return values
+
+
+class Catalog:
+    """SQLite index of the stored runs under results_root"""
+
+    def __init__(self, path=CATALOG_PATH, results_root="results"):
+        self.path = path
+        self.results_root = results_root
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.executescript("DROP TABLE IF EXISTS channels; DROP TABLE IF EXISTS runs;")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self):
+        """Index new and changed result files and drop removed ones; returns (added, removed)"""
+        extensions = tuple(STORE_EXTENSIONS.values())
+        on_disk = {}
+        for folder, _, files in os.walk(self.results_root):
+            for name in files:
+                if name.endswith(extensions):
+                    stat = os.stat(os.path.join(folder, name))
+                    on_disk[catalog_path(os.path.join(folder, name))] = (stat.st_size, stat.st_mtime_ns)
+
+        indexed = {row["path"]: (row["id"], row["size"], row["mtime_ns"])
+                   for row in self._db.execute("SELECT id, path, size, mtime_ns FROM runs")}
+        stale = [run_id for path, (run_id, size, mtime_ns) in indexed.items() if on_disk.get(path) != (size, mtime_ns)]
+        fresh = [path for path, stamp in on_disk.items() if path not in indexed or indexed[path][1:] != stamp]
+
+        with self._db:
+            self._db.executemany("DELETE FROM runs WHERE id = ?", [(run_id,) for run_id in stale])
+            for path in sorted(fresh):
+                try:
+                    self._index(path, *on_disk[path])
+                except Exception as e:
+                    logger.warning(f"Not cataloguing {path}: {str(e)}")
+        added = len(fresh)
+        removed = len(stale) - sum(1 for path in fresh if path in indexed)
+        if added or removed:
+            logger.info(f"Catalog updated: {added} runs indexed, {removed} removed")
+        return added, removed
+
+    def _index(self, path, size, mtime_ns):
+        run = load_run(path)
+        metadata = run.metadata
+        digests = metadata.get("input_digests") or {}
+        row = {
+            "case_folder": metadata.get("case"),
+            "contingency": metadata.get("contingency"),
+            "disturbance": metadata.get("disturbance"),
+            "channel_option": metadata.get("channel_option"),
+            "runtime": metadata.get("runtime"),
+            "scenario": metadata.get("scenario"),
+            "sample": metadata.get("sample"),
+            "decimation": metadata.get("decimation", 1),
+            "early_stop": int("stability" in metadata),
+            # Runs from before backends were recorded (and imported CSVs) all came from PSS/E
+            "backend": metadata.get("backend", "psse"),
+            "created": metadata.get("created"),
+            "input_digest": ":".join(str(digests[name]) for name in sorted(digests)) or None,
+            "format": run.format,
+            "n_steps": len(run.time),
+            "t_end": float(run.time[-1]) if len(run.time) else None,
+        }
+        cursor = self._db.execute(
+            f"INSERT INTO runs (path, size, mtime_ns, {', '.join(RUN_COLUMNS)}, metadata) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(RUN_COLUMNS))}, ?)",
+            [path, size, mtime_ns, *(row[column] for column in RUN_COLUMNS), json.dumps(metadata, default=str)])
+        self._db.executemany("INSERT INTO channels (run_id, quantity, position, label) VALUES (?, ?, ?, ?)",
+                             [(cursor.lastrowid, quantity, position, label) for quantity in run.quantities
+                              for position, label in enumerate(run.columns(quantity))])
+
+    def find(self, order_by="id", **filters):
+        """
+        Catalogued runs matching every filter, as dicts ordered by id (or another run
+        column, then id). Filters are run columns (see RUN_COLUMNS) or path, the result
+        file under results_root (compared as catalog_path()); a list or tuple value
+        matches any of its items.
+        """
+        if order_by != "id" and order_by not in RUN_COLUMNS:
+            raise ValueError(f"Unknown catalog column {order_by!r}, expected one of {RUN_COLUMNS}")
+        # Paths are compared in catalog form, whichever separators the caller built them with
+        if isinstance(filters.get("path"), (list, tuple)):
+            filters["path"] = [catalog_path(path) for path in filters["path"]]
+        elif filters.get("path") is not None:
+            filters["path"] = catalog_path(filters["path"])
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in RUN_COLUMNS and column != "path":
+                raise ValueError(f"Unknown catalog column {column!r}, expected path or one of {RUN_COLUMNS}")
+            if isinstance(value, (list, tuple)):
+                # One JSON parameter, so lists of a whole sweep's paths stay under SQLite's variable limit
+                clauses.append(f"{column} IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(list(value)))
+            else:
+                clauses.append(f"{column} IS ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "id" if order_by == "id" else f"{order_by}, id"
+        return [dict(row) for row in self._db.execute(f"SELECT * FROM runs {where} ORDER BY {order}", params)]
+
+    def traces(self, quantity, channels=None, **filters):
+        """
+        TraceArray of one quantity over the runs matching the filters (see find()),
+        limited to the given channel labels (default: every label of those runs)
+        """
+        runs = self.find(**filters)
+        layout = {}
+        # The run ids are bound as one JSON parameter, as in find(), to stay under SQLite's variable limit
+        for run_id, position, label in self._db.execute(
+                "SELECT run_id, position, label FROM channels WHERE quantity = ? "
+                "AND run_id IN (SELECT value FROM json_each(?))",
+                [quantity, json.dumps([run["id"] for run in runs])]):
+            layout.setdefault(run_id, {})[label] = position
+        if channels is None:
+            channels = sorted(set().union(*(labels for labels in layout.values())),
+                              key=lambda label: (re.sub(r"\d+", "", label), int(re.sub(r"\D", "", label) or 0)))
+        runs = [run for run in runs if run["id"] in layout]
+        positions = [np.array([layout[run["id"]].get(label, -1) for label in channels], dtype=np.int64) for run in runs]
+
+        time = np.empty(0)
+        if runs:
+            longest = max(runs, key=lambda run: (run["n_steps"], run["t_end"] or 0))
+            time = np.asarray(load_run(longest["path"]).time, dtype=np.float64)
+        return TraceArray(quantity, runs, positions, list(channels), time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index stored runs and query their traces")
+    parser.add_argument("--results-root", default="results")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help="SQLite index file")
+    parser.add_argument("--import-csv", action="store_true", help="store legacy CSV exports before indexing")
+    parser.add_argument("--case", help="filter: case folder")
+    parser.add_argument("--disturbance", help="filter: disturbance type")
+    parser.add_argument("--contingency", help="filter: contingency name")
+    parser.add_argument("--quantity", help="export the traces of this quantity (POWR, FREQ, VOLT, SPEED)")
+    parser.add_argument("--channels", nargs="+", help="channel labels to export, e.g. BUS5 (default: all)")
+    parser.add_argument("--out", help="CSV file for the exported traces (default: print a summary)")
+    args = parser.parse_args()
+
+    if args.import_csv:
+        import_csv_runs(args.results_root)
+    with Catalog(args.catalog, args.results_root) as catalog:
+        catalog.update()
+        filters = {column: value for column, value in (("case_folder", args.case), ("disturbance", args.disturbance),
+                                                        ("contingency", args.contingency)) if value is not None}
+        runs = catalog.find(**filters)
+        logger.info(f"{len(runs)} runs match")
+        for run in runs:
+            logger.info(f"  {run['id']}: {run['contingency']}/{run['case_folder']} ({run['disturbance']}, "
+                        f"{run['n_steps']} steps, {run['created']})")
+        if args.quantity is None:
+            return
+
+        traces = catalog.traces(args.quantity, args.channels, **filters)
+        values = traces.to_numpy()
+        logger.info(f"{args.quantity} traces: {values.shape[0]} runs x {values.shape[1]} steps x {values.shape[2]} channels")
+        if args.out:
+            import pandas as pd
+            columns = pd.MultiIndex.from_product([traces.run_ids, traces.channels], names=["run", "channel"])
+            frame = pd.DataFrame(values.transpose(1, 0, 2).reshape(len(traces.time), -1), index=traces.time, columns=columns)
+            frame.to_csv(args.out, index_label="time")
+            logger.success(f"Traces saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
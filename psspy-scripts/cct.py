@@ -0,0 +1,150 @@
+"""
+Critical Clearing Time Search
+Finds the critical clearing time (CCT) of a three-phase fault at every bus of a case
+by bisection on the fault duration. Every probe restores the solved, initialized
+pre-fault snapshot and runs in segments with the stability monitor, so an unstable
+probe stops at its first swing. Faults are searched in parallel across workers.
+
+    python cct.py case_NRE --workers 4
+    python cct.py case_NRE --buses 4 5 6 --tolerance 0.002
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from loguru import logger
+import sweep
+from case_parser import read_raw
+from contingencies import get_case_raw
+from output_sink import OutputSink
+from stability import StabilityMonitor, UNSTABLE
+
+FAULT_TIME = 1.0  # faults are applied after 1 s of steady state (see run_psse_simulation)
+
+
+def bus_fault(bus, elements=None):
+    """Fault record for a three-phase fault at a bus, optionally cleared by tripping elements"""
+    return {"name": f"bus_fault_{bus}", "type": "bus_fault", "bus": int(bus), "elements": elements or []}
+
+
+def probe(case_folder, fault, duration, snapshot, files, runtime=5.0, channel_option="All", early_stop=None,
+          scratch_dir="scratch"):
+    """Simulate one fault duration (s) from the pre-fault snapshot; True if the response stays stable"""
+    from helpers import run_psse_simulation
+
+    clearing_time = FAULT_TIME + duration
+    monitor = StabilityMonitor(**dict({"start_time": clearing_time}, **(early_stop or {})))
+    output = OutputSink()
+    sav_file, dyr_file = files
+    run_psse_simulation(fault["name"], case_folder, sav_file, dyr_file, f"cct_{fault['name']}.out", "bus_fault",
+                        channel_option, runtime, out_dir=scratch_dir, snapshot=snapshot, contingency=fault,
+                        monitor=monitor, output=output, clearing_time=clearing_time, read_data=False)
+    return output.fatal is None and monitor.status != UNSTABLE
+
+
+def critical_clearing_time(case_folder, fault, snapshot, files, low=0.0, high=0.5, tolerance=0.005, **probe_options):
+    """
+    Bisect the fault duration between low and high (s) until the stable/unstable bracket
+    is narrower than tolerance. cct_s is the longest duration found stable (conservative).
+    status is "stable_at_max" when even high is stable and "unstable_at_min" when low is not.
+    """
+    probes = 0
+
+    def stable(duration):
+        nonlocal probes
+        probes += 1
+        return probe(case_folder, fault, duration, snapshot, files, **probe_options)
+
+    t0 = time.time()
+    result = {"bus": fault["bus"], "fault": fault["name"], "cct_s": None, "unstable_s": None, "status": "ok"}
+    if stable(high):
+        result.update(cct_s=high, status="stable_at_max")
+    elif low > 0 and not stable(low):
+        result.update(unstable_s=low, status="unstable_at_min")
+    else:
+        while high - low > tolerance:
+            middle = (low + high) / 2
+            if stable(middle):
+                low = middle
+            else:
+                high = middle
+        result.update(cct_s=low, unstable_s=high)
+    result.update(probes=probes, elapsed_s=time.time() - t0)
+    return result
+
+
+def _search_in_worker(case_folder, fault, snapshot, files, options):
+    """Pool entry point: search one fault using the worker's scratch folder"""
+    return critical_clearing_time(case_folder, fault, snapshot, files, scratch_dir=sweep._worker_scratch_dir, **options)
+
+
+def fault_buses(case_folder):
+    """In-service bus numbers of a case, read from its .raw file"""
+    buses = read_raw(get_case_raw(case_folder))["buses"]
+    return buses["number"][buses["type"] != 4].tolist()
+
+
+def run_cct(case_folder, buses=None, workers=1, channel_option="All", scratch_root="scratch", **options):
+    """
+    CCT of a bus fault at each bus (every bus of the case by default), searched in
+    parallel across faults. Returns a DataFrame with one row per bus.
+    """
+    from helpers import get_case_files, get_snapshot
+
+    files = get_case_files(case_folder)
+    # Build the pre-fault snapshot (with the stability monitor channels) once, before the workers start
+    snapshot = get_snapshot(case_folder, files[0], files[1], channel_option, monitor_channels=True)
+    if snapshot is None:
+        raise RuntimeError(f"Could not build the pre-fault snapshot for {case_folder}")
+
+    faults = [bus_fault(bus) for bus in (buses if buses is not None else fault_buses(case_folder))]
+    options = dict(options, channel_option=channel_option)
+    logger.info(f"Searching critical clearing times of {len(faults)} bus faults in {case_folder} on {workers} workers")
+
+    rows = []
+    if workers <= 1:
+        os.makedirs(scratch_root, exist_ok=True)
+        for fault in faults:
+            rows.append(critical_clearing_time(case_folder, fault, snapshot, files, scratch_dir=scratch_root, **options))
+            logger.info(f"{fault['name']}: {rows[-1]['status']}, CCT {rows[-1]['cct_s']} s ({rows[-1]['probes']} probes)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=sweep._init_worker, initargs=(scratch_root,)) as pool:
+            futures = {pool.submit(_search_in_worker, case_folder, fault, snapshot, files, options): fault for fault in faults}
+            for future in as_completed(futures):
+                fault = futures[future]
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    logger.error(f"{fault['name']}: search failed: {e}")
+                    rows.append({"bus": fault["bus"], "fault": fault["name"], "status": f"failed: {e}"})
+                    continue
+                logger.info(f"{fault['name']}: {rows[-1]['status']}, CCT {rows[-1]['cct_s']} s ({rows[-1]['probes']} probes)")
+
+    return pd.DataFrame(rows).sort_values("bus").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Critical clearing time search by bisection")
+    parser.add_argument("case_folder")
+    parser.add_argument("--buses", type=int, nargs="+", help="faulted buses (default: every bus of the case)")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel PSS/E worker processes")
+    parser.add_argument("--min-duration", type=float, default=0.0, help="shortest fault duration searched (s)")
+    parser.add_argument("--max-duration", type=float, default=0.5, help="longest fault duration searched (s)")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="width of the final bracket (s)")
+    parser.add_argument("--runtime", type=float, default=5.0, help="simulated time of each probe (s)")
+    parser.add_argument("--channels", default="All", help="channel option of the probe snapshot")
+    parser.add_argument("--out", help="CSV file (default: results/cct/<case>_cct.csv)")
+    args = parser.parse_args()
+
+    table = run_cct(args.case_folder, args.buses, workers=args.workers, channel_option=args.channels,
+                    low=args.min_duration, high=args.max_duration, tolerance=args.tolerance, runtime=args.runtime)
+    out = args.out or f"results/cct/{args.case_folder}_cct.csv"
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    table.to_csv(out, index=False)
+    logger.success(f"Critical clearing times saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
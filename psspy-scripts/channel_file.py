@@ -0,0 +1,24 @@
+"""
+Channel File Reader
+Reads PSS/E channel output files (.out and .outx) through dyntools into the
+dyntools-style (title, identifiers, data) the pipeline works with, optionally
+keeping only selected channels. dyntools comes from the selected simulation
+backend (see helpers.load_psse()): a PSS/E installation, or the stand-in of the
+fake backend for the files that backend writes. Channel files written by PSS/E
+cannot be read without a PSS/E installation; there is no native decoder, as none
+could be checked against files PSS/E actually writes.
+"""
+
+
+def read_channel_data(path, channels=None):
+    """
+    Read a channel file into dyntools-style (title, identifiers, data), limited to
+    the given channel numbers if any (time is always kept). Needs the backend loaded.
+    """
+    import dyntools  # type: ignore
+    d, e, z = dyntools.CHNF(path).get_data()
+    if channels is not None:
+        keep = set(int(channel) for channel in channels)
+        e = {channel: name for channel, name in e.items() if channel == 0 or channel in keep}
+        z = {channel: values for channel, values in z.items() if channel == 'time' or channel in keep}
+    return d, e, z
@@ -0,0 +1,53 @@
+"""
+Channel Selection
+Declarative choice of the buses whose channels are recorded, written as a channel
+option such as "area=1,2;kv=100-300" or "bus=4,5,7" ("All" records every bus).
+Criteria are combined: a bus is recorded when it matches all of them.
+"""
+
+import re
+import numpy as np
+
+SELECTION_KEYS = ("bus", "area", "zone", "kv")
+
+
+def parse_channel_option(option):
+    """Parse a channel option into a selection dict ({"area": [...], "kv": (low, high), ...}), None for "All" """
+    if option is None or option == "All":
+        return None
+    selection = {}
+    for part in option.split(";"):
+        key, _, values = part.partition("=")
+        key = key.strip().lower()
+        if key not in SELECTION_KEYS or not values.strip():
+            raise ValueError(f"Invalid channel selection {part!r}, expected {'|'.join(SELECTION_KEYS)}=<values>")
+        if key == "kv":
+            low, _, high = values.partition("-")
+            selection["kv"] = (float(low), float(high or low))
+        else:
+            selection[key] = [int(value) for value in values.split(",")]
+    return selection
+
+
+def channel_label(option):
+    """File-name safe label of a channel option, e.g. "area=1,2;kv=100-300" -> "area1-2_kv100-300" """
+    if option is None or option == "All":
+        return "All"
+    return re.sub(r"[^A-Za-z0-9._-]+", "", option.replace(";", "_").replace(",", "-").replace("=", ""))
+
+
+def select_buses(buses, selection):
+    """Bus numbers of a structured bus array (fields number, area, zone, base_kv) matching a selection"""
+    if selection is None:
+        return buses["number"]
+    mask = np.ones(len(buses), dtype=bool)
+    if "bus" in selection:
+        mask &= np.isin(buses["number"], selection["bus"])
+    if "area" in selection:
+        mask &= np.isin(buses["area"], selection["area"])
+    if "zone" in selection:
+        mask &= np.isin(buses["zone"], selection["zone"])
+    if "kv" in selection:
+        low, high = selection["kv"]
+        mask &= (buses["base_kv"] >= low) & (buses["base_kv"] <= high)
+    return buses["number"][mask]
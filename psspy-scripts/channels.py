@@ -0,0 +1,88 @@
+"""
+Channel Demultiplexing
+Parses PSS/E channel identifiers once and splits the channel data returned by
+dyntools into one 2-D block per quantity (POWR, FREQ, VOLT, SPD, ANGL, ...)
+"""
+
+import re
+import numpy as np
+
+# Offsets that turn deviation channels into absolute values (e.g. speed deviation -> p.u. speed)
+QUANTITY_OFFSETS = {
+    'FREQ': 1.0,    # bus frequency deviation
+    'SPD': 1.0,     # machine speed deviation
+}
+
+# Structured index describing every channel: its number in the channel file,
+# quantity prefix, bus number and machine/device id ('' for bus quantities)
+CHANNEL_INDEX_DTYPE = np.dtype([
+    ('channel', np.int32),
+    ('quantity', 'U8'),
+    ('bus', np.int64),
+    ('id', 'U4'),
+])
+
+# e.g. "POWR 1[BUS1 16.500]1", "FREQ 4[BUS4 230.00]", "VOLT 7[BUS7 230.00]"
+_CHANNEL_ID = re.compile(r'^\s*([A-Za-z_]+)\s*(\d+)?\s*(?:\[[^\]]*\])?\s*(\S*)')
+
+
+def parse_channel_id(identifier):
+    """Split a channel identifier into (quantity, bus, id); bus is -1 when it has no bus number"""
+    match = _CHANNEL_ID.match(identifier)
+    if match is None:
+        return identifier.strip(), -1, ''
+    quantity, bus, device_id = match.groups()
+    return quantity.upper(), int(bus) if bus else -1, device_id
+
+
+def parse_channel_ids(e):
+    """Parse the dyntools channel identifier dict once into a compact structured index"""
+    channels = [channel for channel in e if channel != 0]  # channel 0 is time
+    index = np.empty(len(channels), dtype=CHANNEL_INDEX_DTYPE)
+    for row, channel in enumerate(channels):
+        quantity, bus, device_id = parse_channel_id(e[channel])
+        index[row] = (channel, quantity, bus, device_id)
+    return index
+
+
+def channel_labels(index):
+    """Column labels for a channel index: GEN_BUS<n> for machine channels, BUS<n> for bus channels"""
+    prefixes = np.where(index['id'] != '', 'GEN_BUS', 'BUS')
+    return np.char.add(prefixes, index['bus'].astype(str))
+
+
+def demux_channels(e, z, quantities=None, index=None):
+    """
+    Split channel data into one DataFrame per quantity.
+    Each quantity is copied once into a single 2-D array (channels x time) that the
+    DataFrame wraps without copying; all frames share the same time index. Columns
+    are sorted by label. Returns a dict keyed by quantity prefix.
+    """
+    import pandas as pd
+
+    if index is None:
+        index = parse_channel_ids(e)
+    time_index = pd.Index(np.asarray(z['time'], dtype=np.float64))
+    n_steps = len(time_index)
+
+    if quantities is None:
+        quantities = np.unique(index['quantity'])
+
+    blocks = {}
+    for quantity in quantities:
+        selected = index[index['quantity'] == quantity]
+        if len(selected) == 0:
+            continue
+        labels = channel_labels(selected)
+        order = np.argsort(labels, kind='stable')
+
+        block = np.empty((len(selected), n_steps), dtype=np.float64)
+        for row, channel in enumerate(selected['channel'][order]):
+            block[row] = z[channel]
+        offset = QUANTITY_OFFSETS.get(quantity)
+        if offset:
+            block += offset
+
+        # block.T is a (time x channels) view; pandas stores it as-is
+        blocks[str(quantity)] = pd.DataFrame(block.T, index=time_index, columns=labels[order], copy=False)
+    return blocks
@@ -0,0 +1,107 @@
+"""
+Command Line Entry Point
+One command for the pipeline stages; each subcommand imports only what its stage
+needs, so post-processing, rendering and reporting never start PSS/E and only
+rendering and the HTML report load plotly.
+
+    python cli.py simulate --workers 4 --no-plot   # options of main.py
+    python cli.py post-process --out results/metrics_summary.csv   # options of metrics.py
+    python cli.py render --workers 4
+    python cli.py report --html results/dashboard.html
+"""
+
+import argparse
+import os
+import sys
+from loguru import logger
+
+
+def simulate(argv):
+    """Run the simulation sweep (main.py)"""
+    import main
+    main.main(argv)
+
+
+def post_process(argv):
+    """Compute the stability metrics summary of the stored runs (metrics.py)"""
+    import metrics
+    metrics.main(argv)
+
+
+def render(argv):
+    """Render missing or out-of-date figures of the stored runs (render.py)"""
+    parser = argparse.ArgumentParser(prog="cli.py render", description=render.__doc__)
+    parser.add_argument("results_root", nargs="?", default="results")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel rendering processes")
+    args = parser.parse_args(argv)
+
+    from render import render_results
+    render_results(args.results_root, workers=args.workers)
+
+
+def report(argv):
+    """Summarize the stored runs, the metrics summary and the recorded phase timings (optionally as HTML)"""
+    parser = argparse.ArgumentParser(prog="cli.py report", description=report.__doc__)
+    parser.add_argument("results_root", nargs="?", default="results")
+    parser.add_argument("--metrics", default="results/metrics_summary.csv", help="metrics summary table (CSV)")
+    parser.add_argument("--profile", default="timings.jsonl", help="timings file written by --profile")
+    parser.add_argument("--html", nargs="?", const="results/dashboard.html", default=None, metavar="FILE",
+                        help="also write the interactive dashboard of every stored run (see dashboard.py)")
+    args = parser.parse_args(argv)
+
+    from result_store import STORE_EXTENSIONS
+    extensions = tuple(STORE_EXTENSIONS.values())
+    runs = {}
+    for folder, _, files in os.walk(args.results_root):
+        stored = sum(1 for name in files if name.endswith(extensions))
+        if stored:
+            contingency = os.path.relpath(folder, args.results_root).split(os.sep)[0]
+            runs[contingency] = runs.get(contingency, 0) + stored
+    logger.info(f"{sum(runs.values())} stored runs in {args.results_root}")
+    for contingency, n in sorted(runs.items()):
+        logger.info(f"  {contingency}: {n}")
+
+    if os.path.exists(args.metrics):
+        import pandas as pd
+        table = pd.read_csv(args.metrics, index_col=0)
+        logger.info(f"Metrics summary of {len(table)} runs ({args.metrics})")
+        for column, worst in (("freq_nadir_hz", "idxmin"), ("min_voltage_pu", "idxmin"), ("rocof_hz_s", "idxmax")):
+            if column in table and table[column].notna().any():
+                run = getattr(table[column], worst)()
+                logger.info(f"  worst {column}: {table.at[run, column]:.4f} ({run})")
+
+    if os.path.exists(args.profile):
+        from profiling import read_records, summarize
+        summary = summarize(read_records(args.profile))
+        logger.info(f"Phase timings ({args.profile})")
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]["seconds"]):
+            peak = f", peak {entry['peak_mb']:.1f} MB" if entry["peak_mb"] is not None else ""
+            logger.info(f"  {name}: {entry['seconds']:.2f} s in {entry['calls']} calls{peak}")
+
+    if args.html:
+        from dashboard import build_dashboard
+        build_dashboard(args.html, results_root=args.results_root)
+
+
+COMMANDS = {
+    "simulate": simulate,
+    "post-process": post_process,
+    "render": render,
+    "report": report,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="PSS/E dynamic simulation pipeline",
+        epilog="\n".join(f"  {name:<14}{command.__doc__}" for name, command in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=COMMANDS, help="pipeline stage; run '<command> -h' for its options")
+    parser.add_argument("options", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    COMMANDS[args.command](args.options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+PSS/E vs Sienna Comparison
+Compares the latest catalogued PSS/E base run of each case and contingency (no
+scenario, sample, decimation or early stop) against the Sienna
+(PowerSimulationsDynamics.jl) results exported by scripts/run_sienna_psse_comparison.jl
+to sienna_results/<contingency>/<case>/<QUANTITY>.csv. Both tools' outputs are
+interpolated onto one time grid and stacked into (pairs x time x channels) arrays,
+so RMSE, maximum deviation and nadir depth/time differences of every channel of
+every case/contingency pair come out of a few NumPy reductions. Only channels
+outside the tolerances are reported; with --gate any outlier fails the run.
+
+    python comparison.py                       # report outliers
+    python comparison.py --gate --out results/comparison.csv
+"""
+
+import argparse
+import os
+import re
+import sys
+import numpy as np
+from loguru import logger
+from catalog import CATALOG_PATH, Catalog
+from channels import QUANTITY_OFFSETS
+from result_store import load_run, resample
+
+SIENNA_DIR = "../sienna_results"
+
+# Quantities exported by both tools (same units: p.u., POWR on the 100 MVA system base)
+QUANTITIES = ("VOLT", "SPEED", "POWR")
+
+# SPEED is compared as the speed deviation: the Sienna export writes ω - 1, while stored
+# PSS/E runs hold absolute speed (the SPD deviation channel plus channels.QUANTITY_OFFSETS)
+PSSE_OFFSETS = {"SPEED": QUANTITY_OFFSETS["SPD"]}
+
+# Per quantity: largest accepted RMSE, maximum deviation, nadir depth difference and nadir time difference (s)
+TOLERANCES = {
+    "VOLT": {"rmse": 0.01, "max_deviation": 0.05, "nadir_depth": 0.02, "nadir_time": 0.5},
+    "SPEED": {"rmse": 1e-3, "max_deviation": 5e-3, "nadir_depth": 1e-3, "nadir_time": 0.5},
+    "POWR": {"rmse": 0.05, "max_deviation": 0.2, "nadir_depth": 0.1, "nadir_time": 0.5},
+}
+
+GRID_STEP = 0.01  # s, common time grid of the comparison
+EVENT_TIME = 1.0  # s, nadirs are searched after the disturbance
+
+
+def find_sienna_results(sienna_dir=SIENNA_DIR):
+    """(contingency, case) -> {quantity: csv path} of the exported Sienna results"""
+    pairs = {}
+    for contingency in sorted(os.listdir(sienna_dir)) if os.path.isdir(sienna_dir) else []:
+        for case in sorted(os.listdir(os.path.join(sienna_dir, contingency))):
+            folder = os.path.join(sienna_dir, contingency, case)
+            files = {quantity: os.path.join(folder, f"{quantity}.csv") for quantity in QUANTITIES
+                     if os.path.exists(os.path.join(folder, f"{quantity}.csv"))}
+            if files:
+                pairs[(contingency, case)] = files
+    return pairs
+
+
+def read_trajectories(path):
+    """(time, columns, time x channels values) of a CSV with a TIME column"""
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    return data[:, 0], [label.strip('"') for label in header[1:]], data[:, 1:]
+
+
+def psse_trajectories(run, quantity):
+    """(time, columns, time x channels values) of a stored PSS/E run in the units of the Sienna export"""
+    values = np.asarray(run.array(quantity), dtype=np.float64) - PSSE_OFFSETS.get(quantity, 0.0)
+    return run.time, run.columns(quantity), values
+
+
+def _natural_key(label):
+    """Sort BUS2 before BUS10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", label)]
+
+
+def stack_pairs(pairs, grid):
+    """
+    Stack one quantity of every pair onto the grid: returns (psse, sienna, columns) with
+    psse and sienna (pairs x time x channels) arrays, NaN where a side lacks a channel
+    or does not cover the grid
+    """
+    columns = sorted(set().union(*(set(p[1]) & set(s[1]) for p, s in pairs)), key=_natural_key)
+    position = {label: j for j, label in enumerate(columns)}
+    stacks = np.full((2, len(pairs), len(grid), len(columns)), np.nan)
+    for i, pair in enumerate(pairs):
+        for side, (t, labels, values) in enumerate(pair):
+            keep = [k for k, label in enumerate(labels) if label in position]
+            # PSS/E writes a disturbance time twice (before and after); keep the value after it
+            values = np.asarray(values, dtype=np.float64)
+            t, last = np.unique(np.asarray(t, dtype=np.float64)[::-1], return_index=True)
+            values = values[len(values) - 1 - last][:, keep]
+            stacks[side, i][:, [position[labels[k]] for k in keep]] = resample(grid, t, values)
+    return stacks[0], stacks[1], columns
+
+
+def _nadir(grid, values, event_time):
+    """Depth, time and dip below the pre-event value of the minimum of every (pair, channel) after event_time"""
+    after = grid >= event_time
+    window = np.where(np.isnan(values[:, after, :]), np.inf, values[:, after, :])
+    index = np.argmin(window, axis=1)
+    depth = np.take_along_axis(window, index[:, None, :], axis=1)[:, 0, :]
+    depth[np.isinf(depth)] = np.nan
+    before = values[:, ~after, :][:, -1, :] if (~after).any() else np.full(depth.shape, np.nan)
+    return depth, grid[after][index], before - depth
+
+
+def compare_quantity(grid, psse, sienna, event_time=EVENT_TIME):
+    """Per (pair, channel) error metrics of a stacked quantity as a dict of (pairs x channels) arrays"""
+    error = psse - sienna
+    valid = np.isfinite(error)
+    n = valid.sum(axis=1)
+    squared = np.where(valid, error ** 2, 0.0).sum(axis=1)
+    rmse = np.sqrt(np.divide(squared, n, out=np.full(n.shape, np.nan), where=n > 0))
+    max_deviation = np.where(n > 0, np.where(valid, np.abs(error), 0.0).max(axis=1), np.nan)
+    psse_depth, psse_time, psse_dip = _nadir(grid, psse, event_time)
+    sienna_depth, sienna_time, sienna_dip = _nadir(grid, sienna, event_time)
+    return {
+        "rmse": rmse,
+        "max_deviation": max_deviation,
+        "nadir_psse": psse_depth,
+        "nadir_sienna": sienna_depth,
+        "nadir_depth": np.abs(psse_depth - sienna_depth),
+        "nadir_time": np.abs(psse_time - sienna_time),
+        "dip": np.fmax(psse_dip, sienna_dip),
+        "samples": n,
+    }
+
+
+def base_run(catalog, contingency, case):
+    """
+    The most recently created catalogued run of a contingency and case at the base
+    operating point: real PSS/E backend, no load scenario, parameter sample,
+    decimation or early stop. None if there is none.
+    """
+    runs = catalog.find(contingency=contingency, case_folder=case, scenario=None, sample=None, decimation=1,
+                        early_stop=0, backend="psse", order_by="created")
+    return runs[-1] if runs else None
+
+
+def compare_all(catalog, sienna_dir=SIENNA_DIR, step=GRID_STEP, event_time=EVENT_TIME, tolerances=None):
+    """
+    Compare every Sienna result with the latest catalogued PSS/E run of the same
+    contingency and case (see base_run()). Returns a DataFrame with one row per
+    (pair, quantity, channel) and an outlier column naming the metrics outside the tolerances.
+    """
+    import pandas as pd
+
+    tolerances = tolerances or TOLERANCES
+    matched = []
+    for (contingency, case), files in find_sienna_results(sienna_dir).items():
+        run = base_run(catalog, contingency, case)
+        if run is None:
+            logger.warning(f"No PSS/E base run of {contingency}/{case} in the catalog, skipped")
+            continue
+        matched.append((contingency, case, files, load_run(run["path"])))
+    if not matched:
+        return pd.DataFrame()
+    logger.info(f"Comparing {len(matched)} case/contingency pairs")
+
+    rows = []
+    for quantity in QUANTITIES:
+        group = [(contingency, case, files, run) for contingency, case, files, run in matched
+                 if quantity in files and quantity in run]
+        if not group:
+            continue
+        pairs = [(psse_trajectories(run, quantity), read_trajectories(files[quantity])) for _, _, files, run in group]
+        end = max(min(p[0][-1], s[0][-1]) for p, s in pairs)
+        grid = np.arange(0.0, end + step / 2, step)
+        psse, sienna, columns = stack_pairs(pairs, grid)
+        metrics = compare_quantity(grid, psse, sienna, event_time)
+
+        limits = tolerances[quantity]
+        for i, (contingency, case, _, _) in enumerate(group):
+            for j, channel in enumerate(columns):
+                if metrics["samples"][i, j] == 0:
+                    continue
+                row = {"contingency": contingency, "case": case, "quantity": quantity, "channel": channel}
+                row.update({name: values[i, j] for name, values in metrics.items()})
+                if not row["dip"] > limits["nadir_depth"]:
+                    row["nadir_time"] = np.nan  # no real dip: the time of a flat minimum means nothing
+                row["outlier"] = ",".join(name for name, limit in limits.items() if row[name] > limit)
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PSS/E runs against the exported Sienna results")
+    parser.add_argument("--sienna-dir", default=SIENNA_DIR, help="exported Sienna results")
+    parser.add_argument("--results-root", default="results")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help="SQLite index file")
+    parser.add_argument("--step", type=float, default=GRID_STEP, help="comparison time step (s)")
+    parser.add_argument("--event-time", type=float, default=EVENT_TIME, help="disturbance time (s)")
+    parser.add_argument("--out", help="CSV file with the metrics of every channel")
+    parser.add_argument("--gate", action="store_true", help="exit with status 1 if any channel is an outlier")
+    args = parser.parse_args()
+
+    with Catalog(args.catalog, args.results_root) as catalog:
+        catalog.update()
+        table = compare_all(catalog, args.sienna_dir, args.step, args.event_time)
+    if table.empty:
+        logger.warning(f"Nothing to compare (Sienna results in {args.sienna_dir})")
+        return
+    if args.out:
+        table.to_csv(args.out, index=False)
+        logger.info(f"Comparison saved: {args.out}")
+
+    outliers = table[table["outlier"] != ""]
+    for row in outliers.itertuples():
+        logger.error(f"{row.contingency}/{row.case} {row.quantity} {row.channel}: {row.outlier} "
+                     f"(RMSE {row.rmse:.3g}, max {row.max_deviation:.3g}, nadir {row.nadir_psse:.4g} vs "
+                     f"{row.nadir_sienna:.4g}, {row.nadir_time:.2f} s apart)")
+    logger.info(f"{len(table)} channels compared, {len(outliers)} outliers")
+    if args.gate and len(outliers):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
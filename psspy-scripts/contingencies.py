@@ -0,0 +1,286 @@
+"""
+Contingency Engine
+Enumerates N-1 (and optionally N-2) branch, transformer and generator outages from
+a case's .raw file, prunes duplicate and islanding outages before simulation and
+schedules the rest as sweep jobs with deterministic names and output paths.
+Islanding outages are found from the bridges of the network graph (and of the graph
+without each element for N-2) rather than by checking every combination.
+"""
+
+import itertools
+import os
+import re
+import numpy as np
+from loguru import logger
+from case_parser import read_dyr, read_raw
+
+
+def get_case_raw(case_folder):
+    """Path of the .raw file in a case folder (None if there is none)"""
+    base_path = f"case_data/{case_folder}"
+    for file in sorted(os.listdir(base_path)):
+        if file.endswith('.raw'):
+            return f"{base_path}/{file}"
+    return None
+
+
+def get_case_dyr(case_folder):
+    """Path of the .dyr file in a case folder (None if there is none)"""
+    base_path = f"case_data/{case_folder}"
+    for file in sorted(os.listdir(base_path)):
+        if file.endswith('.dyr'):
+            return f"{base_path}/{file}"
+    return None
+
+
+def machine_models(dyr_path):
+    """(bus, id) -> sorted tuple of (model, parameters) of every dynamic model record in a .dyr file"""
+    models = {}
+    for model, table in read_dyr(dyr_path).items():
+        for bus, device_id, parameters in zip(table["bus"].tolist(), table["id"].tolist(), table["params"]):
+            values = tuple(float(value) for value in parameters if not np.isnan(value))
+            models.setdefault((bus, device_id.strip()), []).append((model, values))
+    return {key: tuple(sorted(records)) for key, records in models.items()}
+
+
+def _safe(text):
+    """Make a circuit or machine id usable in file names"""
+    return re.sub(r'[^A-Za-z0-9]+', '', text) or "0"
+
+
+def element_name(element):
+    """Deterministic short name of an outage element"""
+    if element["kind"] == "machine":
+        return f"machine_{element['bus']}-{_safe(element['id'])}"
+    if element["kind"] == "three_winding":
+        return f"branch_{element['from_bus']}-{element['to_bus']}-{element['third_bus']}-{_safe(element['ckt'])}"
+    return f"branch_{element['from_bus']}-{element['to_bus']}-{_safe(element['ckt'])}"
+
+
+def outage_elements(case, models=None):
+    """
+    In-service outage candidates of a parsed case. Each element carries a signature
+    of its electrical data (and for machines their dynamic models, see machine_models())
+    so that identical parallel elements can be recognised. Values are plain Python
+    types so contingencies can be hashed and serialized.
+    """
+    elements = []
+    branches = case["branches"][case["branches"]["status"] != 0]
+    for branch in branches.tolist():
+        from_bus, to_bus, ckt, r, x, b = branch[:6]
+        from_bus, to_bus = sorted((from_bus, to_bus))
+        elements.append({
+            "kind": "branch", "from_bus": from_bus, "to_bus": to_bus, "ckt": ckt,
+            "signature": ("branch", from_bus, to_bus, r, x, b),
+        })
+    transformers = case["transformers"][case["transformers"]["status"] != 0]
+    for from_bus, to_bus, third_bus, ckt in transformers[["from_bus", "to_bus", "third_bus", "ckt"]].tolist():
+        if third_bus == 0:
+            from_bus, to_bus = sorted((from_bus, to_bus))
+            elements.append({
+                "kind": "branch", "from_bus": from_bus, "to_bus": to_bus, "ckt": ckt,
+                "signature": ("transformer", from_bus, to_bus, ckt),
+            })
+        else:
+            elements.append({
+                "kind": "three_winding", "from_bus": from_bus, "to_bus": to_bus, "third_bus": third_bus, "ckt": ckt,
+                "signature": ("three_winding", from_bus, to_bus, third_bus, ckt),
+            })
+    generators = case["generators"][case["generators"]["status"] != 0]
+    for bus, device_id, pg, qg, mbase in generators[["bus", "id", "pg", "qg", "mbase"]].tolist():
+        dynamics = (models or {}).get((bus, device_id.strip()), ())
+        elements.append({
+            "kind": "machine", "bus": bus, "id": device_id,
+            "signature": ("machine", bus, pg, qg, mbase, dynamics),
+        })
+    return elements
+
+
+def _edges(element):
+    """Bus-to-bus connections an element provides"""
+    if element["kind"] == "branch":
+        return [(element["from_bus"], element["to_bus"])]
+    if element["kind"] == "three_winding":
+        return [(element["from_bus"], element["to_bus"]), (element["from_bus"], element["third_bus"])]
+    return []
+
+
+def count_islands(buses, elements, removed=()):
+    """Number of connected groups of buses once the removed elements are taken out"""
+    parent = {bus: bus for bus in buses}
+
+    def find(bus):
+        while parent[bus] != bus:
+            parent[bus] = parent[parent[bus]]
+            bus = parent[bus]
+        return bus
+
+    removed_ids = set(id(element) for element in removed)
+    for element in elements:
+        if id(element) in removed_ids:
+            continue
+        for a, b in _edges(element):
+            if a in parent and b in parent:
+                parent[find(a)] = find(b)
+    return len(set(find(bus) for bus in buses))
+
+
+def bridges(buses, edges):
+    """
+    Indices of the bridges among edges, (a, b) bus pairs of a multigraph: the edges
+    whose removal splits a group of connected buses. Edges to buses outside buses
+    are ignored. Iterative Tarjan search, linear in the number of buses and edges.
+    """
+    adjacency = {bus: [] for bus in buses}
+    for k, (a, b) in enumerate(edges):
+        if a in adjacency and b in adjacency and a != b:
+            adjacency[a].append((b, k))
+            adjacency[b].append((a, k))
+
+    order, low, found = {}, {}, set()
+    for root in adjacency:
+        if root in order:
+            continue
+        order[root] = low[root] = len(order)
+        stack = [(root, -1, iter(adjacency[root]))]
+        while stack:
+            bus, via, neighbours = stack[-1]
+            for neighbour, k in neighbours:
+                if k == via:
+                    continue  # the edge we came in on (a parallel edge has another index)
+                if neighbour in order:
+                    low[bus] = min(low[bus], order[neighbour])
+                else:
+                    order[neighbour] = low[neighbour] = len(order)
+                    stack.append((neighbour, k, iter(adjacency[neighbour])))
+                    break
+            else:
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[bus])
+                    if low[bus] > order[parent]:
+                        found.add(via)
+    return found
+
+
+def _islanding(buses, elements, removed, cut_edges):
+    """
+    Indices of the elements whose outage islands part of the network once the removed
+    elements are out, given the bridges (cut_edges, as element indices per edge) of that
+    network. Elements with two edges that are not bridges are checked explicitly.
+    """
+    result = set()
+    for i, element in enumerate(elements):
+        edges = cut_edges.get(i)
+        if edges is None or i in removed:
+            continue
+        if any(edges):
+            result.add(i)
+        elif len(edges) > 1:
+            out = [elements[j] for j in removed] + [element]
+            if count_islands(buses, elements, out) > count_islands(buses, elements, out[:-1]):
+                result.add(i)
+    return result
+
+
+def islanding_outages(buses, elements, depth=1):
+    """
+    Islanding outages among elements as sets of element indices: single elements whose
+    outage splits the network, and (depth=2) pairs that split it only together. A pair
+    splits it when one element is a bridge once the other is out, so each element
+    costs one bridge search instead of a connectivity check per pair.
+    """
+    def cut_edges(removed):
+        edges, owners = [], []
+        for i, element in enumerate(elements):
+            if i not in removed:
+                for edge in _edges(element):
+                    edges.append(edge)
+                    owners.append(i)
+        found = bridges(buses, edges)
+        flags = {}
+        for k, i in enumerate(owners):
+            flags.setdefault(i, []).append(k in found)
+        return flags
+
+    singles = _islanding(buses, elements, set(), cut_edges(set()))
+    outages = {frozenset((i,)) for i in singles}
+    if depth >= 2:
+        for i, element in enumerate(elements):
+            if i in singles or not _edges(element):
+                continue
+            for j in _islanding(buses, elements, {i}, cut_edges({i})) - singles:
+                outages.add(frozenset((i, j)))
+    return outages
+
+
+def make_contingency(elements):
+    """Contingency record for a set of outage elements"""
+    elements = sorted(elements, key=element_name)
+    return {
+        "name": "trip_" + "__".join(element_name(element) for element in elements),
+        "type": "outage",
+        "elements": [{key: value for key, value in element.items() if key != "signature"} for element in elements],
+    }
+
+
+def enumerate_contingencies(raw_path, depth=1, dyr_path=None):
+    """
+    Enumerate N-1 (depth=1) or N-1 plus N-2 (depth=2) outages of a .raw case.
+    Outages that island part of the network, leave no generator in service or
+    duplicate an electrically identical outage (with the same dynamic models from
+    dyr_path, if given) are pruned. Sorted by name.
+    """
+    case = read_raw(raw_path)
+    buses = case["buses"]["number"][case["buses"]["type"] != 4].tolist()
+    elements = outage_elements(case, machine_models(dyr_path) if dyr_path is not None else None)
+    n_machines = sum(1 for element in elements if element["kind"] == "machine")
+    islanding = islanding_outages(buses, elements, depth)
+    singles = set(i for outage in islanding if len(outage) == 1 for i in outage)
+
+    contingencies = []
+    seen = set()
+    pruned = {"duplicate": 0, "islanding": 0}
+    for size in range(1, depth + 1):
+        for combination in itertools.combinations(range(len(elements)), size):
+            signature = tuple(sorted(elements[i]["signature"] for i in combination))
+            if signature in seen:
+                pruned["duplicate"] += 1
+                continue
+            seen.add(signature)
+
+            machines_out = sum(1 for i in combination if elements[i]["kind"] == "machine")
+            if (machines_out >= n_machines or singles.intersection(combination)
+                    or frozenset(combination) in islanding):
+                pruned["islanding"] += 1
+                continue
+            contingencies.append(make_contingency([elements[i] for i in combination]))
+
+    contingencies.sort(key=lambda contingency: contingency["name"])
+    logger.info(f"{os.path.basename(raw_path)}: {len(contingencies)} contingencies "
+                f"({pruned['duplicate']} duplicate and {pruned['islanding']} islanding outages pruned)")
+    return contingencies
+
+
+def schedule_contingencies(cases, depth=1, channel_option="All", runtime=20, **options):
+    """
+    Build sweep jobs for every enumerated contingency of every case.
+    Results land in results/<contingency name>/<case folder>/.
+    """
+    jobs = []
+    for case in cases:
+        raw_path = get_case_raw(case)
+        if raw_path is None:
+            logger.error(f"No .raw file in {case}, cannot enumerate contingencies")
+            continue
+        for contingency in enumerate_contingencies(raw_path, depth=depth, dyr_path=get_case_dyr(case)):
+            jobs.append({
+                "case_folder": case,
+                "disturbance_type": "outage",
+                "contingency": contingency,
+                "channel_option": channel_option,
+                "runtime": runtime,
+                **options,
+            })
+    return jobs
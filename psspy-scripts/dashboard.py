@@ -0,0 +1,157 @@
+"""
+Sweep Dashboard
+Writes the runs of a sweep into a single interactive HTML report: one WebGL panel
+per quantity, every catalogued run overlaid (one legend entry per run), traces
+downsampled in NumPy (min/max or LTTB) to a total point budget so the page stays
+responsive with 10k+ traces. The time axis spans the actual runtime of the runs.
+
+    python dashboard.py --out results/dashboard.html
+    python dashboard.py --case case_RE --disturbance line_fault --method lttb
+"""
+
+import argparse
+import os
+import numpy as np
+from loguru import logger
+from catalog import CATALOG_PATH, Catalog
+from downsample import METHODS, downsample
+from render import time_ticks
+
+PANELS = {
+    "POWR": ("Generator Power", "MW"),
+    "FREQ": ("Bus Frequency", "Frequency (p.u.)"),
+    "VOLT": ("Bus Voltage Magnitude", "Voltage magnitude (p.u.)"),
+    "SPEED": ("Generator Speed", "Speed (p.u.)"),
+}
+
+COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
+
+# Points drawn per trace are the total budget shared over all traces, within these bounds
+MAX_POINTS_PER_TRACE = 2000
+MIN_POINTS_PER_TRACE = 64
+TOTAL_POINTS = 2_000_000
+
+# Above this many traces hover labels are turned off, they dominate the browser's work
+HOVER_LIMIT = 2000
+
+
+def run_label(run):
+    """Legend label of a catalogued run"""
+    label = f"{run['contingency']}/{run['case_folder']}"
+    for extra in ("scenario", "sample"):
+        if run.get(extra):
+            label += f"@{run[extra]}"
+    return label
+
+
+def points_per_trace(n_traces, total_points=TOTAL_POINTS):
+    return int(np.clip(total_points // max(n_traces, 1), MIN_POINTS_PER_TRACE, MAX_POINTS_PER_TRACE))
+
+
+def dashboard_figure(catalog, quantities=tuple(PANELS), method="minmax", total_points=TOTAL_POINTS, title=None, **filters):
+    """
+    Plotly figure dict of the runs matching the filters (see Catalog.find()), with one
+    stacked panel per quantity. Built as plain dicts: validating 10k+ trace objects
+    would take longer than reading the data.
+    """
+    arrays = [catalog.traces(quantity, **filters) for quantity in quantities]
+    arrays = [(quantity, array) for quantity, array in zip(quantities, arrays) if array.runs]
+    if not arrays:
+        raise ValueError(f"No catalogued runs match {filters}")
+
+    n_traces = sum(array.shape[0] * array.shape[2] for _, array in arrays)
+    n_points = points_per_trace(n_traces, total_points)
+    hover = n_traces <= HOVER_LIMIT
+    end = max(max(run["runtime"] or 0, run["t_end"] or 0) for _, array in arrays for run in array.runs)
+    logger.info(f"Dashboard: {n_traces} traces, up to {n_points} points each ({method})")
+
+    labels = sorted({run_label(run) for _, array in arrays for run in array.runs})
+    colors = {label: COLORS[i % len(COLORS)] for i, label in enumerate(labels)}
+    in_legend = set()
+
+    data = []
+    rows = len(arrays)
+    gap = 0.06
+    height = (1 - gap * (rows - 1)) / rows
+    layout = {
+        "title": {"text": title or "Sweep dashboard", "x": 0.5},
+        "height": 320 * rows + 120,
+        "plot_bgcolor": "white",
+        "hovermode": "closest" if hover else False,
+        "legend": {"x": 1.02, "y": 1, "groupclick": "togglegroup"},
+        "margin": {"r": 260},
+        "annotations": [],
+    }
+    for row, (quantity, array) in enumerate(arrays, start=1):
+        name, ylabel = PANELS[quantity]
+        axis = "" if row == 1 else str(row)
+        top = 1 - (row - 1) * (height + gap)
+        layout[f"xaxis{axis}"] = {"range": [0, end], "tickvals": time_ticks(0, end), "anchor": f"y{axis}",
+                                  "gridcolor": "rgba(128, 128, 128, 0.3)"}
+        if row > 1:
+            layout[f"xaxis{axis}"]["matches"] = "x"  # zoom all panels together
+        if row == rows:
+            layout[f"xaxis{axis}"]["title"] = {"text": "Time (s)"}
+        layout[f"yaxis{axis}"] = {"domain": [top - height, top], "anchor": f"x{axis}", "title": {"text": ylabel},
+                                  "gridcolor": "rgba(128, 128, 128, 0.3)"}
+        layout["annotations"].append({"text": name, "x": 0.5, "y": top, "xref": "paper", "yref": "paper",
+                                      "xanchor": "center", "yanchor": "bottom", "showarrow": False})
+
+        for i, run in enumerate(array.runs):
+            values = array[i]
+            valid = ~np.isnan(values).all(axis=1)
+            last = valid.nonzero()[0][-1] + 1 if valid.any() else 0  # trim the tail of runs that stopped early
+            columns = ~np.isnan(values[:last]).all(axis=0)
+            if last == 0 or not columns.any():
+                continue
+            x, y = downsample(array.time[:last], values[:last][:, columns], n_points, method)
+            label = run_label(run)
+            for j, channel in enumerate(np.array(array.channels)[columns]):
+                trace = {
+                    "type": "scattergl", "mode": "lines", "xaxis": f"x{axis}", "yaxis": f"y{axis}",
+                    "x": np.round(x[:, j], 6).tolist(), "y": np.round(y[:, j], 6).tolist(),
+                    "name": label, "legendgroup": label, "showlegend": label not in in_legend,
+                    "line": {"color": colors[label], "width": 1},
+                }
+                if hover:
+                    trace["hovertemplate"] = f"{label}<br>{channel}: %{{y}}<extra></extra>"
+                else:
+                    trace["hoverinfo"] = "skip"
+                data.append(trace)
+                in_legend.add(label)
+    return {"data": data, "layout": layout}
+
+
+def build_dashboard(out="results/dashboard.html", catalog_path=CATALOG_PATH, results_root="results", **options):
+    """Update the catalog and write the dashboard HTML (see dashboard_figure() for options); returns its path"""
+    import plotly.io as pio
+
+    with Catalog(catalog_path, results_root) as catalog:
+        catalog.update()
+        figure = dashboard_figure(catalog, **options)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    pio.write_html(figure, out, include_plotlyjs=True, validate=False, config={"responsive": True})
+    logger.success(f"Dashboard saved: {out} ({len(figure['data'])} traces)")
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write an interactive HTML dashboard of the stored runs")
+    parser.add_argument("--out", default="results/dashboard.html", help="HTML file")
+    parser.add_argument("--results-root", default="results")
+    parser.add_argument("--case", nargs="+", help="filter: case folders")
+    parser.add_argument("--disturbance", nargs="+", help="filter: disturbance types")
+    parser.add_argument("--contingency", nargs="+", help="filter: contingency names")
+    parser.add_argument("--quantities", nargs="+", choices=list(PANELS), default=list(PANELS))
+    parser.add_argument("--method", choices=METHODS, default="minmax", help="downsampling method")
+    parser.add_argument("--total-points", type=int, default=TOTAL_POINTS, help="points drawn over all traces")
+    args = parser.parse_args(argv)
+
+    filters = {column: value for column, value in (("case_folder", args.case), ("disturbance", args.disturbance),
+                                                    ("contingency", args.contingency)) if value is not None}
+    build_dashboard(args.out, results_root=args.results_root, quantities=args.quantities, method=args.method,
+                    total_points=args.total_points, **filters)
+
+
+if __name__ == "__main__":
+    main()
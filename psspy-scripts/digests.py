@@ -0,0 +1,34 @@
+"""
+Input Digests
+Content hashes used to key the on-disk caches
+"""
+
+import hashlib
+import json
+import os
+
+# Memoized file digests keyed by (path, size, mtime) so unchanged files are hashed once per process
+_file_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _file_digests:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        _file_digests[key] = sha.hexdigest()
+    return _file_digests[key]
+
+
+def inputs_digest(paths, params=None):
+    """Combined digest of input file contents (None entries allowed) and a JSON-serializable parameter dict"""
+    sha = hashlib.sha256()
+    for path in paths:
+        sha.update(b'-' if path is None else file_digest(path).encode())
+    if params is not None:
+        sha.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
@@ -0,0 +1,73 @@
+"""
+Trace Downsampling
+Shape-preserving reduction of (time x channels) traces for plotting, vectorized
+over channels: min/max keeps the extremes of every time bin (nadirs and peaks
+survive any reduction), LTTB (largest triangle three buckets) keeps the points
+that best preserve the visual shape of smooth swings.
+"""
+
+import numpy as np
+
+METHODS = ("minmax", "lttb")
+
+
+def minmax(t, values, n_out):
+    """
+    Reduce values (time x channels) to about n_out points per channel: the minimum and
+    maximum of each of n_out // 2 equal bins, in time order. Returns (x, y), both
+    (points x channels), since each channel keeps its own sample times.
+    """
+    n, n_channels = values.shape
+    n_bins = max(1, n_out // 2)
+    if n <= n_out:
+        return np.repeat(np.asarray(t)[:, None], n_channels, axis=1), values
+    size = -(-n // n_bins)
+    padded = np.full((n_bins * size, n_channels), np.nan)
+    padded[:n] = values
+    bins = padded.reshape(n_bins, size, n_channels)
+    # NaN (padding or gaps) never wins; an all-NaN bin falls back to its first sample
+    low = np.argmin(np.where(np.isnan(bins), np.inf, bins), axis=1)
+    high = np.argmax(np.where(np.isnan(bins), -np.inf, bins), axis=1)
+    start = (np.arange(n_bins) * size)[:, None]
+    first = np.minimum(low, high) + start
+    second = np.maximum(low, high) + start
+    index = np.minimum(np.stack([first, second], axis=1).reshape(2 * n_bins, n_channels), n - 1)
+    return np.asarray(t)[index], np.take_along_axis(values, index, axis=0)
+
+
+def lttb(t, values, n_out):
+    """
+    Reduce values (time x channels) to n_out points per channel by largest triangle
+    three buckets. The first and last samples are always kept. Returns (x, y), both
+    (points x channels).
+    """
+    n, n_channels = values.shape
+    t = np.asarray(t, dtype=np.float64)
+    if n <= n_out or n_out < 3:
+        return np.repeat(t[:, None], n_channels, axis=1), values
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    index = np.empty((n_out, n_channels), dtype=np.int64)
+    index[0] = 0
+    index[-1] = n - 1
+    columns = np.arange(n_channels)
+    selected = np.zeros(n_channels, dtype=np.int64)
+    for k in range(n_out - 2):
+        start, end = edges[k], edges[k + 1]
+        next_end = edges[k + 2] if k + 2 < len(edges) else n
+        mean_t = t[end:next_end].mean()
+        mean_y = values[end:next_end].mean(axis=0)
+        t_a, y_a = t[selected], values[selected, columns]
+        area = np.abs((t_a - mean_t) * (values[start:end] - y_a) - (t_a - t[start:end, None]) * (mean_y - y_a))
+        selected = start + np.argmax(np.nan_to_num(area, nan=-1.0), axis=0)
+        index[k + 1] = selected
+    return t[index], np.take_along_axis(values, index, axis=0)
+
+
+def downsample(t, values, n_out, method="minmax"):
+    """Downsample (time x channels) values to about n_out points per channel, see minmax() and lttb()"""
+    if method == "minmax":
+        return minmax(t, values, n_out)
+    if method == "lttb":
+        return lttb(t, values, n_out)
+    raise ValueError(f"Unknown downsampling method {method!r}, expected one of {METHODS}")
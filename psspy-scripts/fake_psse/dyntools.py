@@ -0,0 +1,18 @@
+"""
+Fake PSS/E Backend: dyntools
+Stand-in for dyntools.CHNF that reads the channel files written by the stand-in
+psspy (always in this backend's own layout, see fake_channel_file.py)
+"""
+
+from fake_channel_file import read_channel_file
+
+
+class CHNF:
+    """Channel file reader with the dyntools interface the pipeline uses"""
+
+    def __init__(self, *outfiles, **options):
+        self.outfiles = outfiles
+
+    def get_data(self):
+        """(title, identifiers, data) of the first channel file"""
+        return read_channel_file(self.outfiles[0])
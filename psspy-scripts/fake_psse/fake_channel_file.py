@@ -0,0 +1,62 @@
+"""
+Fake PSS/E Backend: channel files
+The channel file layout of the stand-in psspy and dyntools. It is this backend's own
+layout, not PSS/E's, and nothing outside fake_psse/ reads it; a stream of 4-byte
+little-endian words:
+
+    int32           number of channels N
+    2 x 60 chars    title lines
+    N x 32 chars    channel identifiers
+    repeated        N + 1 float32 per time step (time, channel 1..N)
+"""
+
+import os
+import numpy as np
+
+TITLE_LENGTH = 60
+IDENTIFIER_LENGTH = 32
+_HEADER_WORD = np.dtype('<i4')
+_VALUE = np.dtype('<f4')
+
+
+def _decode(raw):
+    return raw.decode('latin-1').rstrip(' \x00')
+
+
+def write_channel_header(f, identifiers, n_channels, title=("", "")):
+    """Write the header to an open binary file; data records are appended after it"""
+    f.write(np.array([n_channels], dtype=_HEADER_WORD).tobytes())
+    for line in title:
+        f.write(line.encode('latin-1')[:TITLE_LENGTH].ljust(TITLE_LENGTH))
+    for channel in range(1, n_channels + 1):
+        f.write(identifiers[channel].encode('latin-1')[:IDENTIFIER_LENGTH].ljust(IDENTIFIER_LENGTH))
+
+
+def write_channel_records(f, time, values):
+    """Append (time steps x channels) values and their times as data records"""
+    values = np.asarray(values, dtype=_VALUE).reshape(len(time), -1)
+    records = np.empty((len(time), values.shape[1] + 1), dtype=_VALUE)
+    records[:, 0] = time
+    records[:, 1:] = values
+    f.write(records.tobytes())
+
+
+def read_channel_file(path):
+    """(title, identifiers, data) of a channel file written by the stand-in psspy, shaped like dyntools.CHNF.get_data"""
+    with open(path, 'rb') as f:
+        n_channels = int(np.frombuffer(f.read(4), dtype=_HEADER_WORD)[0])
+        title = [_decode(f.read(TITLE_LENGTH)) for _ in range(2)]
+        names = f.read(n_channels * IDENTIFIER_LENGTH)
+    offset = 4 + 2 * TITLE_LENGTH + n_channels * IDENTIFIER_LENGTH
+    n_steps, remainder = divmod(os.path.getsize(path) - offset, (n_channels + 1) * _VALUE.itemsize)
+    if n_channels <= 0 or n_steps < 0 or remainder:
+        raise ValueError(f"{path} is not a channel file of the fake PSS/E backend")
+    records = np.fromfile(path, dtype=_VALUE, offset=offset).reshape(n_steps, n_channels + 1)
+
+    identifiers = {0: 'Time(s)'}
+    data = {'time': records[:, 0].copy()}
+    for channel in range(1, n_channels + 1):
+        start = (channel - 1) * IDENTIFIER_LENGTH
+        identifiers[channel] = _decode(names[start:start + IDENTIFIER_LENGTH])
+        data[channel] = records[:, channel].copy()
+    return '\n'.join(title), identifiers, data
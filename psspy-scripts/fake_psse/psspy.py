@@ -0,0 +1,636 @@
+"""
+Fake PSS/E Backend: psspy
+Deterministic stand-in for the psspy calls the pipeline makes, so the caching,
+scheduling, post-processing and parallel stages can be run and timed without a
+PSS/E installation or license. Selected with PSSPY_BACKEND=fake or main.py
+--backend fake (see helpers.load_psse()).
+
+Cases are read from their .raw files (see case_parser.py), channel files are
+written in this backend's own layout whatever their extension (see
+fake_channel_file.py) and read back by the stand-in dyntools. Trajectories replay a recorded run when per-quantity CSVs
+named after the channel file exist (case_NRE_line_fault_All_20s.outx replays
+case_NRE_line_fault_All_20s_VOLT.csv, ...), otherwise they are synthesized as
+damped swings after each disturbance, seeded by the case and its parameter
+changes, so every run is reproducible. Configured by environment variables:
+
+    PSSPY_FAKE_REPLAY    folder searched for recorded CSVs (default: results, empty to always synthesize)
+    PSSPY_FAKE_BUSES     replace every case by a synthetic system of this many buses
+    PSSPY_FAKE_LATENCY   wall-clock seconds spent per simulated second (default: 0)
+    PSSPY_FAKE_DIVERGE   report non-convergence from this simulated time on
+
+    PSSPY_FAKE_BUSES=2000 PSSPY_FAKE_LATENCY=0.05 python main.py --backend fake --workers 4 --profile
+"""
+
+import functools
+import json
+import os
+import time
+import zlib
+import numpy as np
+from case_parser import read_raw
+from fake_channel_file import write_channel_header, write_channel_records
+from channels import QUANTITY_OFFSETS
+from result_store import resample
+
+REPLAY_ENV = "PSSPY_FAKE_REPLAY"
+BUSES_ENV = "PSSPY_FAKE_BUSES"
+LATENCY_ENV = "PSSPY_FAKE_LATENCY"
+DIVERGE_ENV = "PSSPY_FAKE_DIVERGE"
+
+# Default-value arguments, as in psspy
+_i = -100000000
+_f = -1.0e20
+_s = "\x00"
+
+DELT = 0.01  # s, integration time step; channel files start at -2 * DELT like PSS/E's
+SBASE = 100.0  # MVA, machine power channels are in p.u. on the system base
+
+# Recorded CSV per channel quantity (deviation channels are recorded with their offset added)
+RECORDED = {"POWR": "POWR", "SPD": "SPEED", "FREQ": "FREQ", "VOLT": "VOLT"}
+
+# Swing amplitude per quantity, and relative size of the disturbances
+AMPLITUDE = {"POWR": 0.1, "SPD": 2e-3, "FREQ": 2e-3, "VOLT": 0.01, "ANGL": 5.0}
+SEVERITY = {"branch_trip": 1.0, "fault": 1.5, "gen_change": 0.5, "machine_trip": 2.0}
+
+# chsb quantity codes
+CHSB_QUANTITIES = {2: ("POWR",), 7: ("SPD",), 12: ("FREQ",), 13: ("VOLT", "ANGL")}
+
+
+def _replay_root():
+    """Folder of the recorded CSVs, "" to always synthesize (set but empty is not the same as unset)"""
+    return os.environ.get(REPLAY_ENV, "results")
+
+
+def settings():
+    """Resolved environment settings that change the trajectories (part of the result cache and snapshot keys)"""
+    return {"replay": _replay_root(), "buses": os.environ.get(BUSES_ENV) or None,
+            "diverge": os.environ.get(DIVERGE_ENV) or None}
+
+
+class _Session:
+    """State of the simulated PSS/E session"""
+
+    def __init__(self, buses=None):
+        self.capacity = buses
+        self.case = None
+        self.bus_index = {}      # bus number -> position in the case
+        self.machine_index = {}  # (bus number, machine id) -> position in the case
+        self.channels = {}       # channel number -> (quantity, bus, machine id or '', identifier)
+        self.next_channel = 1
+        self.subsystems = {}     # subsystem id -> bus numbers
+        self.dyr = None
+        self.parameters = []
+        self.iterations = 0
+        self.warm = False
+        self.events = []
+        self.step = None         # time step index; time is (step - 2) * DELT
+        self.order = []          # channels in channel file order
+        self.positions = {}      # channel number -> position in the channel file
+        self.model = None
+        self.replay = []
+        self.current = None      # (step, channel values) of the last chnval
+        self.out = None
+        self.out_file = None
+
+
+_session = _Session()
+
+
+def _seed(*parts):
+    return zlib.crc32(repr(parts).encode())
+
+
+def _strings(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _time():
+    return (_session.step - 2) * DELT if _session.step is not None else 0.0
+
+
+# --- Cases -----------------------------------------------------------------
+
+def _synthetic_case(n_buses):
+    """Three-area system of n_buses buses with a machine on every fourth bus"""
+    numbers = np.arange(1, n_buses + 1)
+    rng = np.random.default_rng(n_buses)
+    machines = numbers[::4]
+    return {
+        "name": f"synthetic_{n_buses}",
+        "buses": {
+            "number": numbers.tolist(),
+            "name": [f"BUS{n}" for n in numbers],
+            "area": (1 + 3 * (numbers - 1) // n_buses).tolist(),
+            "zone": (1 + (numbers - 1) % 10).tolist(),
+            "base_kv": np.where(numbers % 4 == 1, 18.0, np.where(numbers % 2 == 0, 230.0, 138.0)).tolist(),
+            "vm": np.round(1.0 + rng.uniform(-0.03, 0.03, n_buses), 5).tolist(),
+            "va": np.round(rng.uniform(-20.0, 10.0, n_buses), 4).tolist(),
+        },
+        "machines": {"bus": machines.tolist(), "id": ["1"] * len(machines),
+                     "pg": np.round(rng.uniform(50.0, 250.0, len(machines)), 2).tolist()},
+    }
+
+
+def _raw_case(path):
+    """Case of a .raw file (in-service machines only)"""
+    raw = read_raw(path)
+    buses, generators = raw["buses"], raw["generators"]
+    generators = generators[generators["status"] != 0]
+    return {
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "buses": {
+            "number": buses["number"].tolist(),
+            "name": [name.strip("' ") for name in buses["name"]],
+            "area": buses["area"].tolist(),
+            "zone": buses["zone"].tolist(),
+            "base_kv": buses["base_kv"].tolist(),
+            "vm": buses["vm"].tolist(),
+            "va": buses["va"].tolist(),
+        },
+        "machines": {"bus": generators["bus"].tolist(), "id": [i.strip("' ") for i in generators["id"]],
+                     "pg": generators["pg"].tolist()},
+    }
+
+
+def _case_raw_path(path):
+    """The .raw file a PSS/E .sav was converted from: same name, or the only .raw next to it"""
+    for candidate in (path[:-4], os.path.splitext(path)[0] + ".raw"):
+        if candidate.endswith(".raw") and os.path.exists(candidate):
+            return candidate
+    folder = os.path.dirname(path) or "."
+    raws = sorted(name for name in os.listdir(folder) if name.endswith(".raw")) if os.path.isdir(folder) else []
+    return os.path.join(folder, raws[0]) if raws else None
+
+
+def _load_case(path):
+    """Load a case saved by save(), a .raw file or the .raw behind a PSS/E .sav; returns an error code"""
+    if os.environ.get(BUSES_ENV):
+        case = _synthetic_case(int(os.environ[BUSES_ENV]))
+    elif not os.path.exists(path):
+        return 3
+    elif path.endswith(".raw"):
+        case = _raw_case(path)
+    else:
+        try:
+            with open(path) as f:
+                case = json.load(f)["case"]
+        except (UnicodeDecodeError, ValueError, KeyError):
+            raw = _case_raw_path(path)
+            if raw is None:
+                return 3
+            case = _raw_case(raw)
+    if _session.capacity is not None and len(case["buses"]["number"]) > _session.capacity:
+        return 4
+    _close_output()
+    _session.case = case
+    _session.bus_index = {bus: k for k, bus in enumerate(case["buses"]["number"])}
+    _session.machine_index = {(bus, i): k for k, (bus, i) in enumerate(zip(case["machines"]["bus"], case["machines"]["id"]))}
+    _session.step = None
+    _session.events = []
+    _session.parameters = []
+    _session.warm = False
+    return 0
+
+
+def psseinit(buses=150000):
+    global _session
+    _session = _Session(buses)
+    return 0
+
+
+def read(numnam, ifile):
+    return _load_case(ifile)
+
+
+def case(sfile):
+    return _load_case(sfile)
+
+
+def save(sfile):
+    if _session.case is None:
+        return 1
+    with open(sfile, "w") as f:
+        json.dump({"case": _session.case}, f)
+    return 0
+
+
+def snap(status, sfile):
+    with open(sfile, "w") as f:
+        json.dump({"channels": _session.channels, "subsystems": _session.subsystems, "dyr": _session.dyr}, f)
+    return 0
+
+
+def rstr(sfile):
+    try:
+        with open(sfile) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return 1
+    _session.channels = {int(number): tuple(channel) for number, channel in snapshot["channels"].items()}
+    _session.next_channel = max(_session.channels, default=0) + 1
+    _session.subsystems = {int(sid): buses for sid, buses in snapshot["subsystems"].items()}
+    _session.dyr = snapshot["dyr"]
+    return 0
+
+
+# --- Case data -------------------------------------------------------------
+
+def abusint(sid=-1, flag=2, string="NUMBER"):
+    columns = {"NUMBER": "number", "AREA": "area", "ZONE": "zone"}
+    buses = _session.case["buses"]
+    if any(name not in columns for name in _strings(string)):
+        return 1, [[] for _ in _strings(string)]
+    return 0, [list(buses[columns[name]]) for name in _strings(string)]
+
+
+def abusreal(sid=-1, flag=2, string="PU"):
+    columns = {"PU": "vm", "ANGLED": "va", "BASE": "base_kv"}
+    buses = _session.case["buses"]
+    if any(name not in columns for name in _strings(string)):
+        return 1, [[] for _ in _strings(string)]
+    return 0, [list(buses[columns[name]]) for name in _strings(string)]
+
+
+def amachint(sid=-1, flag=1, string="NUMBER"):
+    if any(name != "NUMBER" for name in _strings(string)):
+        return 1, [[] for _ in _strings(string)]
+    return 0, [list(_session.case["machines"]["bus"]) for _ in _strings(string)]
+
+
+def amachchar(sid=-1, flag=1, string="ID"):
+    if any(name != "ID" for name in _strings(string)):
+        return 1, [[] for _ in _strings(string)]
+    return 0, [[f"{i:<2}" for i in _session.case["machines"]["id"]] for _ in _strings(string)]
+
+
+def _bus_position(bus):
+    return _session.bus_index.get(bus)
+
+
+def _machine_position(bus, machine_id):
+    return _session.machine_index.get((bus, str(machine_id).strip()))
+
+
+def bus_chng_4(ibus, inode, intgar, realar, name=_s):
+    k = _bus_position(ibus)
+    if k is None:
+        return 1
+    buses = _session.case["buses"]
+    if realar[1] != _f:
+        buses["vm"][k] = float(realar[1])
+    if realar[2] != _f:
+        buses["va"][k] = float(realar[2])
+    _session.warm = True
+    return 0
+
+
+def machine_chng_2(ibus, id, intgar, realar):
+    k = _machine_position(ibus, id)
+    if k is None:
+        return 1
+    if realar[0] != _f:
+        pg = _session.case["machines"]["pg"]
+        if _session.step is not None:
+            _session.events.append({"kind": "gen_change", "time": _time(), "machine": k,
+                                    "delta": (float(realar[0]) - pg[k]) / SBASE, "rise": 0.5})
+        pg[k] = float(realar[0])
+    return 0
+
+
+def bsys(sid, usekv, basekv, numarea, areas, numbus, buses, numowner, owners, numzone, zones):
+    _session.subsystems[sid] = [int(bus) for bus in buses[:numbus]]
+    return 0
+
+
+# --- Power flow and dynamics setup -----------------------------------------
+
+def fnsl(options=None):
+    _session.iterations = 2 if _session.warm and not (options and options[5]) else 4
+    return 0 if _session.case is not None else 1
+
+
+def solved():
+    return 0 if _session.case is not None else 1
+
+
+def iterat():
+    return _session.iterations
+
+
+def cong(opt=0):
+    return 0
+
+
+def conl(sid, all, apiopt, status, loadin):
+    return 0
+
+
+def ordr(opt=0):
+    return 0
+
+
+def fact():
+    return 0
+
+
+def tysl(opt=0):
+    return 0
+
+
+def dyre_new(startindx, dyrefile, ofile="", cfile="", pfile=""):
+    if not os.path.exists(dyrefile):
+        return 3
+    _session.dyr = dyrefile
+    return 0
+
+
+def change_plmod_con(ibus, id, model, index, value):
+    if _machine_position(ibus, id) is None:
+        return 1
+    _session.parameters.append((model, int(ibus), str(id), int(index), float(value)))
+    return 0
+
+
+def _add_channel(number, quantity, bus, machine_id, identifier):
+    if number <= 0:
+        number = _session.next_channel
+    _session.next_channel = max(_session.next_channel, number + 1)
+    _session.channels[number] = (quantity, int(bus), machine_id.strip(), identifier)
+
+
+def _identifier(quantity, k, machine_id=""):
+    """Channel identifier as PSS/E writes it, e.g. POWR 1[BUS1 16.500]1"""
+    buses = _session.case["buses"]
+    base_kv = f"{buses['base_kv'][k]:.3f}"[:6]
+    return f"{quantity} {buses['number'][k]}[{buses['name'][k]} {base_kv}]{machine_id}"
+
+
+def delete_all_plot_channels():
+    _close_output()
+    _session.channels = {}
+    _session.next_channel = 1
+    return 0
+
+
+def machine_array_channel(status, id="1", ident=""):
+    number, kind, bus = status[:3]
+    if _machine_position(bus, id) is None:
+        return 1
+    quantity = {1: "ANGL", 2: "POWR", 7: "SPD"}.get(kind)
+    if quantity is None:
+        return 1
+    _add_channel(number, quantity, bus, str(id), ident or f"{quantity} {bus}{id}")
+    return 0
+
+
+def voltage_channel(status, ident=""):
+    number, bus = status[0], status[3]
+    if _bus_position(bus) is None:
+        return 1
+    _add_channel(number, "VOLT", bus, "", ident or f"VOLT {bus}")
+    return 0
+
+
+def voltage_and_angle_channel(status, ident=("", "")):
+    number, bus = status[0], status[3]
+    if _bus_position(bus) is None:
+        return 1
+    idents = list(ident) + ["", ""]
+    _add_channel(number, "VOLT", bus, "", idents[0] or f"VOLT {bus}")
+    _add_channel(number + 1 if number > 0 else -1, "ANGL", bus, "", idents[1] or f"ANGL {bus}")
+    return 0
+
+
+def chsb(sid, all, status):
+    quantities = CHSB_QUANTITIES.get(status[4])
+    if quantities is None:
+        return 1
+    selected = None if all else set(_session.subsystems.get(sid, []))
+    buses, machines = _session.case["buses"], _session.case["machines"]
+    for quantity in quantities:
+        if quantity in ("POWR", "SPD"):
+            for bus, machine_id in zip(machines["bus"], machines["id"]):
+                if selected is None or bus in selected:
+                    _add_channel(-1, quantity, bus, machine_id, _identifier(quantity, _bus_position(bus), machine_id))
+        else:
+            for k, bus in enumerate(buses["number"]):
+                if selected is None or bus in selected:
+                    _add_channel(-1, quantity, bus, "", _identifier(quantity, k))
+    return 0
+
+
+# --- Trajectories ----------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _recordings(root):
+    """Recorded runs under root: channel file stem -> {CSV quantity: path}"""
+    index = {}
+    for folder, _, files in os.walk(root):
+        for name in files:
+            for quantity in RECORDED.values():
+                if name.endswith(f"_{quantity}.csv"):
+                    index.setdefault(name[:-len(quantity) - 5], {})[quantity] = os.path.join(folder, name)
+    return index
+
+
+def _read_recording(path):
+    """(time, column labels, time x columns values) of a recorded CSV"""
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    return data[:, 0], header[1:], data[:, 1:]
+
+
+def _replay(channels, out):
+    """Recorded (positions, time, values) groups for the channels, empty if the run was not recorded"""
+    root = _replay_root()
+    files = _recordings(root).get(os.path.splitext(os.path.basename(out))[0]) if root else None
+    groups = []
+    for csv_quantity, path in sorted((files or {}).items()):
+        t, labels, data = _read_recording(path)
+        columns = {label: j for j, label in enumerate(labels)}
+        positions, selected, offsets = [], [], []
+        for position, (quantity, bus, machine_id, _) in enumerate(channels):
+            label = f"GEN_BUS{bus}" if machine_id else f"BUS{bus}"
+            if RECORDED.get(quantity) == csv_quantity and label in columns:
+                positions.append(position)
+                selected.append(columns[label])
+                offsets.append(QUANTITY_OFFSETS.get(quantity, 0.0))
+        if positions:
+            groups.append((positions, t, data[:, selected] - np.array(offsets)))
+    return groups
+
+
+def _build_model(channels):
+    """Base values and swing parameters of every channel, seeded by the case and its parameter changes"""
+    case = _session.case
+    buses, machines = case["buses"], case["machines"]
+    rng = np.random.default_rng(_seed(case["name"], _session.parameters))
+    factor = rng.uniform(0.3, 1.0, len(buses["number"]))
+    phase = rng.uniform(0.0, 2 * np.pi, len(buses["number"]))
+
+    bus = np.array([_bus_position(channel[1]) for channel in channels], dtype=np.int64)
+    machine = np.array([_machine_position(channel[1], channel[2]) if channel[2] else -1 for channel in channels],
+                       dtype=np.int64)
+    quantity = np.array([channel[0] for channel in channels])
+    base = np.zeros(len(channels))
+    base[quantity == "POWR"] = np.array(machines["pg"])[machine[quantity == "POWR"]] / SBASE
+    base[quantity == "VOLT"] = np.array(buses["vm"])[bus[quantity == "VOLT"]]
+    base[quantity == "ANGL"] = np.array(buses["va"])[bus[quantity == "ANGL"]]
+    return {
+        "quantity": quantity,
+        "bus": bus,
+        "machine": machine,
+        "base": base,
+        "factor": factor[bus],
+        "amplitude": np.array([AMPLITUDE[q] for q in quantity]) * factor[bus],
+        "phase": phase[bus],
+        "omega": 2 * np.pi * rng.uniform(0.8, 1.6),
+        "sigma": rng.uniform(0.2, 0.5),
+    }
+
+
+def _synthetic(times):
+    """(times x channels) values: base values plus a damped swing after every disturbance"""
+    model = _session.model
+    t = times[:, None]
+    values = np.repeat(model["base"][None, :], len(times), axis=0)
+    for event in _session.events:
+        start = event["end"] if event["kind"] == "fault" else event["time"]
+        if start is not None:
+            tau = np.maximum(t - start, 0.0)
+            swing = np.exp(-model["sigma"] * tau) * (1 - np.exp(-tau / 0.1)) * np.sin(model["omega"] * tau + model["phase"])
+            values += (t >= start) * SEVERITY[event["kind"]] * model["amplitude"] * swing
+        if event["kind"] == "fault":
+            during = (t >= event["time"]) & (t < (np.inf if event["end"] is None else event["end"]))
+            depth = np.where(model["bus"] == event["bus"], 0.95, 0.4 * model["factor"])
+            values = np.where(during & (model["quantity"] == "VOLT"), values * (1 - depth), values)
+        elif "machine" in event:
+            tau = np.maximum(t - event["time"], 0.0)
+            step = (t >= event["time"]) * event["delta"] * (1 - np.exp(-tau / event["rise"]))
+            values += step * ((model["quantity"] == "POWR") & (model["machine"] == event["machine"]))
+    return values
+
+
+def _values(times):
+    values = _synthetic(times)
+    for positions, t, recorded in _session.replay:
+        # Outside the recording (float32 start time, longer runtime) its first and last values are held
+        values[:, positions] = resample(np.clip(times, t[0], t[-1]), t, recorded)
+    return values
+
+
+# --- Dynamic simulation ----------------------------------------------------
+
+def _open_output(path):
+    _close_output()
+    identifiers = {position + 1: channel[3] for position, channel in enumerate(_session.order)}
+    _session.out_file = open(path, "wb")
+    _session.out = path
+    write_channel_header(_session.out_file, identifiers, len(identifiers), (f"FAKE PSS/E {_session.case['name']}", ""))
+
+
+def _close_output():
+    if _session.out_file is not None:
+        _session.out_file.close()
+    _session.out_file = None
+    _session.out = None
+
+
+def _write(steps):
+    if _session.out_file is not None and len(steps):
+        times = (steps - 2) * DELT
+        write_channel_records(_session.out_file, times, _values(times))
+        _session.out_file.flush()
+
+
+def strt_2(options=None, outfile=""):
+    if _session.case is None:
+        return 1
+    numbers = sorted(_session.channels)
+    _session.order = [_session.channels[number] for number in numbers]
+    _session.positions = {number: position for position, number in enumerate(numbers)}
+    _session.model = _build_model(_session.order)
+    _session.replay = _replay(_session.order, outfile) if outfile else []
+    _session.events = []
+    _session.current = None
+    _session.step = 1
+    if outfile:
+        _open_output(outfile)
+        _write(np.arange(2))
+    print(" INITIAL CONDITIONS CHECK O.K.")
+    return 0
+
+
+def run(option=0, tpause=0.0, nprt=1, nplt=1, crtplt=1):
+    if _session.step is None:
+        return 1
+    last = int(round(tpause / DELT)) + 2
+    if last <= _session.step:
+        return 0
+    steps = np.arange(_session.step + 1, last + 1)
+    latency = float(os.environ.get(LATENCY_ENV) or 0.0)
+    if latency > 0:
+        time.sleep(latency * len(steps) * DELT)
+    _write(steps[steps % max(int(nplt), 1) == 0])
+    _session.step = last
+    diverge = os.environ.get(DIVERGE_ENV)
+    if diverge and _time() >= float(diverge):
+        print(f" Network not converged at TIME = {_time():.4f}")
+    return 0
+
+
+def change_channel_out_file(outfile):
+    if _session.step is None:
+        return 1
+    if outfile != _session.out:
+        _open_output(outfile)
+    return 0
+
+
+def chnval(n):
+    position = _session.positions.get(n) if _session.step is not None else None
+    if position is None:
+        return 1, None
+    if _session.current is None or _session.current[0] != _session.step:
+        _session.current = (_session.step, _values(np.array([_time()]))[0])
+    return 0, float(_session.current[1][position])
+
+
+def _disturbance(kind, **event):
+    if _session.step is None:
+        return 1
+    _session.events.append(dict(event, kind=kind, time=_time()))
+    return 0
+
+
+def dist_branch_trip(ibus, jbus, id):
+    return _disturbance("branch_trip") if _bus_position(ibus) is not None else 1
+
+
+def dist_3wind_trip(ibus, jbus, kbus, id):
+    return _disturbance("branch_trip") if _bus_position(ibus) is not None else 1
+
+
+def dist_machine_trip(ibus, id):
+    k = _machine_position(ibus, id)
+    if k is None:
+        return 1
+    return _disturbance("machine_trip", machine=k, delta=-_session.case["machines"]["pg"][k] / SBASE, rise=0.05)
+
+
+def dist_bus_fault(ibus, units=1, basekv=0.0, values=None):
+    k = _bus_position(ibus)
+    return _disturbance("fault", bus=k, end=None) if k is not None else 1
+
+
+def dist_branch_fault(ibus, jbus, id, units=1, basekv=0.0, values=None):
+    return dist_bus_fault(ibus)
+
+
+def dist_clear_fault(ifault=1):
+    faults = [event for event in _session.events if event["kind"] == "fault" and event["end"] is None]
+    if not faults:
+        return 1
+    faults[-1]["end"] = _time()
+    return 0
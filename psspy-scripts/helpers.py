@@ -6,19 +6,20 @@ Contains all the utility functions for running dynamic simulations
 from __future__ import with_statement
 from contextlib import contextmanager
 import sys
-import io
-import re
+import json
 import os
-import pandas as pd
+import shutil
 import numpy as np
-import plotly.graph_objects as go
-import plotly.io as pio
 from loguru import logger
-
-# Configure Plotly to use kaleido for static image export
-pio.kaleido.scope.default_format = "png"
-pio.kaleido.scope.default_width = 1000
-pio.kaleido.scope.default_height = 600
+from channel_file import read_channel_data
+from channels import demux_channels
+from channel_selection import channel_label, parse_channel_option, select_buses
+from digests import file_digest, inputs_digest
+from output_sink import OutputSink
+from result_store import STORE_EXTENSIONS, link_run, save_run, write_csv
+import result_cache
+from stability import StabilityMonitor
+from profiling import phase, count
 
 # PSS/E imports
 # sys.path.append("C:/Program Files/PTI/PSSE35/35.3/PSSBIN")
@@ -31,19 +32,110 @@ pio.kaleido.scope.default_height = 600
 # from psspy import _i # type: ignore  # noqa: E402
 # from psspy import _f # type: ignore  # noqa: E402
 
-sys.path.append("C:/Program Files/PTI/PSSE36/36.1/PSSBIN")
-sys.path.append("C:/Program Files/PTI/PSSE36/36.1/PSSPY311")
+PSSE_PATHS = [
+    "C:/Program Files/PTI/PSSE36/36.1/PSSBIN",
+    "C:/Program Files/PTI/PSSE36/36.1/PSSPY311",
+]
+
+# Stand-in psspy and dyntools modules (see fake_psse/psspy.py)
+FAKE_PSSE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_psse")
+
+# Simulation backend of this process and the worker processes it starts (see use_backend())
+BACKEND_ENV = "PSSPY_BACKEND"
+
+# Version of the monitor channel layout (see add_monitor_channels()), part of the snapshot keys
+MONITOR_LAYOUT = 2
+
+# The psspy module once PSS/E has been imported and initialized (see load_psse())
+_psse = None
+
+
+def _import_psse():
+    """psspy of the PSS/E installation, with PSS/E output redirected to Python"""
+    sys.path.extend(path for path in PSSE_PATHS if path not in sys.path)
+    import psse3601  # type: ignore  # noqa: F401
+    import psspy as module  # type: ignore
+    import redirect  # type: ignore
+    redirect.psse2py()
+    return module
+
+
+def _import_fake():
+    """Deterministic stand-in psspy that replays recorded runs or synthesizes them, no license needed"""
+    if FAKE_PSSE_PATH not in sys.path:
+        sys.path.insert(0, FAKE_PSSE_PATH)
+    import psspy as module  # type: ignore
+    return module
+
+
+# Simulation backends: name -> function importing a psspy-compatible module (dyntools must be importable after it)
+BACKENDS = {
+    "psse": _import_psse,
+    "fake": _import_fake,
+}
+
+
+def backend_name():
+    """Name of the selected simulation backend"""
+    return os.environ.get(BACKEND_ENV) or "psse"
+
+
+def use_backend(name):
+    """Select the simulation backend for this process and any worker processes it starts, before PSS/E is loaded"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown simulation backend {name!r}, expected one of {sorted(BACKENDS)}")
+    if _psse is not None and name != backend_name():
+        raise RuntimeError(f"The {backend_name()} backend is already loaded")
+    os.environ[BACKEND_ENV] = name
+
+
+def _backend_params():
+    """Cache and snapshot key parameters of the backend (none for PSS/E, so existing keys stay valid)"""
+    name = backend_name()
+    if name == "psse":
+        return {}
+    # Backends with settings that change their results expose them as settings()
+    return {"backend": name, **getattr(BACKENDS[name](), "settings", dict)()}
+
+
+def load_psse(buses=None):
+    """
+    Import psspy of the selected backend (see BACKENDS) and initialize it on first use,
+    at the given bus capacity (the PSS/E default if None). Returns the psspy module.
+    """
+    global _psse, _psse_buses
+    if _psse is None:
+        name = backend_name()
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown simulation backend {name!r} in {BACKEND_ENV}, expected one of {sorted(BACKENDS)}")
+        module = BACKENDS[name]()
+        if name != "psse":
+            logger.info(f"Using the {name} simulation backend")
+        if buses is None:
+            module.psseinit()
+        else:
+            module.psseinit(buses)
+        _psse, _psse_buses = module, buses
+    return _psse
+
+
+class _LazyPsspy:
+    """Stands in for the psspy module so importing helpers does not start PSS/E"""
 
-import psse3601  # type: ignore
-import psspy     # type: ignore
-import redirect  # type: ignore
-import dyntools  # type: ignore
-from psspy import _i # type: ignore  # noqa: E402
-from psspy import _f # type: ignore  # noqa: E402
+    def __getattr__(self, name):
+        return getattr(load_psse(), name)
 
-# Initialize PSS/E
-redirect.psse2py()
-psspy.psseinit()
+
+psspy = _LazyPsspy()
+
+# Solved-and-initialized case snapshots shared by every contingency of a case
+SNAPSHOT_DIR = "cache/snapshots"
+
+# Segment length (s) of runs without a stability monitor; the output is checked for fatal messages in between
+OUTPUT_CHECK_INTERVAL = 1.0
+
+# Bus capacity of this process's PSS/E session once init_psse() has run
+_psse_buses = None
 
 
 @contextmanager
@@ -63,6 +155,19 @@ def silence(file_object=None):
         sys.stdout = old_stdout
 
 
+def init_psse(buses=200000):
+    """Initialize the PSS/E session at the given bus capacity once per process; repeated calls are free"""
+    global _psse_buses
+    if _psse_buses == buses:
+        return 0
+    if _psse is None:
+        load_psse(buses)
+        return 0
+    ierr = psspy.psseinit(buses)
+    _psse_buses = buses
+    return ierr
+
+
 def convert_raw_to_sav(case_folder, raw_file):
     """Convert .raw file to .sav file if .sav doesn't exist"""
     base_path = f"case_data/{case_folder}"
@@ -74,7 +179,7 @@ def convert_raw_to_sav(case_folder, raw_file):
     
     try:
         # Initialize PSS/E if not already done
-        _ = psspy.psseinit(200000)
+        _ = init_psse(200000)
         
         # Load the .raw file
         _ = psspy.read(0, raw_path)
@@ -145,254 +250,96 @@ def get_case_files(case_folder):
 
 def sort_results(d, e, z):
     """Sort simulation results by channel type"""
-    POWR = []
-    POWR_index = 1
-    FREQ = []
-    FREQ_index = 1
-    VOLT = []
-    VOLT_index = 1 
-    SPEED = []
-    SPEED_index = 1
-    
-    # Sort by channel type
-    for channel in range(1, len(e)):
-        channel_keys = re.split(' |\[|\]', e[channel])
-        if channel_keys[0] == 'POWR':
-            if len(POWR) == 0:
-                POWR = pd.DataFrame(z[channel], columns=[f'GEN_BUS{channel_keys[1]}'], index=z['time'])
-            else:
-                POWR.insert(POWR_index, f'GEN_BUS{channel_keys[1]}', z[channel], allow_duplicates=True)
-                POWR_index = POWR_index + 1
-        elif channel_keys[0] == 'FREQ':
-            if len(FREQ) == 0:
-                # Convert frequency deviation to absolute frequency by adding 1.0
-                freq_data = np.array(z[channel]) + 1.0
-                FREQ = pd.DataFrame(freq_data, columns=[f'BUS{channel_keys[1]}'], index=z['time'])
-            else:            
-                # Convert frequency deviation to absolute frequency by adding 1.0
-                freq_data = np.array(z[channel]) + 1.0
-                FREQ.insert(FREQ_index, f'BUS{channel_keys[1]}', freq_data, allow_duplicates=True)
-                FREQ_index = FREQ_index + 1    
-        elif channel_keys[0] == 'VOLT':
-            if len(VOLT) == 0:
-                VOLT = pd.DataFrame(z[channel], columns=[f'BUS{channel_keys[1]}'], index=z['time'])
-            else:    
-                VOLT.insert(VOLT_index, f'BUS{channel_keys[1]}', z[channel], allow_duplicates=True)
-                VOLT_index = VOLT_index + 1
-        elif channel_keys[0] == 'SPD':
-            if len(SPEED) == 0:
-                # Convert speed deviation to absolute speed by adding 1.0
-                speed_data = np.array(z[channel]) + 1.0
-                SPEED = pd.DataFrame(speed_data, columns=[f'GEN_BUS{channel_keys[1]}'], index=z['time'])
-            else:    
-                # Convert speed deviation to absolute speed by adding 1.0
-                speed_data = np.array(z[channel]) + 1.0
-                SPEED.insert(SPEED_index, f'GEN_BUS{channel_keys[1]}', speed_data, allow_duplicates=True)
-                SPEED_index = SPEED_index + 1
-
-    # Sort DataFrames by Column (only if they contain data)
-    if isinstance(POWR, pd.DataFrame):
-        POWR = POWR.sort_index(axis=1)
-    if isinstance(FREQ, pd.DataFrame):
-        FREQ = FREQ.sort_index(axis=1)
-    if isinstance(VOLT, pd.DataFrame):
-        VOLT = VOLT.sort_index(axis=1)
-    if isinstance(SPEED, pd.DataFrame):
-        SPEED = SPEED.sort_index(axis=1)
-    else:
-        SPEED = pd.DataFrame()
+    import pandas as pd
+
+    blocks = demux_channels(e, z, quantities=('POWR', 'FREQ', 'VOLT', 'SPD'))
+    
+    POWR = blocks.get('POWR', pd.DataFrame())
+    FREQ = blocks.get('FREQ', pd.DataFrame())
+    VOLT = blocks.get('VOLT', pd.DataFrame())
+    SPEED = blocks.get('SPD', pd.DataFrame())
 
     return POWR, FREQ, VOLT, SPEED
 
 
-def create_plotly_config_figure(data, title, ylabel, colors, label_prefix, left_limit, right_limit, custom_yticks=None):
-    """Create a Plotly figure with common formatting"""
-    fig = go.Figure()
-    
-    for i, col in enumerate(data.columns):
-        color = colors[i % len(colors)]
-        
-        # Extract the actual bus/gen number from column name
-        if 'GEN_BUS' in col:
-            display_name = f"PSSE: {col}"  # Shows as "PSSE: GEN_BUS1"
-        elif 'BUS' in col:
-            display_name = f"PSSE: {col}"  # Shows as "PSSE: BUS1"
-        else:
-            display_name = f"{label_prefix}{col}"
-            
-        fig.add_trace(go.Scatter(
-            x=data.index,
-            y=data[col],
-            mode='lines',
-            name=display_name,
-            line=dict(color=color, width=2)
-        ))
-    
-    # Update layout
-    fig.update_layout(
-        title=dict(text=title, x=0.5, font=dict(size=16)),
-        xaxis=dict(
-            title='Time (s)',
-            range=[left_limit, right_limit],
-            tickvals=[0, 5, 10, 15, 20],
-            gridcolor='rgba(128, 128, 128, 0.3)',
-            showgrid=True
-        ),
-        yaxis=dict(
-            title=ylabel,
-            gridcolor='rgba(128, 128, 128, 0.3)',
-            showgrid=True
-        ),
-        legend=dict(
-            x=1.02,
-            y=1,
-            bgcolor='rgba(255, 255, 255, 0.9)',
-            bordercolor='rgba(0, 0, 0, 0.3)',
-            borderwidth=1
-        ),
-        plot_bgcolor='white',
-        width=1000,
-        height=600,
-        margin=dict(r=150)
-    )
-    
-    # Set custom y-axis ticks if provided
-    if custom_yticks:
-        fig.update_yaxes(tickvals=custom_yticks)
-    
-    return fig
-
-
-def plot_results(contingency_name, case_folder, plot_file, POWR, FREQ, VOLT, SPEED, excel_file, left_limit, right_limit):
-    """Generate plots and save data for simulation results using Plotly"""
+def save_results(contingency_name, case_folder, case_name, POWR, FREQ, VOLT, SPEED, metadata, result_format="npz", export_csv=False,
+                 source=None):
+    """
+    Store all quantities of a run in a single result file and optionally export per-quantity CSVs.
+    A run already stored as .npz elsewhere (source, e.g. its cache entry) is linked instead of
+    written again when the npz format is requested. Returns the stored path (None without a format).
+    """
     output_path = f"results/{contingency_name}/{case_folder}"
+    blocks = {"POWR": POWR, "FREQ": FREQ, "VOLT": VOLT, "SPEED": SPEED}
     
-    png_POWR = f"{output_path}/POWR_{plot_file}"
-    png_FREQ = f"{output_path}/FREQ_{plot_file}"
-    png_VOLT = f"{output_path}/VOLT_{plot_file}"
-    png_SPEED = f"{output_path}/SPEED_{plot_file}"
-
-    # Create CSV file names
-    csv_base = excel_file.replace('.xlsx', '')
-    csv_POWR = f"{output_path}/{csv_base}_POWR.csv"     # Plot power
-    csv_FREQ = f"{output_path}/{csv_base}_FREQ.csv"     # Plot frequency
-    csv_VOLT = f"{output_path}/{csv_base}_VOLT.csv"     # Plot bus voltage
-    csv_SPEED = f"{output_path}/{csv_base}_SPEED.csv"   # Plot speed
-
-    # Define color schemes
-    default_colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22']
-    bus_colors = ['blue', 'red', 'green', 'purple', 'orange', 'cyan', 'brown', 'lightgreen', 'pink']
-    gen_colors = ['blue', 'green', 'red']
-
-    # Plot POWR
-    if not POWR.empty:
-        fig = create_plotly_config_figure(
-            POWR, 
-            'Generator Power after Line 5-7 Trip', 
-            'MW', 
-            gen_colors, 
-            'PSSE:GEN', 
-            left_limit, 
-            right_limit
-        )
-        fig.write_image(png_POWR, format='png', engine='kaleido')
-        logger.info(f"Power plot saved: {png_POWR}")
-    
-    # Plot FREQ
-    if not FREQ.empty:
-        fig = create_plotly_config_figure(
-            FREQ, 
-            'Bus Frequency after Line 5-7 Trip', 
-            'Frequency (p.u.)', 
-            default_colors, 
-            'PSSE: BUS', 
-            left_limit, 
-            right_limit
-        )
-        fig.write_image(png_FREQ, format='png', engine='kaleido')
-        logger.info(f"Frequency plot saved: {png_FREQ}")
-    
-    # Plot VOLT
-    if not VOLT.empty:
-        fig = create_plotly_config_figure(
-            VOLT, 
-            'Bus Voltage Magnitude after Line 5-7 Trip', 
-            'Voltage magnitude (p.u.)', 
-            bus_colors, 
-            'PSSE: BUS', 
-            left_limit, 
-            right_limit
-        )
-        fig.write_image(png_VOLT, format='png', engine='kaleido')
-        logger.info(f"Voltage plot saved: {png_VOLT}")
-    
-    # Plot SPEED only if data exists
-    if not SPEED.empty:
-        fig = create_plotly_config_figure(
-            SPEED, 
-            'Generator Speed after Line 5-7 Trip', 
-            'Speed (p.u.)', 
-            gen_colors, 
-            'PSSE: GEN', 
-            left_limit, 
-            right_limit
-        )
-        
-        # Auto-scale y-axis for speed data instead of fixed ticks
-        # This eliminates the hard-coded yticks problem
-        fig.update_yaxes(autorange=True)
-        
-        fig.write_image(png_SPEED, format='png', engine='kaleido')
-        logger.info(f"Speed plot saved: {png_SPEED}")
-    else:
-        logger.warning("No speed data available to plot")
-
-    # Save Data to separate CSV files with proper headers
-    if not POWR.empty:
-        # Reset index to make TIME a column, then rename it
-        powr_csv = POWR.reset_index()
-        powr_csv.rename(columns={'index': 'TIME'}, inplace=True)
-        powr_csv.to_csv(csv_POWR, index=False)
-        logger.info(f"Power CSV file saved: {csv_POWR}")
-    
-    if not FREQ.empty:
-        # Reset index to make TIME a column, then rename it
-        freq_csv = FREQ.reset_index()
-        freq_csv.rename(columns={'index': 'TIME'}, inplace=True)
-        freq_csv.to_csv(csv_FREQ, index=False)
-        logger.info(f"Frequency CSV file saved: {csv_FREQ}")
-    
-    if not VOLT.empty:
-        # Reset index to make TIME a column, then rename it
-        volt_csv = VOLT.reset_index()
-        volt_csv.rename(columns={'index': 'TIME'}, inplace=True)
-        volt_csv.to_csv(csv_VOLT, index=False)
-        logger.info(f"Voltage CSV file saved: {csv_VOLT}")
-    
-    if not SPEED.empty:
-        # Reset index to make TIME a column, then rename it
-        speed_csv = SPEED.reset_index()
-        speed_csv.rename(columns={'index': 'TIME'}, inplace=True)
-        speed_csv.to_csv(csv_SPEED, index=False)
-        logger.info(f"Speed CSV file saved: {csv_SPEED}")
-
-
-def run_psse_simulation(contingency_name, case_folder, sav_file, dyr_file, out_file, disturbance_type, channel_option, runtime):
-    """Run the actual PSS/E dynamic simulation"""
-    base_path = f"case_data/{case_folder}"
-    sav = f"{base_path}/{sav_file}"
-    out = f"results/{contingency_name}/{case_folder}/{out_file}"
-    
-    ierr = [1] * 30  # check and record for error codes
-    output = io.StringIO()
+    store_path = None
+    if result_format is not None:
+        with phase("store_results"):
+            if result_format == "npz" and source is not None and source.endswith(".npz"):
+                store_path = link_run(source, f"{output_path}/{case_name}.npz")
+            else:
+                store_path = save_run(f"{output_path}/{case_name}", blocks, metadata, fmt=result_format)
+        logger.info(f"Results stored: {store_path}")
     
-    with silence(output):    
+    if export_csv:
+        with phase("csv_export"):
+            write_csv(blocks, output_path, case_name)
+    return store_path
+
+
+def cached_frames(cached):
+    """Sorted result frames of a cached run, float64 like those of a fresh run (see sort_results())"""
+    import pandas as pd
+
+    frames = []
+    for name in ("POWR", "FREQ", "VOLT", "SPEED"):
+        if name in cached:
+            frames.append(pd.DataFrame(np.array(cached.array(name), dtype=np.float64),
+                                       index=pd.Index(np.asarray(cached.time, dtype=np.float64)),
+                                       columns=cached.columns(name)))
+        else:
+            frames.append(pd.DataFrame())
+    return tuple(frames)
+
+
+def solved_voltages():
+    """Bus numbers, voltage magnitudes (p.u.) and angles (degrees) of the solved case in memory"""
+    _, (numbers,) = psspy.abusint(-1, 2, 'NUMBER')
+    _, (vm, va) = psspy.abusreal(-1, 2, ['PU', 'ANGLED'])
+    return numbers, vm, va
+
+
+def warm_start(voltages):
+    """Use previously solved bus voltages as the power flow starting point (buses missing from the case are skipped)"""
+    numbers, vm, va = voltages
+    _i, _f, _s = psspy._i, psspy._f, psspy._s
+    for bus, magnitude, angle in zip(numbers, vm, va):
+        psspy.bus_chng_4(bus, 0, [_i, _i, _i, _i], [_f, magnitude, angle, _f, _f, _f, _f], _s)
+
+
+def solve_and_convert_case(sav, ierr, start_voltages=None):
+    """
+    Load the case (.sav, or .raw), solve the power flow and convert generators and loads for dynamics.
+    start_voltages (see solved_voltages) warm-starts the power flow; if it does not
+    converge from there the case is reloaded and solved from its own initial voltages.
+    """
+    with phase("case_load"):
         # Initialize PSS/E
-        ierr[0] = psspy.psseinit(200000) 
-        ierr[1] = psspy.case(sav)  # load case information (.sav file)
-        
+        ierr[0] = init_psse(200000)
+        if sav.endswith('.raw'):
+            ierr[1] = psspy.read(0, sav)  # load case information (.raw file)
+        else:
+            ierr[1] = psspy.case(sav)  # load case information (.sav file)
+        if start_voltages is not None:
+            warm_start(start_voltages)
+    
+    with phase("power_flow"):
         # Power flow solution
         ierr[3] = psspy.fnsl([0, 0, 0, 1, 1, 0, 99, 0]) 
+        if start_voltages is not None and psspy.solved() != 0:
+            logger.warning(f"Warm-started power flow did not converge for {sav}, retrying from the case's own voltages")
+            ierr[1] = psspy.read(0, sav) if sav.endswith('.raw') else psspy.case(sav)
+            ierr[3] = psspy.fnsl([0, 0, 0, 1, 1, 0, 99, 0])
         ierr[4] = psspy.cong(0)
         
         # Convert loads to constant impedance
@@ -402,87 +349,442 @@ def run_psse_simulation(contingency_name, case_folder, sav_file, dyr_file, out_f
         ierr[8] = psspy.ordr(1)
         ierr[9] = psspy.fact()
         ierr[10] = psspy.tysl(0)
-        
-        # Load dynamics data
-        if dyr_file is not None:
-            dyre = f"{base_path}/{dyr_file}"
+
+
+def add_monitor_channels(buses=None):
+    """
+    Add the channels read by the stability monitor during a segmented run for the
+    machines and buses being recorded (buses, default all): speed deviation and rotor
+    angle of every machine and voltage (with angle) of every bus. The speed and voltage
+    channels double as the recorded SPD/VOLT/ANGL channels, so only the rotor angles
+    are extra. They are added first, so their channel numbers are known and can be
+    read back with chnval. Returns a dict of monitored quantity -> channel numbers.
+    """
+    _, (machine_buses,) = psspy.amachint(-1, 1, 'NUMBER')
+    _, (machine_ids,) = psspy.amachchar(-1, 1, 'ID')
+    _, (bus_numbers,) = psspy.abusint(-1, 1, 'NUMBER')
+    machines = [(bus, machine_id.strip()) for bus, machine_id in zip(machine_buses, machine_ids)]
+    if buses is not None:
+        selected = set(buses)
+        machines = [(bus, machine_id) for bus, machine_id in machines if bus in selected]
+        bus_numbers = [bus for bus in bus_numbers if bus in selected]
+    
+    channel_map = {"speed_deviation": [], "angle": [], "voltage": []}
+    channel = 1
+    for bus, machine_id in machines:
+        psspy.machine_array_channel([channel, 7, bus], machine_id, f"SPD {bus} {machine_id}")
+        channel_map["speed_deviation"].append(channel)
+        psspy.machine_array_channel([channel + 1, 1, bus], machine_id, f"MANG {bus} {machine_id}")
+        channel_map["angle"].append(channel + 1)
+        channel += 2
+    for bus in bus_numbers:
+        psspy.voltage_and_angle_channel([channel, -1, -1, bus], [f"VOLT {bus}", f"ANGL {bus}"])
+        channel_map["voltage"].append(channel)
+        channel += 2
+    return channel_map
+
+
+def read_channel_values(channels):
+    """Current values of the given channels as a float array, NaN where a channel has no value"""
+    chnval = psspy.chnval
+    values = np.empty(len(channels))
+    for i, channel in enumerate(channels):
+        value = chnval(channel)[1]
+        values[i] = np.nan if value is None else value
+    return values
+
+
+def case_buses():
+    """Number, area, zone and base kV of every bus of the case in memory as a structured array"""
+    _, (numbers, areas, zones) = psspy.abusint(-1, 2, ['NUMBER', 'AREA', 'ZONE'])
+    _, (base_kv,) = psspy.abusreal(-1, 2, ['BASE'])
+    buses = np.zeros(len(numbers), dtype=[('number', np.int64), ('area', np.int32), ('zone', np.int32), ('base_kv', np.float64)])
+    buses['number'], buses['area'], buses['zone'], buses['base_kv'] = numbers, areas, zones, base_kv
+    return buses
+
+
+def setup_dynamics(dyre, channel_option, ierr, monitor_channels=False):
+    """
+    Load dynamics data and set up the output channels; returns the monitor channel map (or None).
+    channel_option "All" records every machine and bus, a selection such as "area=1;kv=100-300"
+    (see channel_selection.py) only the machines and buses it matches.
+    """
+    # Load dynamics data
+    if dyre is not None:
+        with phase("dyre"):
             ierr[11] = psspy.dyre_new([1, 1, 1, 1], dyre, "", "", "")
-            
-        # Setup channels
-        ierr[12] = psspy.delete_all_plot_channels()
         
+    # Setup channels
+    with phase("channel_setup"):
+        ierr[12] = psspy.delete_all_plot_channels()
         if channel_option == 'All':
-            ierr[12] = psspy.chsb(0, 1, [-1, -1, -1, 1, 2, 0])   # Machine electrical power
-            ierr[13] = psspy.chsb(0, 1, [-1, -1, -1, 1, 12, 0])  # Bus Frequency Deviations
-            ierr[14] = psspy.chsb(0, 1, [-1, -1, -1, 1, 13, 0])  # Bus Voltage and angle
-            ierr[15] = psspy.chsb(0, 1, [-1, -1, -1, 1, 7, 0])   # Machine speed
+            buses = None
+            sid, all_buses = 0, 1
+        else:
+            buses = [int(bus) for bus in select_buses(case_buses(), parse_channel_option(channel_option))]
+            if not buses:
+                logger.warning(f"Channel selection {channel_option!r} matches no buses")
+            # Bus subsystem 1 holds the selected buses; channels are added for it only
+            ierr[19] = psspy.bsys(1, 0, [0.0, 0.0], 0, [], len(buses), buses, 0, [], 0, [])
+            sid, all_buses = 1, 0
+        
+        # The monitor channels already record machine speed and bus voltage and angle
+        channel_map = add_monitor_channels(buses) if monitor_channels else None
+        ierr[12] = psspy.chsb(sid, all_buses, [-1, -1, -1, 1, 2, 0])       # Machine electrical power
+        ierr[13] = psspy.chsb(sid, all_buses, [-1, -1, -1, 1, 12, 0])      # Bus Frequency Deviations
+        if channel_map is None:
+            ierr[14] = psspy.chsb(sid, all_buses, [-1, -1, -1, 1, 13, 0])  # Bus Voltage and angle
+            ierr[15] = psspy.chsb(sid, all_buses, [-1, -1, -1, 1, 7, 0])   # Machine speed
+    
+    return channel_map
+
+
+def get_snapshot(case_folder, sav_file, dyr_file, channel_option, monitor_channels=False):
+    """
+    Return the (converted case, snapshot) paths for a case, building them on first use.
+    Snapshots are keyed by the .sav/.dyr contents and the channel setup, so editing
+    either input file produces a fresh snapshot. Returns None if building fails.
+    With monitor_channels the stability monitor channel map is saved next to the snapshot.
+    """
+    base_path = f"case_data/{case_folder}"
+    sav = f"{base_path}/{sav_file}"
+    dyre = f"{base_path}/{dyr_file}" if dyr_file is not None else None
+    
+    key = inputs_digest([sav, dyre], {"channel_option": channel_option, "monitor_channels": MONITOR_LAYOUT if monitor_channels else False,
+                                      **_backend_params()})[:16]
+    snapshot_path = f"{SNAPSHOT_DIR}/{key}"
+    cnv = f"{snapshot_path}/case_cnv.sav"
+    snp = f"{snapshot_path}/case.snp"
+    
+    if os.path.exists(cnv) and os.path.exists(snp):
+        logger.debug(f"Using cached snapshot {key} for {case_folder}")
+        return cnv, snp
+    
+    logger.info(f"Building snapshot {key} for {case_folder}...")
+    
+    # Build in a private folder and rename it into place so parallel workers never see half a snapshot
+    tmp_path = f"{snapshot_path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    
+    ierr = [1] * 30  # check and record for error codes
+    with silence(OutputSink()):
+        solve_and_convert_case(sav, ierr)
+        ierr[16] = psspy.save(f"{tmp_path}/case_cnv.sav")
+        channel_map = setup_dynamics(dyre, channel_option, ierr, monitor_channels)
+        ierr[17] = psspy.snap([-1, -1, -1, -1, -1], f"{tmp_path}/case.snp")
+    
+    if channel_map is not None:
+        with open(f"{tmp_path}/channels.json", "w") as f:
+            json.dump(channel_map, f)
+    
+    if ierr[16] != 0 or ierr[17] != 0:
+        logger.warning(f"Could not build snapshot for {case_folder} (save={ierr[16]}, snap={ierr[17]})")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return None
+    
+    try:
+        os.rename(tmp_path, snapshot_path)
+    except OSError:
+        # Another worker finished the same snapshot first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    logger.success(f"Snapshot {key} ready for {case_folder}")
+    return cnv, snp
+
+
+def get_scenario_snapshots(case_folder, raw_paths, dyr_file, channel_option, monitor_channels=False):
+    """
+    Return a (converted case, snapshot) pair for each load level of a scenario sweep, building them on first use.
+    Levels are solved in the given order. A level that is a variant of the previous one
+    (same network, see scenarios.same_network) is warm-started from that level's solved
+    voltages; any other level starts from the voltages in its own file. The dynamics setup (dyre and channels) is done once and its snapshot
+    is shared by every level. Returns None if building fails.
+    """
+    from scenarios import same_network
+    
+    dyre = f"case_data/{case_folder}/{dyr_file}" if dyr_file is not None else None
+    
+    key = inputs_digest([*raw_paths, dyre], {"channel_option": channel_option, "monitor_channels": MONITOR_LAYOUT if monitor_channels else False,
+                                            "scenarios": True, "warm_start": "same_network", **_backend_params()})[:16]
+    snapshot_path = f"{SNAPSHOT_DIR}/{key}"
+    stems = [os.path.splitext(os.path.basename(raw))[0] for raw in raw_paths]
+    pairs = [(f"{snapshot_path}/{stem}_cnv.sav", f"{snapshot_path}/case.snp") for stem in stems]
+    
+    if os.path.exists(snapshot_path):
+        logger.debug(f"Using cached scenario snapshots {key} for {case_folder}")
+        return pairs
+    
+    logger.info(f"Building scenario snapshots {key} for {case_folder} ({len(raw_paths)} load levels)...")
+    
+    tmp_path = f"{snapshot_path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    
+    voltages = None
+    channel_map = None
+    previous = None
+    for raw, stem in zip(raw_paths, stems):
+        warm = previous is not None and same_network(previous, raw)
+        ierr = [1] * 30  # check and record for error codes
+        with silence(OutputSink()):
+            solve_and_convert_case(raw, ierr, start_voltages=voltages if warm else None)
+            converged = psspy.solved() == 0
+            voltages = solved_voltages()
+            ierr[16] = psspy.save(f"{tmp_path}/{stem}_cnv.sav")
+            if not os.path.exists(f"{tmp_path}/case.snp"):
+                channel_map = setup_dynamics(dyre, channel_option, ierr, monitor_channels)
+                ierr[17] = psspy.snap([-1, -1, -1, -1, -1], f"{tmp_path}/case.snp")
+            else:
+                ierr[17] = 0
+        
+        if not converged or ierr[16] != 0 or ierr[17] != 0:
+            logger.warning(f"Could not build scenario {stem} for {case_folder} (converged={converged}, save={ierr[16]}, snap={ierr[17]})")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return None
+        logger.info(f"Solved {stem} ({'warm' if warm else 'case'} start, {psspy.iterat()} iterations)")
+        previous = raw
+    
+    if channel_map is not None:
+        with open(f"{tmp_path}/channels.json", "w") as f:
+            json.dump(channel_map, f)
+    
+    try:
+        os.rename(tmp_path, snapshot_path)
+    except OSError:
+        # Another process finished the same snapshots first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    
+    logger.success(f"Scenario snapshots {key} ready for {case_folder}")
+    return pairs
+
+
+def run_segmented(start_time, runtime, monitor=None, channel_map=None, decimation=1, sink=None):
+    """
+    Advance the simulation in segments until runtime is reached. After each segment
+    the output sink is checked for fatal messages (non-convergence, NaN) and the
+    monitor, if any, for instability or settling; either stops the run early.
+    Segments are monitor.interval long, or OUTPUT_CHECK_INTERVAL without a monitor.
+    """
+    ierr = 0
+    t = start_time
+    interval = monitor.interval if monitor is not None else OUTPUT_CHECK_INTERVAL
+    # Every monitored channel is read in one pass per segment, then split by quantity
+    names = list(channel_map) if monitor is not None else []
+    channels = [channel for name in names for channel in channel_map[name]]
+    splits = np.cumsum([len(channel_map[name]) for name in names])[:-1]
+    while t < runtime - 1e-9:
+        t = min(t + interval, runtime)
+        if sink is not None:
+            sink.time = t  # messages of this segment are stamped with its end time
+        ierr = psspy.run(0, t, 1, decimation, 1)
+        if ierr != 0:
+            break
+        if sink is not None and sink.fatal is not None:
+            logger.error(f"Stopping run at t={t:.2f} s: {sink.fatal}")
+            break
+        if monitor is None:
+            continue
+        values = dict(zip(names, np.split(read_channel_values(channels), splits)))
+        if monitor.update(t, **values) is not None:
+            break
+    if monitor is not None:
+        monitor.finish(t)
+    return ierr
+
+
+def apply_outage(contingency):
+    """Trip every element of an enumerated contingency, returning the first non-zero error code"""
+    error = 0
+    for element in contingency["elements"]:
+        if element["kind"] == "branch":
+            code = psspy.dist_branch_trip(element["from_bus"], element["to_bus"], element["ckt"])
+        elif element["kind"] == "three_winding":
+            code = psspy.dist_3wind_trip(element["from_bus"], element["to_bus"], element["third_bus"], element["ckt"])
+        elif element["kind"] == "machine":
+            code = psspy.dist_machine_trip(element["bus"], element["id"])
+        else:
+            raise ValueError(f"Unknown outage element: {element['kind']}")
+        error = error or code
+    return error
+
+
+def apply_parameter_changes(changes):
+    """
+    Change dynamic model constants of the case in memory, returning the first non-zero error code.
+    Each change is (model, bus, id, index, value) with index counting the model's CONs from 0.
+    """
+    error = 0
+    for model, bus, device_id, index, value in changes:
+        code = psspy.change_plmod_con(int(bus), str(device_id), model, int(index) + 1, float(value))
+        error = error or code
+    return error
+
+
+def run_psse_simulation(contingency_name, case_folder, sav_file, dyr_file, out_file, disturbance_type, channel_option, runtime, out_dir=None, snapshot=None,
+                        contingency=None, monitor=None, decimation=1, output=None, clearing_time=1.17, read_data=True,
+                        parameter_changes=None):
+    """
+    Run the actual PSS/E dynamic simulation.
+    Faults are applied at t=1 s and cleared at clearing_time; a "bus_fault" contingency
+    gives the faulted bus (and optionally elements to trip when the fault clears).
+    With read_data=False the channel file is not read back and None is returned.
+    decimation writes every Nth time step to the channel file.
+    PSS/E output is parsed as it is printed by an OutputSink (pass one as output to
+    inspect its events afterwards); the run stops early on a fatal message.
+    If a (converted case, snapshot) pair is given the setup phase is skipped and
+    the solved, initialized state is restored from it instead.
+    parameter_changes (see apply_parameter_changes()) are applied before initialization.
+    With a StabilityMonitor the post-disturbance run advances in segments and
+    stops early once the monitor classifies it as unstable or settled.
+    """
+    base_path = f"case_data/{case_folder}"
+    sav = f"{base_path}/{sav_file}"
+    dyre = f"{base_path}/{dyr_file}" if dyr_file is not None else None
+    # Parallel workers pass their own scratch folder so channel files never collide
+    if out_dir is None:
+        out_dir = f"results/{contingency_name}/{case_folder}"
+    out = f"{out_dir}/{out_file}"
+    
+    ierr = [1] * 30  # check and record for error codes
+    if output is None:
+        output = OutputSink()
+    
+    with silence(output):    
+        if snapshot is not None:
+            cnv, snp = snapshot
+            with phase("snapshot_restore"):
+                ierr[1] = psspy.case(cnv)  # converted case
+                ierr[2] = psspy.rstr(snp)  # dynamics models and channels
+            channel_map = None
+            if monitor is not None:
+                with open(f"{os.path.dirname(snp)}/channels.json") as f:
+                    channel_map = json.load(f)
+        else:
+            solve_and_convert_case(sav, ierr)
+            channel_map = setup_dynamics(dyre, channel_option, ierr, monitor_channels=monitor is not None)
+        if parameter_changes:
+            ierr[20] = apply_parameter_changes(parameter_changes)
             
-        # Start simulation
-        ierr[21] = psspy.strt_2([0, 1], out)
-        ierr[22] = psspy.run(0, 1.0, 1, 1, 1)  # Run for 1 second steady state
+        with phase("dynamic_run"):
+            # Start simulation
+            ierr[21] = psspy.strt_2([0, 1], out)
+            ierr[22] = psspy.run(0, 1.0, 1, decimation, 1)  # Run for 1 second steady state
         
-        # Apply disturbance
-        if disturbance_type == "line_fault":
-            if case_folder == "case_SAVNW":
-                ierr[23] = psspy.dist_branch_fault(154, 3008, r"""1""", 1, 230.0, [0.0, -0.2E+10])
-            elif case_folder == "case_NRE":
-                ierr[23] = psspy.dist_branch_trip(5, 7, r"""1""")
-            elif case_folder == "case_RE":
-                ierr[23] = psspy.dist_branch_trip(5, 7, r"""1""")
-
-            ierr[24] = psspy.change_channel_out_file(out)
-            ierr[25] = psspy.run(0, 1.17, 1, 1, 1)  # run for 10 cycles
-            ierr[26] = psspy.dist_clear_fault(1)  # clears fault
+            # Apply disturbance
+            if disturbance_type == "line_fault":
+                if case_folder == "case_SAVNW":
+                    ierr[23] = psspy.dist_branch_fault(154, 3008, r"""1""", 1, 230.0, [0.0, -0.2E+10])
+                elif case_folder == "case_NRE":
+                    ierr[23] = psspy.dist_branch_trip(5, 7, r"""1""")
+                elif case_folder == "case_RE":
+                    ierr[23] = psspy.dist_branch_trip(5, 7, r"""1""")
+
+                ierr[24] = psspy.change_channel_out_file(out)
+                ierr[25] = psspy.run(0, clearing_time, 1, decimation, 1)  # run for 10 cycles by default
+                ierr[26] = psspy.dist_clear_fault(1)  # clears fault
+            
+            elif disturbance_type == "bus_fault":
+                # Three-phase bolted fault at a bus, cleared (optionally by tripping elements) at clearing_time
+                ierr[23] = psspy.dist_bus_fault(contingency["bus"], 1, 0.0, [0.0, -0.2E+10])
+                ierr[24] = psspy.change_channel_out_file(out)
+                ierr[25] = psspy.run(0, clearing_time, 1, decimation, 1)
+                ierr[26] = psspy.dist_clear_fault(1)
+                if contingency.get("elements"):
+                    ierr[26] = ierr[26] or apply_outage(contingency)
             
-        elif disturbance_type == "gen_change":
-            # Apply generator power change at t=1s
-            # Find generator 2 bus number (you'll need to identify this from your case)
-            gen_bus = None
-            if case_folder == "case_NRE":
-                gen_bus = 2  # Replace with actual bus number for generator 2
-            elif case_folder == "case_RE":
-                gen_bus = 2  # Replace with actual bus number for generator 2
-            if gen_bus:
+            elif disturbance_type == "gen_change":
+                # Apply generator power change at t=1s
+                # Find generator 2 bus number (you'll need to identify this from your case)
+                gen_bus = None
+                if case_folder == "case_NRE":
+                    gen_bus = 2  # Replace with actual bus number for generator 2
+                elif case_folder == "case_RE":
+                    gen_bus = 2  # Replace with actual bus number for generator 2
+                if gen_bus:
+                    ierr[23] = psspy.change_channel_out_file(out)
+                    # Change generator power from 187.3 MW to 217 MW
+                    # Only change PG (first parameter), all others use defaults (_f)
+                    _i, _f = psspy._i, psspy._f
+                    ierr[24] = psspy.machine_chng_2(gen_bus, r"""1""", [_i,_i,_i,_i,_i,_i], 
+                                                   [217.0,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f])
+                    logger.debug(f"Changed generator at bus {gen_bus} from 187.3 MW to 217.0 MW")
+                else:
+                    logger.error(f"Generator bus not defined for case {case_folder}")
+                
+            elif disturbance_type == "outage":
+                # Enumerated N-1/N-2 outage applied at t=1s
                 ierr[23] = psspy.change_channel_out_file(out)
-                # Change generator power from 187.3 MW to 217 MW
-                # Only change PG (first parameter), all others use defaults (_f)
-                ierr[24] = psspy.machine_chng_2(gen_bus, r"""1""", [_i,_i,_i,_i,_i,_i], 
-                                               [217.0,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f])
-                logger.debug(f"Changed generator at bus {gen_bus} from 187.3 MW to 217.0 MW")
-            else:
-                logger.error(f"Generator bus not defined for case {case_folder}")
+                ierr[24] = apply_outage(contingency)
         
             
-        # Continue simulation
-        ierr[27] = psspy.change_channel_out_file(out)
-        ierr[28] = psspy.run(0, runtime, 1, 1, 1)
-        ierr[29] = psspy.delete_all_plot_channels()
+            # Continue simulation (in segments, so a diverged run stops instead of burning its runtime)
+            ierr[27] = psspy.change_channel_out_file(out)
+            disturbance_end = clearing_time if disturbance_type in ("line_fault", "bus_fault") else 1.0
+            if output.fatal is None:
+                ierr[28] = run_segmented(disturbance_end, runtime, monitor, channel_map, decimation, sink=output)
+            else:
+                logger.error(f"Skipping the run after the disturbance: {output.fatal}")
+            ierr[29] = psspy.delete_all_plot_channels()
+        output.close()
         
     # Check for errors
-    run_output = output.getvalue()
-    current_error = 0
-    if "Network not converged" in run_output:
-        logger.error('Network not converged') 
-        current_error = 1
-    elif "NaN" in run_output:
-        logger.error("NaN, network is no good")
-        current_error = 1
-    if current_error == 0 and "INITIAL CONDITIONS CHECK O.K." in run_output:
-        logger.success("Network converged. No errors and initial conditions were good.")
-     
-    # Gather the data
-    data = dyntools.CHNF(out)
-    d, e, z = data.get_data()
+    output.log_summary()
+    
+    if not read_data:
+        return None
+    
+    # Gather the data through the backend's dyntools
+    with phase("get_data"):
+        d, e, z = read_channel_data(out)
+    count("channels", len(e) - 1)
+    count("time_steps", len(z['time']))
     
     return d, e, z
 
 
-def run_case_simulation(case_folder, disturbance_type="line_fault", channel_option="All", runtime=20):
-    """Run simulation for a specific case folder"""
+def run_case_name(case_folder, disturbance_type="line_fault", channel_option="All", runtime=20, scenario=None, sample=None,
+                  decimation=1):
+    """Base name of the result and channel files of a run"""
+    case_label = f"{case_folder}_{scenario['name']}" if scenario is not None else case_folder
+    if sample is not None:
+        case_label += f"_{sample['name']}"
+    case_name = f"{case_label}_{disturbance_type}_{channel_label(channel_option)}_{runtime}s"
+    if decimation > 1:
+        case_name += f"_every{decimation}"
+    return case_name
+
+
+def stored_run_path(case_folder, disturbance_type="line_fault", channel_option="All", runtime=20, result_format="npz",
+                    contingency=None, scenario=None, sample=None, decimation=1, **options):
+    """Path of the result file run_case_simulation stores for a job (None without a result format)"""
+    if result_format is None:
+        return None
+    contingency_name = contingency["name"] if contingency is not None else get_contingency_name(case_folder, disturbance_type)
+    case_name = run_case_name(case_folder, disturbance_type, channel_option, runtime, scenario, sample, decimation)
+    return f"results/{contingency_name}/{case_folder}/{case_name}{STORE_EXTENSIONS[result_format]}"
+
+
+def run_case_simulation(case_folder, disturbance_type="line_fault", channel_option="All", runtime=20, scratch_dir=None, use_snapshot=True,
+                        result_format="npz", export_csv=False, use_cache=True, force=False, channel_format="outx",
+                        contingency=None, early_stop=None, scenario=None, decimation=1, clearing_time=1.17, sample=None):
+    """
+    Run simulation for a specific case folder, returning the sorted results or None on failure.
+    Enumerated outages (see contingencies.py) are passed as contingency with disturbance_type "outage".
+    scenario runs the case at another load level (see scenarios.py) from its prepared snapshot.
+    sample runs it with changed dynamic model parameters (see sensitivity.py), either
+    from a generated .dyr variant or by changing the constants in memory.
+    channel_option selects the recorded buses (see channel_selection.py) and decimation
+    writes only every Nth time step, both to keep channel files small for large systems.
+    clearing_time is when line and bus faults are cleared (the fault is applied at t=1 s).
+    early_stop is a dict of StabilityMonitor settings (empty for the defaults) to enable the
+    segmented run mode that stops once the response is unstable or settled.
+    """
     logger.info(f"Running simulation for case: {case_folder}")
     
     # Get contingency name
-    contingency_name = get_contingency_name(case_folder, disturbance_type)
+    if contingency is not None:
+        contingency_name = contingency["name"]
+    else:
+        contingency_name = get_contingency_name(case_folder, disturbance_type)
     logger.info(f"Contingency: {contingency_name}")
     
     # Create output folder for this contingency and case (swapped order)
@@ -493,34 +795,108 @@ def run_case_simulation(case_folder, disturbance_type="line_fault", channel_opti
     
     if sav_file is None:
         logger.error(f"No .sav or .raw file found in {case_folder}")
-        return
+        return None
     
-    logger.info(f"Using files: {sav_file}, {dyr_file}")
+    # A parameter sample either brings its own .dyr variant or changes the constants in memory
+    parameter_changes = None
+    if sample is not None:
+        if sample.get("dyr_file") is not None:
+            dyr_file = sample["dyr_file"]
+        else:
+            parameter_changes = sample["changes"]
     
-    # Set simulation parameters
-    left_limit = 0
-    right_limit = runtime
+    logger.info(f"Using files: {sav_file}, {dyr_file}")
     
     # Generate file names
-    case_name = f"{case_folder}_{disturbance_type}_{channel_option}_{runtime}s"
-    plot_file = f"{case_name}.png"
-    excel_file = f"{case_name}.xlsx"
-    out_file = f"{case_name}.outx"
+    case_name = run_case_name(case_folder, disturbance_type, channel_option, runtime, scenario, sample, decimation)
+    out_file = f"{case_name}.{channel_format}"
+    
+    # Return the stored results if neither the inputs nor the run parameters changed
+    base_path = f"case_data/{case_folder}"
+    case_file = scenario["raw"] if scenario is not None else f"{base_path}/{sav_file}"
+    input_files = [case_file, f"{base_path}/{dyr_file}" if dyr_file is not None else None]
+    cache_key = None
+    if use_cache:
+        cache_key = result_cache.run_key(input_files, {
+            "case": case_folder,
+            "contingency": contingency_name,
+            "disturbance": disturbance_type,
+            "channel_option": channel_option,
+            "runtime": runtime,
+            "elements": contingency["elements"] if contingency is not None else None,
+            "early_stop": early_stop,
+            "scenario": scenario["name"] if scenario is not None else None,
+            "decimation": decimation,
+            "clearing_time": clearing_time,
+            "parameter_changes": parameter_changes,
+            **_backend_params(),
+        })
+        with phase("cache_lookup"):
+            cached = None if force else result_cache.lookup(cache_key)
+        count("cache_hits" if cached is not None else "cache_misses")
+        if cached is not None:
+            logger.success(f"Cached results found for {case_name}, skipping simulation")
+            # The outputs of this run (stored file, CSVs) are still written, from the cache entry
+            POWR, FREQ, VOLT, SPEED = cached_frames(cached)
+            metadata = {key: value for key, value in cached.metadata.items() if key not in ("quantities", "cache_key")}
+            save_results(contingency_name, case_folder, case_name, POWR, FREQ, VOLT, SPEED, metadata, result_format,
+                         export_csv, source=cached.path)
+            return POWR, FREQ, VOLT, SPEED
     
     try:
         # Run simulation
         import time
         t0 = time.time()
-        d, e, z = run_psse_simulation(contingency_name, case_folder, sav_file, dyr_file, out_file, disturbance_type, channel_option, runtime)
+        monitor = StabilityMonitor(**early_stop) if early_stop is not None else None
+        if scenario is not None:
+            snapshot = tuple(scenario["snapshot"])
+            sav_file = os.path.basename(scenario["raw"])
+        else:
+            with phase("snapshot"):
+                snapshot = get_snapshot(case_folder, sav_file, dyr_file, channel_option, monitor_channels=monitor is not None) if use_snapshot else None
+        output = OutputSink()
+        d, e, z = run_psse_simulation(contingency_name, case_folder, sav_file, dyr_file, out_file, disturbance_type, channel_option, runtime, out_dir=scratch_dir, snapshot=snapshot,
+                                      contingency=contingency, monitor=monitor, decimation=decimation, output=output,
+                                      clearing_time=clearing_time, parameter_changes=parameter_changes)
         
         # Process results
-        POWR, FREQ, VOLT, SPEED = sort_results(d, e, z)
+        with phase("sort_results"):
+            POWR, FREQ, VOLT, SPEED = sort_results(d, e, z)
         
-        # Create plots and save data (swapped parameter order)
-        plot_results(contingency_name, case_folder, plot_file, POWR, FREQ, VOLT, SPEED, excel_file, left_limit, right_limit)
+        # Store data (figures are rendered afterwards by the render stage)
+        metadata = {
+            "case": case_folder,
+            "contingency": contingency_name,
+            "disturbance": disturbance_type,
+            "channel_option": channel_option,
+            "runtime": runtime,
+            "decimation": decimation,
+            "clearing_time": clearing_time,
+            "sav_file": sav_file,
+            "dyr_file": dyr_file,
+            "input_digests": {name: file_digest(path) for name, path in zip(("case", "dyr"), input_files) if path is not None},
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backend": backend_name(),
+        }
+        if output.events:
+            metadata.update(output_events=output.events, aborted=output.fatal)
+        if scenario is not None:
+            metadata.update(scenario=scenario["name"], load_mw=scenario["load_mw"])
+        if sample is not None:
+            metadata.update(sample=sample["name"], parameters=sample["values"])
+        if monitor is not None:
+            logger.info(f"Run classified {monitor.status} at t={monitor.stop_time:.2f} s: {monitor.reason}")
+            metadata.update(stability=monitor.status, stop_time=monitor.stop_time, stop_reason=monitor.reason)
+        store_path = save_results(contingency_name, case_folder, case_name, POWR, FREQ, VOLT, SPEED, metadata, result_format, export_csv)
+        if cache_key is not None:
+            with phase("cache_store"):
+                result_cache.store(cache_key, {"POWR": POWR, "FREQ": FREQ, "VOLT": VOLT, "SPEED": SPEED}, metadata,
+                                   stored_path=store_path)
         
         t1 = time.time()
         logger.success(f"Simulation completed in {t1-t0:.2f} seconds")
+        return POWR, FREQ, VOLT, SPEED
         
     except Exception as e:
-        logger.error(f"Error running simulation for {case_folder}: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error running simulation for {case_folder}: {str(e)}")
+        return None
\ No newline at end of file
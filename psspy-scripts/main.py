@@ -3,15 +3,82 @@ Main script to run PSS/E dynamic simulations
 This is the entry point for running simulations
 """
 
+import argparse
 from loguru import logger
-from helpers import run_case_simulation
+from sweep import build_jobs, job_label, run_sweep
+from case_parser import read_raw
+from channel_selection import parse_channel_option, select_buses
+from contingencies import get_case_raw, schedule_contingencies
+from scenarios import SCENARIO_DIR, schedule_scenarios
+from result_cache import evict
+from helpers import BACKENDS, use_backend
+import profiling
 
-# Setup logging
-logger.add("simulation.log", rotation="10 MB", level="INFO")
 
+def parse_args(argv=None):
+    """Parse command line options (sys.argv if argv is None)"""
+    parser = argparse.ArgumentParser(description="Run PSS/E dynamic simulations")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of parallel PSS/E worker processes (default: 1)")
+    parser.add_argument("--contingency-set", choices=["legacy", "n1", "n2"], default="legacy",
+                        help="legacy hard-coded contingencies, or enumerated N-1 / N-1 + N-2 outages from the .raw files")
+    parser.add_argument("--scenarios", nargs="?", const=SCENARIO_DIR, default=None, metavar="DIR",
+                        help=f"run every contingency at each load level found in DIR (default: {SCENARIO_DIR})")
+    parser.add_argument("--service", default=None, metavar="HOST:PORT",
+                        help="run the jobs on a running sweep service (see service.py) instead of local workers")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="simulation backend; fake replays recorded runs or synthesizes them without PSS/E "
+                             "(see fake_psse/psspy.py, default: psse or $PSSPY_BACKEND)")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="re-run the full case setup for every job instead of restoring a cached snapshot")
+    parser.add_argument("--format", choices=["npz", "parquet", "hdf5"], default="npz",
+                        help="result store format (default: npz)")
+    parser.add_argument("--channel-format", choices=["outx", "out"], default="outx",
+                        help="PSS/E channel file format, both read through dyntools (default: outx)")
+    parser.add_argument("--channels", default="All", metavar="SELECTION",
+                        help='buses to record channels for, e.g. "area=1,2;zone=3;kv=100-300;bus=4,5" (default: All)')
+    parser.add_argument("--decimation", type=int, default=1, metavar="N",
+                        help="write every Nth time step to the channel files (default: 1)")
+    parser.add_argument("--clearing-time", type=float, default=1.17, metavar="SECONDS",
+                        help="time at which line faults are cleared; faults start at 1.0 s (default: 1.17)")
+    parser.add_argument("--csv", action="store_true",
+                        help="also export per-quantity CSV files")
+    parser.add_argument("--no-plot", action="store_true",
+                        help="skip the figure rendering stage (plotly/kaleido are not imported)")
+    parser.add_argument("--render-workers", type=int, default=1,
+                        help="number of parallel figure rendering processes (default: 1)")
+    parser.add_argument("--report", nargs="?", const="results/dashboard.html", default=None, metavar="FILE",
+                        help="write an interactive HTML dashboard of the sweep's runs (default: results/dashboard.html)")
+    parser.add_argument("--early-stop", action="store_true",
+                        help="run in segments and stop once a run is clearly unstable or has settled")
+    parser.add_argument("--segment", type=float, default=0.1, metavar="SECONDS",
+                        help="segment length for --early-stop checks (default: 0.1)")
+    parser.add_argument("--metrics", nargs="?", const="results/metrics_summary.csv", default=None, metavar="FILE",
+                        help="compute stability metrics as runs finish and save the sweep summary table (CSV)")
+    parser.add_argument("--profile", nargs="?", const="timings.jsonl", default=None, metavar="FILE",
+                        help="record per-phase timings as JSON lines (default file: timings.jsonl)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="with --profile, also trace peak Python memory per phase (slows the phases down)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-simulate every job even if cached results are up to date")
+    parser.add_argument("--cache-max-size", type=float, default=None, metavar="MB",
+                        help="evict least recently used cached results beyond this size")
+    parser.add_argument("--cache-max-age", type=float, default=None, metavar="DAYS",
+                        help="evict cached results not used for this many days")
+    return parser.parse_args(argv)
 
-def main():
+
+def main(argv=None):
     """Main function to run simulations"""
+    args = parse_args(argv)
+    
+    # Setup logging
+    logger.add("simulation.log", rotation="10 MB", level="INFO")
+    
+    if args.profile:
+        profiling.enable(args.profile, memory=args.profile_memory)
+    if args.backend:
+        use_backend(args.backend)
     
     # Available cases (based on your case_data folder structure)
     available_cases = ["case_NRE", "case_RE"]
@@ -29,28 +96,86 @@ def main():
     ]
     
     # Configuration parameters
-    channel_option = "All"          # or other options
+    channel_option = args.channels  # "All" or a bus selection, see channel_selection.py
     runtime = 20                    # simulation time in seconds
     
     logger.info("Starting PSS/E Dynamic Simulation Suite")
     
-    # Run simulations for all contingencies and all cases
-    for contingency in contingencies:
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Running {contingency['description']}")
-        logger.info(f"Contingency Type: {contingency['type']}")
-        logger.info(f"{'='*60}")
-        
+    selection = parse_channel_option(channel_option)  # fail fast on a malformed selection
+    if selection is not None:
         for case in available_cases:
-            logger.info(f"Processing case: {case}")
-            run_case_simulation(
-                case_folder=case, 
-                disturbance_type=contingency["type"], 
-                channel_option=channel_option, 
-                runtime=runtime
-            )
+            raw_path = get_case_raw(case)
+            if raw_path is not None:
+                buses = select_buses(read_raw(raw_path)["buses"], selection)
+                logger.info(f"{case}: recording channels for {len(buses)} buses ({channel_option})")
+    
+    options = dict(use_snapshot=not args.no_snapshot, result_format=args.format, export_csv=args.csv,
+                   force=args.force, channel_format=args.channel_format, decimation=args.decimation,
+                   clearing_time=args.clearing_time,
+                   early_stop={"interval": args.segment} if args.early_stop else None)
+    
+    # Run simulations for all contingencies and all cases
+    if args.contingency_set == "legacy":
+        for contingency in contingencies:
+            logger.info(f"Queued {contingency['description']} ({contingency['type']}) for {len(available_cases)} cases")
+        jobs = build_jobs(contingencies, available_cases, channel_option=channel_option, runtime=runtime, **options)
+    else:
+        depth = 1 if args.contingency_set == "n1" else 2
+        jobs = schedule_contingencies(available_cases, depth=depth, channel_option=channel_option, runtime=runtime, **options)
+        logger.info(f"Queued {len(jobs)} enumerated outage jobs")
+    
+    if args.scenarios:
+        jobs = schedule_scenarios(jobs, scenario_dir=args.scenarios)
+        logger.info(f"Queued {len(jobs)} jobs across load scenarios")
+    
+    on_result = None
+    if args.metrics:
+        from metrics import MetricsAccumulator, run_from_store
+        accumulator = MetricsAccumulator()
         
-        logger.info(f"Completed all cases for {contingency['description']}")
+        def on_result(record):
+            # Read the run back from its stored file; records do not carry the result frames
+            if record["status"] == "ok" and record["path"] is not None:
+                metadata = {
+                    "case": record["case_folder"],
+                    "disturbance": record["disturbance_type"],
+                    "contingency": record["contingency"]["name"] if record.get("contingency") else None,
+                    "scenario": record["scenario"]["name"] if record.get("scenario") else None,
+                }
+                accumulator.add(dict(run_from_store(record["path"]), id=job_label(record), metadata=metadata))
+    
+    if args.service:
+        from service import parse_address, run_remote
+        records = run_remote(jobs, parse_address(args.service), on_result=on_result)
+    else:
+        records = run_sweep(jobs, workers=args.workers, on_result=on_result)
+    
+    if args.metrics:
+        accumulator.table().to_csv(args.metrics, index_label="run")
+        logger.success(f"Metrics summary saved: {args.metrics}")
+    
+    # Index the new runs so they can be queried across cases (see catalog.py)
+    from catalog import Catalog
+    with Catalog() as catalog:
+        catalog.update()
+    
+    if args.report:
+        # Only the runs of this sweep, not everything catalogued from earlier sweeps
+        paths = [record["path"] for record in records if record["status"] == "ok" and record["path"] is not None]
+        from dashboard import build_dashboard
+        try:
+            build_dashboard(args.report, path=paths)
+        except ValueError:
+            logger.warning(f"Dashboard skipped: none of the {len(paths)} stored runs of this sweep are catalogued")
+    
+    # Render figures for new or updated results after the sweep
+    if not args.no_plot:
+        from render import render_results
+        render_results(workers=args.render_workers)
+    
+    if args.cache_max_size is not None or args.cache_max_age is not None:
+        max_bytes = args.cache_max_size * 1e6 if args.cache_max_size is not None else None
+        evict(max_bytes=max_bytes, max_age_days=args.cache_max_age)
     
     logger.info("ALL SIMULATIONS COMPLETED!")
 
@@ -0,0 +1,285 @@
+"""
+Stability Metrics
+Computes frequency nadir, RoCoF, settling time, damping ratio, minimum voltage and
+the longest stretch below a voltage threshold for many runs at once. Runs are
+stacked into (runs x time x channels) arrays per quantity and every metric is a
+NumPy reduction over that stack; MetricsAccumulator collects runs as they finish
+and evaluates them in batches sized by the bytes of those stacks, producing one
+summary table per sweep.
+
+    python metrics.py results --out results/metrics_summary.csv
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from loguru import logger
+from result_store import STORE_EXTENSIONS, load_run, resample
+
+# Metric settings; FREQ and SPEED blocks hold absolute values in p.u. (1.0 = nominal)
+DEFAULTS = {
+    "event_time": 1.0,           # disturbance time (s); metrics use the response after it
+    "base_frequency": 60.0,      # Hz
+    "rocof_window": 0.1,         # s, window of the RoCoF difference quotient
+    "settle_tolerance": 1e-4,    # p.u., minimum settling band of the frequency
+    "settle_fraction": 0.05,     # settling band as a fraction of the largest excursion
+    "v_threshold": 0.9,          # p.u., for the longest stretch below it
+    "peak_threshold": 1e-6,      # p.u., oscillation peaks smaller than this are ignored
+}
+
+# Float64 stack bytes evaluated together; the metric temporaries take a few times this
+BATCH_BYTES = 128 * 2 ** 20
+
+METRIC_COLUMNS = [
+    "freq_nadir_hz", "freq_nadir_bus", "rocof_hz_s", "settling_time_s", "damping_ratio",
+    "min_voltage_pu", "min_voltage_bus", "time_below_v_s",
+]
+
+
+def stack_runs(runs, quantity):
+    """
+    Stack one quantity of many runs into a (runs x time x channels) float array.
+    Channels are the union over runs (NaN where a run lacks one); runs on a
+    different time axis (e.g. stopped early) are resampled onto the longest one.
+    Returns (time, values, columns).
+    """
+    parts = [run["blocks"].get(quantity) for run in runs]
+    columns = sorted(set().union(*(part[0] for part in parts if part is not None)))
+    longest = max(runs, key=lambda run: (len(run["time"]), run["time"][-1] if len(run["time"]) else 0))
+    time = np.asarray(longest["time"], dtype=np.float64)
+
+    values = np.full((len(runs), len(time), len(columns)), np.nan)
+    position = {column: i for i, column in enumerate(columns)}
+    for row, (run, part) in enumerate(zip(runs, parts)):
+        if part is None or len(run["time"]) == 0:
+            continue
+        run_columns, run_values = part
+        index = [position[column] for column in run_columns]
+        values[row][:, index] = resample(time, np.asarray(run["time"], dtype=np.float64),
+                                          np.asarray(run_values, dtype=np.float64))
+    return time, values, columns
+
+
+def _final_values(values):
+    """Last finite sample of every (run, channel) series"""
+    n_valid = np.isfinite(values).sum(axis=1)
+    last = np.clip(n_valid - 1, 0, None)
+    return np.take_along_axis(values, last[:, None, :], axis=1)[:, 0, :]
+
+
+def _argbest(metric, columns, reduce):
+    """Per-run value and column label of the worst channel (reduce is np.nanargmin or np.nanargmax)"""
+    valid = np.isfinite(metric).any(axis=1)
+    best = np.zeros(len(metric), dtype=np.int64)
+    if valid.any():
+        best[valid] = reduce(metric[valid], axis=1)
+    value = np.where(valid, metric[np.arange(len(metric)), best], np.nan)
+    labels = np.array(columns, dtype=object)[best] if columns else np.full(len(metric), None)
+    return value, np.where(valid, labels, None)
+
+
+def _after_event(time, values, settings):
+    """Time axis and (runs x time x channels) values from the disturbance onwards"""
+    after = time >= settings["event_time"]
+    return time[after], values[:, after, :]
+
+
+def frequency_metrics(time, freq, columns, settings):
+    """Nadir (Hz), largest RoCoF (Hz/s) and settling time (s after the event) from a FREQ stack"""
+    time, freq = _after_event(time, freq, settings)
+    hz = freq * settings["base_frequency"]
+    if hz.shape[1] == 0 or hz.shape[2] == 0:
+        empty = np.full(len(freq), np.nan)
+        return empty, np.full(len(freq), None), empty, empty
+
+    nadir, nadir_bus = _argbest(np.nanmin(hz, axis=1), columns, np.nanargmin)
+
+    # RoCoF: difference quotient over a sliding window, steps of zero length skipped
+    ahead = np.searchsorted(time, time + settings["rocof_window"])
+    start = np.nonzero(ahead < len(time))[0]
+    end = ahead[start]
+    span = time[end] - time[start]
+    start, end, span = start[span > 0], end[span > 0], span[span > 0]
+    rocof = np.abs(hz[:, end, :] - hz[:, start, :]) / span[None, :, None]
+    rocof = np.nanmax(rocof.reshape(len(hz), -1), axis=1) if rocof.size else np.full(len(hz), np.nan)
+
+    # Settling: last time outside the band around the final value
+    deviation = np.abs(freq - _final_values(freq)[:, None, :])
+    excursion = np.nanmax(deviation, axis=1)
+    band = np.maximum(settings["settle_tolerance"], settings["settle_fraction"] * excursion)
+    outside = deviation > band[:, None, :]
+    last_outside = len(time) - 1 - np.argmax(outside[:, ::-1, :], axis=1)
+    settle = np.where(outside.any(axis=1), time[last_outside] - settings["event_time"], 0.0)
+    settle = np.where(np.isfinite(excursion), settle, np.nan)
+    return nadir, nadir_bus, rocof, np.nanmax(settle, axis=1)
+
+
+def damping_ratio(time, speed, settings):
+    """
+    Damping ratio of the dominant electromechanical swing from the logarithmic
+    decrement between the first two post-event maxima of each machine's speed
+    deviation, one swing period apart. Returns the least damped machine per run
+    (NaN where no machine has two peaks).
+    """
+    time, speed = _after_event(time, speed, settings)
+    if speed.shape[1] < 3 or speed.shape[2] == 0:
+        return np.full(len(speed), np.nan)
+    swing = speed - _final_values(speed)[:, None, :]
+
+    middle = swing[:, 1:-1, :]
+    peaks = (middle > swing[:, :-2, :]) & (middle >= swing[:, 2:, :]) & (middle > settings["peak_threshold"])
+    order = np.cumsum(peaks, axis=1)
+    first = np.argmax(peaks & (order == 1), axis=1)
+    second = np.argmax(peaks & (order == 2), axis=1)
+    p1 = np.take_along_axis(middle, first[:, None, :], axis=1)[:, 0, :]
+    p2 = np.take_along_axis(middle, second[:, None, :], axis=1)[:, 0, :]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decrement = np.log(p1 / p2)
+        zeta = decrement / np.sqrt(4 * np.pi ** 2 + decrement ** 2)
+    zeta = np.where((order[:, -1, :] >= 2) & np.isfinite(zeta), zeta, np.inf)
+    least = np.min(zeta, axis=1)
+    return np.where(np.isfinite(least), least, np.nan)
+
+
+def voltage_metrics(time, volt, columns, settings):
+    """
+    Minimum post-event voltage (p.u.) with its bus, and the longest continuous time
+    (s) any bus stayed below v_threshold
+    """
+    time, volt = _after_event(time, volt, settings)
+    if volt.shape[1] == 0 or volt.shape[2] == 0:
+        return np.full(len(volt), np.nan), np.full(len(volt), None), np.full(len(volt), np.nan)
+    min_voltage, min_bus = _argbest(np.nanmin(volt, axis=1), columns, np.nanargmin)
+
+    # Time below accumulated along each series, restarted wherever the voltage is back above the threshold
+    step = np.diff(time, append=time[-1])
+    below = volt < settings["v_threshold"]
+    elapsed = np.cumsum(np.where(below, step[None, :, None], 0.0), axis=1)
+    restart = np.maximum.accumulate(np.where(below, 0.0, elapsed), axis=1)
+    time_below = (elapsed - restart).max(axis=(1, 2))
+    return min_voltage, min_bus, time_below
+
+
+def compute_metrics(runs, **settings):
+    """
+    Metrics of a batch of runs as a DataFrame (one row per run, indexed by run id).
+    Each run is a dict with id, time, blocks (quantity -> (columns, time x channels
+    values)) and metadata, see run_from_frames() and run_from_store().
+    """
+    settings = dict(DEFAULTS, **settings)
+    n = len(runs)
+    table = {column: np.full(n, np.nan, dtype=object if column.endswith("_bus") else np.float64)
+             for column in METRIC_COLUMNS}
+
+    if any("FREQ" in run["blocks"] for run in runs):
+        time, freq, columns = stack_runs(runs, "FREQ")
+        nadir, nadir_bus, rocof, settling = frequency_metrics(time, freq, columns, settings)
+        table.update(freq_nadir_hz=nadir, freq_nadir_bus=nadir_bus, rocof_hz_s=rocof, settling_time_s=settling)
+    if any("SPEED" in run["blocks"] for run in runs):
+        time, speed, _ = stack_runs(runs, "SPEED")
+        table["damping_ratio"] = damping_ratio(time, speed, settings)
+    if any("VOLT" in run["blocks"] for run in runs):
+        time, volt, columns = stack_runs(runs, "VOLT")
+        min_voltage, min_bus, time_below = voltage_metrics(time, volt, columns, settings)
+        table.update(min_voltage_pu=min_voltage, min_voltage_bus=min_bus, time_below_v_s=time_below)
+
+    metadata = pd.DataFrame([run["metadata"] for run in runs], index=[run["id"] for run in runs])
+    summary = pd.DataFrame(table, index=metadata.index)
+    return pd.concat([metadata, summary], axis=1)
+
+
+def run_from_frames(run_id, frames, metadata=None):
+    """Metrics input from the sorted result DataFrames of a run (dict of quantity -> DataFrame)"""
+    blocks = {}
+    time = np.empty(0)
+    for quantity, frame in frames.items():
+        if frame is None or frame.empty:
+            continue
+        time = np.asarray(frame.index, dtype=np.float64)
+        blocks[quantity] = ([str(column) for column in frame.columns], frame.to_numpy(dtype=np.float64))
+    return {"id": run_id, "time": time, "blocks": blocks, "metadata": dict(metadata or {})}
+
+
+def run_from_store(path):
+    """Metrics input from a stored result file (arrays are read without building DataFrames)"""
+    run = load_run(path)
+    blocks = {quantity: (run.columns(quantity), run.array(quantity)) for quantity in run.quantities}
+    metadata = {key: value for key, value in run.metadata.items() if not isinstance(value, (list, dict))}
+    return {"id": os.path.splitext(os.path.basename(path))[0], "time": run.time, "blocks": blocks, "metadata": metadata}
+
+
+def stack_bytes(run):
+    """Bytes the quantities of a run take in the float64 stacks of compute_metrics()"""
+    return sum(len(run["time"]) * len(columns) * 8 for columns, _ in run["blocks"].values())
+
+
+class MetricsAccumulator:
+    """
+    Collects runs as they finish and computes their metrics in batches of about
+    max_bytes of float64 stacks (and at most batch_size runs, if given), so a long
+    sweep never holds more than one batch of time series in memory however large
+    the system.
+    """
+
+    def __init__(self, max_bytes=BATCH_BYTES, batch_size=None, **settings):
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.settings = settings
+        self._pending = []
+        self._pending_bytes = 0
+        self._tables = []
+
+    def add(self, run):
+        """Queue a run (see compute_metrics for its layout)"""
+        self._pending.append(run)
+        self._pending_bytes += stack_bytes(run)
+        if self._pending_bytes >= self.max_bytes or (self.batch_size and len(self._pending) >= self.batch_size):
+            self.flush()
+
+    def flush(self):
+        """Compute the metrics of the queued runs"""
+        if self._pending:
+            self._tables.append(compute_metrics(self._pending, **self.settings))
+            self._pending = []
+            self._pending_bytes = 0
+
+    def table(self):
+        """Summary table of every run added so far"""
+        self.flush()
+        if not self._tables:
+            return pd.DataFrame(columns=METRIC_COLUMNS)
+        return pd.concat(self._tables)
+
+
+def summarize_results(results_root="results", max_bytes=BATCH_BYTES, batch_size=None, **settings):
+    """Summary table of every stored run under results_root (see MetricsAccumulator for the batching)"""
+    extensions = tuple(STORE_EXTENSIONS.values())
+    accumulator = MetricsAccumulator(max_bytes, batch_size, **settings)
+    for folder, _, files in os.walk(results_root):
+        for name in sorted(files):
+            if name.endswith(extensions):
+                accumulator.add(run_from_store(os.path.join(folder, name)))
+    return accumulator.table()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute stability metrics for all stored runs")
+    parser.add_argument("results_root", nargs="?", default="results")
+    parser.add_argument("--out", default="results/metrics_summary.csv", help="summary table (CSV)")
+    parser.add_argument("--batch-mb", type=float, default=BATCH_BYTES / 2 ** 20,
+                        help="MB of float64 time series evaluated together (default: %(default)g)")
+    parser.add_argument("--batch-size", type=int, default=None, help="at most this many runs evaluated together")
+    parser.add_argument("--v-threshold", type=float, default=DEFAULTS["v_threshold"], help="p.u.")
+    parser.add_argument("--event-time", type=float, default=DEFAULTS["event_time"], help="disturbance time (s)")
+    args = parser.parse_args(argv)
+
+    table = summarize_results(args.results_root, args.batch_mb * 2 ** 20, args.batch_size,
+                              v_threshold=args.v_threshold, event_time=args.event_time)
+    table.to_csv(args.out, index_label="run")
+    logger.success(f"Metrics of {len(table)} runs saved: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
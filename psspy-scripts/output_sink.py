@@ -0,0 +1,96 @@
+"""
+PSS/E Output Sink
+A file-like stdout replacement that parses PSS/E messages line by line as they are
+printed, turning them into events (initial conditions check, network not converged,
+NaN) and flagging fatal ones so the run can be stopped at the next segment boundary.
+Only the last lines are kept, so memory stays bounded however chatty the run is.
+"""
+
+import re
+from collections import deque
+from loguru import logger
+
+INITIAL_CONDITIONS_OK = "initial_conditions_ok"
+INITIAL_CONDITIONS_SUSPECT = "initial_conditions_suspect"
+NOT_CONVERGED = "network_not_converged"
+NAN = "nan"
+
+# (event, pattern, fatal)
+PATTERNS = [
+    (INITIAL_CONDITIONS_OK, re.compile(r"INITIAL CONDITIONS CHECK O\.K\."), False),
+    (INITIAL_CONDITIONS_SUSPECT, re.compile(r"INITIAL CONDITIONS SUSPECT"), False),
+    (NOT_CONVERGED, re.compile(r"Network not converged", re.IGNORECASE), True),
+    (NAN, re.compile(r"NaN"), True),
+]
+
+
+class OutputSink:
+    """
+    Stream PSS/E output into events. events maps each event to its count, first
+    line and the simulation time it was first seen at (set time at each segment).
+    fatal names the first fatal event, None while the run is healthy.
+    """
+
+    def __init__(self, tail_lines=200, max_line_length=4096, on_event=None):
+        self.tail = deque(maxlen=tail_lines)
+        self.max_line_length = max_line_length
+        self.on_event = on_event
+        self.events = {}
+        self.fatal = None
+        self.time = 0.0
+        self._partial = ""
+
+    def write(self, text):
+        self._partial += text
+        if "\n" in self._partial:
+            *lines, self._partial = self._partial.split("\n")
+            for line in lines:
+                self._parse(line)
+        if len(self._partial) > self.max_line_length:
+            # Never let an unterminated line grow without bound
+            self._parse(self._partial)
+            self._partial = ""
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._partial:
+            self._parse(self._partial)
+            self._partial = ""
+
+    def _parse(self, line):
+        line = line.rstrip("\r")
+        self.tail.append(line)
+        for event, pattern, fatal in PATTERNS:
+            if pattern.search(line):
+                self._emit(event, line, fatal)
+
+    def _emit(self, event, line, fatal):
+        entry = self.events.get(event)
+        if entry is None:
+            entry = self.events[event] = {"count": 0, "first": line.strip(), "time": self.time}
+            if self.on_event is not None:
+                self.on_event(event, line)
+        entry["count"] += 1
+        if fatal and self.fatal is None:
+            self.fatal = event
+
+    def has(self, event):
+        return event in self.events
+
+    def getvalue(self):
+        """The retained tail of the output"""
+        return "\n".join(self.tail)
+
+    def log_summary(self):
+        """Log the outcome of the run the way the post-run output check used to"""
+        if self.has(NOT_CONVERGED):
+            logger.error('Network not converged')
+        elif self.has(NAN):
+            logger.error("NaN, network is no good")
+        elif self.has(INITIAL_CONDITIONS_OK):
+            logger.success("Network converged. No errors and initial conditions were good.")
+        if self.has(INITIAL_CONDITIONS_SUSPECT):
+            logger.warning(f"Initial conditions suspect: {self.events[INITIAL_CONDITIONS_SUSPECT]['first']}")
@@ -0,0 +1,148 @@
+"""
+Profiling
+Per-phase timers, counters and peak memory for the simulation pipeline.
+Records are appended as JSON lines to a timings file next to the loguru log.
+Profiling is enabled through the PSSPY_PROFILE environment variable (set by
+enable()), so parallel worker processes inherit it. Python memory tracing
+(tracemalloc) slows down the phases it measures, so peak memory is only
+recorded when PSSPY_PROFILE_MEMORY is also set (enable(memory=True)).
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from loguru import logger
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+PROFILE_ENV = "PSSPY_PROFILE"
+MEMORY_ENV = "PSSPY_PROFILE_MEMORY"
+
+_tags = {}          # tags added to every record, e.g. case and contingency of the current job
+_counters = {}      # counters accumulated until the next flush_counters()
+_stack = []         # open phases, innermost last
+
+
+def enable(path="timings.jsonl", memory=False):
+    """Turn profiling on for this process and any worker processes it starts; memory also traces peak memory"""
+    os.environ[PROFILE_ENV] = path
+    if memory:
+        os.environ[MEMORY_ENV] = "1"
+    else:
+        os.environ.pop(MEMORY_ENV, None)
+
+
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV))
+
+
+def memory_enabled():
+    return enabled() and bool(os.environ.get(MEMORY_ENV))
+
+
+def _peak_rss_mb():
+    """Peak resident memory of the process (includes PSS/E's own allocations)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / 1e6 if os.uname().sysname == "Darwin" else peak / 1e3
+
+
+def emit(record):
+    """Append a structured record to the timings file and the log"""
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        return
+    record = dict(_tags, **record, pid=os.getpid(), timestamp=time.time())
+    with open(path, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
+    logger.bind(profile=record).debug(f"[profile] {record}")
+
+
+@contextmanager
+def tagged(**tags):
+    """Add tags (e.g. case, contingency) to every record emitted inside the block"""
+    previous = dict(_tags)
+    _tags.update(tags)
+    try:
+        yield
+    finally:
+        _tags.clear()
+        _tags.update(previous)
+
+
+@contextmanager
+def phase(name, **tags):
+    """Time a pipeline phase and record its peak Python memory (no-op unless profiling is enabled)"""
+    if not enabled():
+        yield
+        return
+    if not memory_enabled():
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            emit({"type": "phase", "phase": name, "seconds": time.perf_counter() - t0, "peak_mb": None,
+                  "rss_peak_mb": _peak_rss_mb(), **tags})
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if _stack:
+        # Keep the enclosing phase's peak before resetting the counter for this one
+        _stack[-1]["peak"] = max(_stack[-1]["peak"], tracemalloc.get_traced_memory()[1] - _stack[-1]["base"])
+    tracemalloc.reset_peak()
+    entry = {"base": tracemalloc.get_traced_memory()[0], "peak": 0}
+    _stack.append(entry)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        _stack.pop()
+        peak = max(entry["peak"], tracemalloc.get_traced_memory()[1] - entry["base"])
+        if _stack:
+            _stack[-1]["peak"] = max(_stack[-1]["peak"], peak + entry["base"] - _stack[-1]["base"])
+        if started_tracing:
+            tracemalloc.stop()
+        emit({"type": "phase", "phase": name, "seconds": elapsed, "peak_mb": peak / 1e6,
+              "rss_peak_mb": _peak_rss_mb(), **tags})
+
+
+def count(name, n=1):
+    """Increment a named counter"""
+    _counters[name] = _counters.get(name, 0) + n
+
+
+def flush_counters(**tags):
+    """Emit the accumulated counters as one record and reset them"""
+    if _counters:
+        emit({"type": "counters", **tags, **_counters})
+        _counters.clear()
+
+
+def read_records(path="timings.jsonl"):
+    """Load the records of a timings file"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """Total seconds, call count and max peak memory per phase (None without memory tracing)"""
+    summary = {}
+    for record in records:
+        if record.get("type") != "phase":
+            continue
+        entry = summary.setdefault(record["phase"], {"calls": 0, "seconds": 0.0, "peak_mb": None})
+        entry["calls"] += 1
+        entry["seconds"] += record["seconds"]
+        if record.get("peak_mb") is not None:
+            entry["peak_mb"] = max(entry["peak_mb"] or 0.0, record["peak_mb"])
+    return summary
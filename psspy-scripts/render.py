@@ -0,0 +1,189 @@
+"""
+Figure Rendering
+Renders the static PNG figures of stored runs as a separate stage after the sweep.
+Only figures that are missing or older than their result file are rendered, and
+parallel workers each render a whole batch of figures with one Kaleido process.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import plotly.graph_objects as go
+import plotly.io as pio
+from loguru import logger
+from profiling import phase
+from result_store import STORE_EXTENSIONS, load_run
+
+# Define color schemes
+DEFAULT_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22']
+BUS_COLORS = ['blue', 'red', 'green', 'purple', 'orange', 'cyan', 'brown', 'lightgreen', 'pink']
+GEN_COLORS = ['blue', 'green', 'red']
+
+# Per quantity: title, y axis label, colors and legend prefix
+FIGURES = {
+    "POWR": ("Generator Power", "MW", GEN_COLORS, "PSSE:GEN"),
+    "FREQ": ("Bus Frequency", "Frequency (p.u.)", DEFAULT_COLORS, "PSSE: BUS"),
+    "VOLT": ("Bus Voltage Magnitude", "Voltage magnitude (p.u.)", BUS_COLORS, "PSSE: BUS"),
+    "SPEED": ("Generator Speed", "Speed (p.u.)", GEN_COLORS, "PSSE: GEN"),
+}
+
+
+def time_ticks(start, end, max_ticks=6):
+    """Evenly spaced round tick values (1, 2 or 5 x 10^k apart) covering start..end"""
+    span = end - start
+    if span <= 0:
+        return [start]
+    step = 10 ** math.floor(math.log10(span / max_ticks))
+    for factor in (1, 2, 5, 10):
+        if span / (step * factor) <= max_ticks - 1:
+            step *= factor
+            break
+    first = math.ceil(start / step) * step
+    return [round(first + i * step, 10) for i in range(int((end - first) / step + 1e-9) + 1)]
+
+
+def configure_kaleido():
+    """Configure Plotly to use kaleido for static image export"""
+    pio.kaleido.scope.default_format = "png"
+    pio.kaleido.scope.default_width = 1000
+    pio.kaleido.scope.default_height = 600
+
+
+def create_plotly_config_figure(data, title, ylabel, colors, label_prefix, left_limit, right_limit, custom_yticks=None):
+    """Create a Plotly figure with common formatting"""
+    fig = go.Figure()
+    
+    for i, col in enumerate(data.columns):
+        color = colors[i % len(colors)]
+        
+        # Extract the actual bus/gen number from column name
+        if 'GEN_BUS' in col:
+            display_name = f"PSSE: {col}"  # Shows as "PSSE: GEN_BUS1"
+        elif 'BUS' in col:
+            display_name = f"PSSE: {col}"  # Shows as "PSSE: BUS1"
+        else:
+            display_name = f"{label_prefix}{col}"
+            
+        fig.add_trace(go.Scatter(
+            x=data.index,
+            y=data[col],
+            mode='lines',
+            name=display_name,
+            line=dict(color=color, width=2)
+        ))
+    
+    # Update layout
+    fig.update_layout(
+        title=dict(text=title, x=0.5, font=dict(size=16)),
+        xaxis=dict(
+            title='Time (s)',
+            range=[left_limit, right_limit],
+            tickvals=time_ticks(left_limit, right_limit),
+            gridcolor='rgba(128, 128, 128, 0.3)',
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=ylabel,
+            gridcolor='rgba(128, 128, 128, 0.3)',
+            showgrid=True
+        ),
+        legend=dict(
+            x=1.02,
+            y=1,
+            bgcolor='rgba(255, 255, 255, 0.9)',
+            bordercolor='rgba(0, 0, 0, 0.3)',
+            borderwidth=1
+        ),
+        plot_bgcolor='white',
+        width=1000,
+        height=600,
+        margin=dict(r=150)
+    )
+    
+    # Set custom y-axis ticks if provided
+    if custom_yticks:
+        fig.update_yaxes(tickvals=custom_yticks)
+    
+    return fig
+
+
+def find_pending_figures(results_root="results"):
+    """List (result file, quantity, png path) for every figure that is missing or out of date"""
+    extensions = tuple(STORE_EXTENSIONS.values())
+    pending = []
+    for folder, _, files in os.walk(results_root):
+        for name in sorted(files):
+            if not name.endswith(extensions):
+                continue
+            store_path = os.path.join(folder, name)
+            stem = os.path.splitext(name)[0]
+            store_mtime = os.path.getmtime(store_path)
+            for quantity in load_run(store_path).quantities:
+                if quantity not in FIGURES:
+                    continue
+                png_path = os.path.join(folder, f"{quantity}_{stem}.png")
+                if not os.path.exists(png_path) or os.path.getmtime(png_path) < store_mtime:
+                    pending.append((store_path, quantity, png_path))
+    return pending
+
+
+def render_figure(store_path, quantity, png_path):
+    """Render one quantity of a stored run to a PNG"""
+    run = load_run(store_path)
+    title, ylabel, colors, label_prefix = FIGURES[quantity]
+    contingency = run.metadata.get("contingency", "")
+    runtime = run.metadata.get("runtime", float(run.time[-1]))
+
+    fig = create_plotly_config_figure(
+        run[quantity],
+        f"{title} after {contingency}",
+        ylabel,
+        colors,
+        label_prefix,
+        0,
+        runtime
+    )
+    if quantity == "SPEED":
+        # Auto-scale y-axis for speed data instead of fixed ticks
+        fig.update_yaxes(autorange=True)
+
+    with phase("png_export", quantity=quantity):
+        fig.write_image(png_path, format='png', engine='kaleido')
+    logger.info(f"{quantity} plot saved: {png_path}")
+
+
+def _render_batch(tasks):
+    """Render a batch of figures in this process, reusing its Kaleido instance; returns the number rendered"""
+    configure_kaleido()
+    rendered = 0
+    for store_path, quantity, png_path in tasks:
+        try:
+            render_figure(store_path, quantity, png_path)
+            rendered += 1
+        except Exception as e:
+            logger.error(f"Could not render {png_path}: {str(e)}")
+    return rendered
+
+
+def render_results(results_root="results", workers=1):
+    """Render all missing or out-of-date figures under results_root; returns the number rendered"""
+    tasks = find_pending_figures(results_root)
+    if not tasks:
+        logger.info("All figures are up to date")
+        return 0
+
+    logger.info(f"Rendering {len(tasks)} figures on {workers} worker(s)")
+    if workers <= 1:
+        return _render_batch(tasks)
+
+    # One batch per worker so each Kaleido process renders many figures
+    batches = [tasks[i::workers] for i in range(workers)]
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_batch, batch) for batch in batches if batch]
+        for future in as_completed(futures):
+            try:
+                rendered += future.result()
+            except Exception as e:
+                logger.error(f"Render worker failed: {str(e)}")
+    return rendered
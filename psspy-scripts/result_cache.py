@@ -0,0 +1,113 @@
+"""
+Result Cache
+Content-addressed cache of simulation results. A run is keyed by a digest of its
+input files (.sav/.dyr) and the full run parameters, so unchanged jobs can return
+their stored channel data without simulating again. Entries of runs stored as .npz
+are hard links to the stored run (see result_store.link_run()), so the last use of
+an entry is recorded in an empty <key>.last_used file next to it, never by touching
+the entry (that would change the stored run's mtime as well).
+"""
+
+import os
+import time
+from loguru import logger
+from digests import inputs_digest
+from result_store import link_run, load_run, save_run
+
+CACHE_DIR = "cache/results"
+
+# Bump to invalidate every cached result, e.g. after changing how runs are set up
+CACHE_VERSION = 1
+
+
+def run_key(input_files, params):
+    """Cache key for a run: digest of the input file contents and run parameters"""
+    return inputs_digest(input_files, dict(params, cache_version=CACHE_VERSION))
+
+
+def _entry_path(key):
+    return f"{CACHE_DIR}/{key}.npz"
+
+
+def _used_path(entry_path):
+    return f"{entry_path[:-4]}.last_used"
+
+
+def _mark_used(entry_path):
+    """Record the use of a cache entry for the age/size eviction"""
+    with open(_used_path(entry_path), "a"):
+        pass
+    os.utime(_used_path(entry_path))
+
+
+def last_used(entry_path):
+    """Time of the last use of a cache entry (its own mtime if it was never marked)"""
+    try:
+        return os.stat(_used_path(entry_path)).st_mtime
+    except FileNotFoundError:
+        return os.stat(entry_path).st_mtime
+
+
+def lookup(key):
+    """Return the cached run for a key (a lazily loaded StoredRun) or None on a miss"""
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        run = load_run(path)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+        os.remove(path)
+        return None
+    _mark_used(path)
+    return run
+
+
+def store(key, blocks, metadata, stored_path=None):
+    """
+    Store the quantity blocks of a run under a key. A run already stored as .npz
+    (stored_path) is linked into the cache instead, so its data is kept on disk once.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if stored_path is not None and stored_path.endswith(".npz"):
+        link_run(stored_path, _entry_path(key))
+    else:
+        # Write under a private name first so readers never see a partial file
+        tmp_path = save_run(f"{CACHE_DIR}/{key}.tmp{os.getpid()}", blocks, dict(metadata, cache_key=key))
+        os.replace(tmp_path, _entry_path(key))
+    _mark_used(_entry_path(key))
+    return _entry_path(key)
+
+
+def evict(max_bytes=None, max_age_days=None):
+    """
+    Remove cache entries older than max_age_days (since last use), then the least
+    recently used entries until the cache fits in max_bytes. Returns the number removed.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = f"{CACHE_DIR}/{name}"
+        if name.endswith(".npz") and os.path.isfile(path):
+            entries.append((last_used(path), os.path.getsize(path), path))
+    entries.sort()  # least recently used first
+
+    removed = 0
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for used, size, path in entries:
+        too_old = max_age_days is not None and now - used > max_age_days * 86400
+        too_big = max_bytes is not None and total > max_bytes
+        if not (too_old or too_big):
+            continue
+        os.remove(path)
+        if os.path.exists(_used_path(path)):
+            os.remove(_used_path(path))
+        total -= size
+        removed += 1
+
+    if removed:
+        logger.info(f"Evicted {removed} cached results ({total / 1e6:.1f} MB remaining)")
+    return removed
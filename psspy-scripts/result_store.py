@@ -0,0 +1,263 @@
+"""
+Result Store
+Stores all quantities of a simulation run in a single binary file (float32 data,
+shared time axis and run metadata) and loads them back lazily.
+
+Formats: "npz" (always available, uncompressed so it can be memory-mapped),
+"parquet" (needs pyarrow) and "hdf5" (needs h5py). CSV is kept as an export option.
+"""
+
+import json
+import os
+import shutil
+import struct
+import zipfile
+import numpy as np
+from loguru import logger
+
+STORE_FORMATS = ("npz", "parquet", "hdf5")
+STORE_EXTENSIONS = {"npz": ".npz", "parquet": ".parquet", "hdf5": ".h5"}
+
+def _format_from_path(path):
+    """Guess the store format from a file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, ext in STORE_EXTENSIONS.items():
+        if extension == ext:
+            return fmt
+    raise ValueError(f"Unknown result store file type: {path}")
+
+
+def _shared_time(blocks):
+    """Time axis shared by all quantity blocks"""
+    for frame in blocks.values():
+        if not frame.empty:
+            return np.asarray(frame.index, dtype=np.float64)
+    return np.empty(0, dtype=np.float64)
+
+
+def save_run(path_base, blocks, metadata, fmt="npz"):
+    """
+    Save the quantity blocks (dict of name -> DataFrame sharing a time index) of one run.
+    path_base is the output path without extension; returns the written file path.
+    Falls back to npz if the optional library for the requested format is missing.
+    """
+    if fmt not in STORE_FORMATS:
+        raise ValueError(f"Unknown result store format '{fmt}', expected one of {STORE_FORMATS}")
+
+    blocks = {name: frame for name, frame in blocks.items() if not frame.empty}
+    time = _shared_time(blocks)
+    metadata = dict(metadata, quantities=list(blocks))
+
+    if fmt == "parquet":
+        try:
+            return _save_parquet(f"{path_base}.parquet", time, blocks, metadata)
+        except ImportError:
+            logger.warning("pyarrow is not installed, storing results as .npz instead")
+    elif fmt == "hdf5":
+        try:
+            return _save_hdf5(f"{path_base}.h5", time, blocks, metadata)
+        except ImportError:
+            logger.warning("h5py is not installed, storing results as .npz instead")
+    return _save_npz(f"{path_base}.npz", time, blocks, metadata)
+
+
+def _save_npz(path, time, blocks, metadata):
+    """Write an uncompressed .npz so every member can be memory-mapped"""
+    arrays = {"time": time, "metadata": np.array(json.dumps(metadata))}
+    for name, frame in blocks.items():
+        arrays[name] = frame.to_numpy(dtype=np.float32)
+        arrays[f"{name}_columns"] = np.asarray(frame.columns, dtype=str)
+    # Replace rather than overwrite: the old file may be hard-linked (see link_run())
+    tmp_path = f"{path[:-4]}.tmp{os.getpid()}.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def link_run(source, target):
+    """
+    Make target the same stored run as source without writing its data again: a hard
+    link where the file system allows it, a copy otherwise. Returns target.
+    """
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return target
+    tmp_path = f"{target}.tmp{os.getpid()}"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+    return target
+
+
+def _save_parquet(path, time, blocks, metadata):
+    """Write one wide table: TIME plus a <quantity>/<label> column per channel"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = {"TIME": pa.array(time)}
+    layout = {}
+    for name, frame in blocks.items():
+        values = frame.to_numpy(dtype=np.float32)
+        layout[name] = [str(label) for label in frame.columns]
+        for i, label in enumerate(layout[name]):
+            columns[f"{name}/{label}"] = pa.array(values[:, i])
+    table = pa.table(columns)
+    table = table.replace_schema_metadata({"run": json.dumps(dict(metadata, layout=layout))})
+    pq.write_table(table, path)
+    return path
+
+
+def _save_hdf5(path, time, blocks, metadata):
+    """Write one group per quantity with contiguous, uncompressed float32 data"""
+    import h5py
+
+    with h5py.File(path, "w") as f:
+        f.attrs["metadata"] = json.dumps(metadata)
+        f.create_dataset("time", data=time)
+        for name, frame in blocks.items():
+            group = f.create_group(name)
+            group.create_dataset("data", data=frame.to_numpy(dtype=np.float32))
+            group.create_dataset("columns", data=np.asarray(frame.columns, dtype=str).astype("S"))
+    return path
+
+
+def _npz_member_offsets(path):
+    """Map each array in an uncompressed .npz to (dtype, shape, fortran_order, byte offset)"""
+    members = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            # Local file header: 30 fixed bytes, then the file name and extra field
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            members[info.filename[:-len(".npy")]] = (dtype, shape, fortran_order, f.tell())
+    return members
+
+
+class StoredRun:
+    """
+    A stored run opened lazily: only the metadata and time axis are read up front,
+    quantity data is memory-mapped (or read) when first accessed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _format_from_path(path)
+        self._cache = {}
+        if self.format == "npz":
+            self._members = _npz_member_offsets(path)
+            with np.load(path) as archive:
+                self.metadata = json.loads(str(archive["metadata"]))
+                self.time = archive["time"]
+        elif self.format == "parquet":
+            import pyarrow.parquet as pq
+            schema = pq.read_schema(path)
+            self.metadata = json.loads(schema.metadata[b"run"])
+            self._layout = self.metadata.pop("layout")
+            self.time = pq.read_table(path, columns=["TIME"], memory_map=True)["TIME"].to_numpy()
+        else:
+            import h5py
+            with h5py.File(path, "r") as f:
+                self.metadata = json.loads(f.attrs["metadata"])
+                self.time = f["time"][()]
+
+    @property
+    def quantities(self):
+        """Names of the stored quantities"""
+        return list(self.metadata.get("quantities", []))
+
+    def columns(self, quantity):
+        """Channel labels of a quantity"""
+        return self._load(quantity)[1]
+
+    def array(self, quantity):
+        """Raw (time x channels) float32 array of a quantity, memory-mapped where possible"""
+        return self._load(quantity)[0]
+
+    def __getitem__(self, quantity):
+        """Quantity as a DataFrame indexed by time"""
+        import pandas as pd
+
+        values, columns = self._load(quantity)
+        return pd.DataFrame(values, index=pd.Index(self.time), columns=columns, copy=False)
+
+    def __contains__(self, quantity):
+        return quantity in self.quantities
+
+    def _load(self, quantity):
+        if quantity not in self.quantities:
+            raise KeyError(f"{quantity} is not stored in {self.path}")
+        if quantity not in self._cache:
+            loader = {"npz": self._load_npz, "parquet": self._load_parquet, "hdf5": self._load_hdf5}[self.format]
+            self._cache[quantity] = loader(quantity)
+        return self._cache[quantity]
+
+    def _load_npz(self, quantity):
+        with np.load(self.path) as archive:
+            columns = [str(label) for label in archive[f"{quantity}_columns"]]
+            if self._members is None:
+                return archive[quantity], columns
+        dtype, shape, fortran_order, offset = self._members[quantity]
+        values = np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                           order="F" if fortran_order else "C")
+        return values, columns
+
+    def _load_parquet(self, quantity):
+        import pyarrow.parquet as pq
+        labels = self._layout[quantity]
+        table = pq.read_table(self.path, columns=[f"{quantity}/{label}" for label in labels], memory_map=True)
+        values = np.column_stack([column.to_numpy() for column in table.columns])
+        return values, labels
+
+    def _load_hdf5(self, quantity):
+        import h5py
+        with h5py.File(self.path, "r") as f:
+            dataset = f[quantity]["data"]
+            columns = [label.decode() for label in f[quantity]["columns"][()]]
+            offset = dataset.id.get_offset()
+            if offset is None:
+                return dataset[()], columns
+            shape, dtype = dataset.shape, dataset.dtype
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=shape), columns
+
+
+def resample(time, t, values):
+    """Linear interpolation of (t x channels) values onto time, NaN outside the span of t"""
+    if len(t) == len(time) and np.array_equal(t, time):
+        return values
+    i = np.clip(np.searchsorted(t, time, side='right'), 1, len(t) - 1)
+    span = t[i] - t[i - 1]
+    weight = np.divide(time - t[i - 1], span, out=np.zeros_like(time), where=span > 0)
+    resampled = values[i - 1] * (1 - weight)[:, None] + values[i] * weight[:, None]
+    resampled[(time > t[-1]) | (time < t[0])] = np.nan
+    return resampled
+
+
+def load_run(path):
+    """Open a stored run lazily"""
+    return StoredRun(path)
+
+
+def write_csv(blocks, output_path, csv_base):
+    """Write each quantity block to <csv_base>_<quantity>.csv with a TIME column"""
+    paths = []
+    for name, frame in blocks.items():
+        if frame.empty:
+            continue
+        csv_path = f"{output_path}/{csv_base}_{name}.csv"
+        # Reset index to make TIME a column, then rename it
+        csv_frame = frame.reset_index()
+        csv_frame.rename(columns={'index': 'TIME'}, inplace=True)
+        csv_frame.to_csv(csv_path, index=False)
+        logger.info(f"{name} CSV file saved: {csv_path}")
+        paths.append(csv_path)
+    return paths
@@ -0,0 +1,91 @@
+"""
+Load Scenarios
+Finds the load-level variants of a case (e.g. RTS_Esc418MW ... RTS_Esc763MW) and
+repeats sweep jobs across them, so every contingency runs at every load level
+"""
+
+import os
+import re
+import numpy as np
+from loguru import logger
+from case_parser import read_raw
+from contingencies import get_case_raw
+
+SCENARIO_DIR = "../raw_data/scenarios"
+
+# Load level in a scenario file name, e.g. RTS_Esc487MW_RE.raw
+_LOAD_LEVEL = re.compile(r"(\d+)MW")
+
+
+def find_scenarios(case_folder, scenario_dir=SCENARIO_DIR):
+    """
+    Scenario .raw files named like the case's own .raw file at any load level,
+    sorted by load. Returns a list of dicts with name, load_mw and raw path.
+    """
+    raw_path = get_case_raw(case_folder)
+    if raw_path is None:
+        return []
+    match = _LOAD_LEVEL.search(os.path.basename(raw_path))
+    if match is None:
+        logger.warning(f"{raw_path} has no load level in its name, no scenarios for {case_folder}")
+        return []
+
+    name = os.path.basename(raw_path)
+    pattern = re.compile("^" + re.escape(name[:match.start()]) + r"(\d+)MW" + re.escape(name[match.end():]) + "$")
+    scenarios = []
+    for file in sorted(os.listdir(scenario_dir)):
+        file_match = pattern.match(file)
+        if file_match:
+            scenarios.append({
+                "name": os.path.splitext(file)[0],
+                "load_mw": int(file_match.group(1)),
+                "raw": f"{scenario_dir}/{file}",
+            })
+    scenarios.sort(key=lambda scenario: scenario["load_mw"])
+    return scenarios
+
+
+def same_network(raw_path, other_path):
+    """
+    True if two .raw files are variants of the same case: the same buses, branches and
+    transformers, differing only in loading, dispatch and voltages
+    """
+    case, other = read_raw(raw_path), read_raw(other_path)
+    return all(np.array_equal(case[table][fields], other[table][fields]) for table, fields in (
+        ("buses", ["number"]),
+        ("branches", ["from_bus", "to_bus", "ckt"]),
+        ("transformers", ["from_bus", "to_bus", "third_bus", "ckt"]),
+    ))
+
+
+def schedule_scenarios(jobs, scenario_dir=SCENARIO_DIR):
+    """
+    Repeat every job at each load level of its case.
+    The levels of a case are solved in increasing load order (each power flow
+    warm-started from the previous level if it is a variant of the same network,
+    see same_network) before the sweep, so the jobs only
+    restore their level's converted case and the shared dynamics snapshot.
+    """
+    from helpers import get_case_files, get_scenario_snapshots
+
+    prepared = {}
+    expanded = []
+    for job in jobs:
+        case_folder = job["case_folder"]
+        monitor_channels = job.get("early_stop") is not None
+        key = (case_folder, job["channel_option"], monitor_channels)
+        if key not in prepared:
+            scenarios = find_scenarios(case_folder, scenario_dir)
+            _, dyr_file = get_case_files(case_folder)
+            snapshots = get_scenario_snapshots(case_folder, [scenario["raw"] for scenario in scenarios], dyr_file,
+                                               job["channel_option"], monitor_channels) if scenarios else None
+            if snapshots is None:
+                logger.error(f"No load scenarios prepared for {case_folder}, its jobs are skipped")
+                prepared[key] = []
+            else:
+                prepared[key] = [dict(scenario, snapshot=snapshot) for scenario, snapshot in zip(scenarios, snapshots)]
+                levels = ", ".join(f"{scenario['load_mw']} MW" for scenario in scenarios)
+                logger.info(f"{case_folder}: {len(scenarios)} load levels ({levels})")
+        for scenario in prepared[key]:
+            expanded.append(dict(job, scenario=scenario))
+    return expanded
@@ -0,0 +1,234 @@
+"""
+Parameter Sensitivity Runner
+Runs a case many times with dynamic model parameters (GENROU inertia H, SCRX gain K,
+TGOV1 droop R, ...) drawn from a grid or a Latin hypercube. Samples are applied in
+memory on the restored snapshot (change_plmod_con) or through generated .dyr variants,
+run in parallel across workers, and collected into one array-backed result set
+(samples x time x channels per quantity) plus a metrics table.
+
+    python sensitivity.py case_NRE --param GENROU.H=3,4.5,6 --param SCRX.K=100,400
+    python sensitivity.py case_RE --param GENROU@1.H=2:8 --param TGOV1.R=0.03:0.08 --lhs 40 --workers 4
+    python sensitivity.py case_RE --param SCRX.K=100:900 --lhs 10 --method dyr
+"""
+
+import argparse
+import itertools
+import os
+import re
+import numpy as np
+import pandas as pd
+from loguru import logger
+from case_parser import read_dyr, write_dyr_variant
+from metrics import compute_metrics, run_from_frames, run_from_store, stack_runs
+from sweep import run_sweep
+
+QUANTITIES = ("POWR", "FREQ", "VOLT", "SPEED")
+
+# Names of the constants (CONs, in PSS/E order) of the models found in the case .dyr files
+MODEL_PARAMETERS = {
+    "GENROU": ["Tdo'", "Tdo''", "Tqo'", "Tqo''", "H", "D", "Xd", "Xq", "Xd'", "Xq'", "Xd''", "Xl", "S1.0", "S1.2"],
+    "GENSAL": ["Tdo'", "Tdo''", "Tqo''", "H", "D", "Xd", "Xq", "Xd'", "Xd''", "Xl", "S1.0", "S1.2"],
+    "SCRX": ["TA/TB", "TB", "K", "TE", "EMIN", "EMAX", "CSWITCH", "rc/rfd"],
+    "IEEET1": ["TR", "KA", "TA", "VRMAX", "VRMIN", "KE", "TE", "KF", "TF", "SWITCH", "E1", "SE(E1)", "E2", "SE(E2)"],
+    "TGOV1": ["R", "T1", "VMAX", "VMIN", "T2", "T3", "Dt"],
+    "GAST": ["R", "T1", "T2", "T3", "AT", "KT", "VMAX", "VMIN", "Dturb"],
+    "STAB1": ["K/T", "T", "T1/T3", "T3", "T2/T4", "T4", "HLIM"],
+}
+
+# MODEL[@BUS[:ID]].PARAMETER=VALUES, e.g. GENROU.H=3,4,5 or GENROU@1.H=2:8
+_PARAMETER = re.compile(r"^(?P<model>\w+)(?:@(?P<bus>\d+)(?::(?P<id>\w+))?)?\.(?P<name>[^=]+)=(?P<values>.+)$")
+
+VARIANT_DIR = "variants"  # generated .dyr variants, inside the case folder
+
+# Result sets are kept out of results/, whose files are all single stored runs
+STUDY_DIR = "studies/sensitivity"
+
+
+def parse_parameter(text):
+    """
+    Parse a parameter spec "MODEL[@BUS[:ID]].NAME=VALUES" into a dict. VALUES is a
+    comma separated list (grid) or low:high (Latin hypercube range). NAME is a CON
+    name from MODEL_PARAMETERS or a 0-based CON index.
+    """
+    match = _PARAMETER.match(text.strip())
+    if match is None:
+        raise ValueError(f"Invalid parameter {text!r}, expected MODEL[@BUS[:ID]].NAME=VALUES")
+    model = match["model"].upper()
+    name = match["name"]
+    if name.isdigit():
+        index = int(name)
+    elif name in MODEL_PARAMETERS.get(model, []):
+        index = MODEL_PARAMETERS[model].index(name)
+    else:
+        raise ValueError(f"Unknown parameter {name!r} of {model}, use one of {MODEL_PARAMETERS.get(model)} or a CON index")
+
+    spec = {"label": text.split("=", 1)[0].strip(), "model": model, "index": index,
+            "bus": int(match["bus"]) if match["bus"] else None, "id": match["id"]}
+    values = match["values"]
+    if ":" in values:
+        low, high = (float(value) for value in values.split(":", 1))
+        spec["range"] = (low, high)
+    else:
+        spec["values"] = [float(value) for value in values.split(",")]
+    return spec
+
+
+def grid_samples(specs):
+    """Every combination of the listed parameter values as a (samples x parameters) array"""
+    return np.array(list(itertools.product(*(spec["values"] for spec in specs))), dtype=np.float64)
+
+
+def latin_hypercube(specs, n, seed=None):
+    """
+    n samples of the parameter ranges by Latin hypercube: every range is cut into n
+    equal strata and each stratum is sampled exactly once. Specs given as value lists
+    are sampled from those values instead. Returns a (samples x parameters) array.
+    """
+    rng = np.random.default_rng(seed)
+    strata = (rng.permuted(np.tile(np.arange(n), (len(specs), 1)), axis=1).T + rng.random((n, len(specs)))) / n
+    samples = np.empty((n, len(specs)))
+    for j, spec in enumerate(specs):
+        if "range" in spec:
+            low, high = spec["range"]
+            samples[:, j] = low + strata[:, j] * (high - low)
+        else:
+            values = np.asarray(spec["values"], dtype=np.float64)
+            samples[:, j] = values[np.minimum((strata[:, j] * len(values)).astype(int), len(values) - 1)]
+    return samples
+
+
+def parameter_targets(dyr_path, spec):
+    """(bus, id) of every machine in the .dyr file using the spec's model (at the spec's bus and id, if given)"""
+    records = read_dyr(dyr_path).get(spec["model"])
+    if records is None:
+        raise ValueError(f"No {spec['model']} model in {dyr_path}")
+    targets = [(int(bus), str(device_id)) for bus, device_id in zip(records["bus"], records["id"])
+               if (spec["bus"] is None or bus == spec["bus"]) and (spec["id"] is None or device_id == spec["id"])]
+    if not targets:
+        raise ValueError(f"{spec['label']} matches no machine in {dyr_path}")
+    return targets
+
+
+def build_samples(case_folder, specs, samples, method="memory", study="study"):
+    """
+    One sample dict per row of samples (name, values, changes and, for the "dyr"
+    method, the generated dyr_file) to pass to run_case_simulation(sample=...)
+    """
+    from helpers import get_case_files
+
+    _, dyr_file = get_case_files(case_folder)
+    if dyr_file is None:
+        raise ValueError(f"No .dyr file found in {case_folder}")
+    dyr_path = f"case_data/{case_folder}/{dyr_file}"
+    targets = [parameter_targets(dyr_path, spec) for spec in specs]
+
+    if method == "dyr":
+        os.makedirs(f"case_data/{case_folder}/{VARIANT_DIR}", exist_ok=True)
+
+    result = []
+    for i, row in enumerate(samples):
+        changes = [(spec["model"], bus, device_id, spec["index"], float(value))
+                   for spec, machines, value in zip(specs, targets, row) for bus, device_id in machines]
+        sample = {"name": f"{study}_s{i:03d}", "values": {spec["label"]: float(value) for spec, value in zip(specs, row)},
+                  "changes": changes}
+        if method == "dyr":
+            sample["dyr_file"] = f"{VARIANT_DIR}/{sample['name']}.dyr"
+            write_dyr_variant(dyr_path, f"case_data/{case_folder}/{sample['dyr_file']}",
+                              {(bus, model, device_id, index): value for model, bus, device_id, index, value in changes})
+        result.append(sample)
+    return result
+
+
+def aggregate(records, samples):
+    """
+    Collect the results of a study into one array-backed result set: for every quantity
+    a (samples x time x channels) array (NaN for failed samples) and its channel labels,
+    the common time axis, the sample matrix and the per-sample status
+    """
+    by_name = {record["sample"]["name"]: record for record in records}
+    runs = []
+    for sample in samples:
+        record = by_name.get(sample["name"])
+        if record is not None and record["status"] == "ok" and record["results"] is None:
+            runs.append(dict(run_from_store(record["path"]), id=sample["name"], metadata=dict(sample["values"])))
+        else:
+            frames = dict(zip(QUANTITIES, record["results"])) if record is not None and record["status"] == "ok" else {}
+            runs.append(run_from_frames(sample["name"], frames, sample["values"]))
+
+    result = {
+        "sample_names": np.array([sample["name"] for sample in samples]),
+        "parameters": np.array(list(samples[0]["values"])),
+        "samples": np.array([list(sample["values"].values()) for sample in samples], dtype=np.float64),
+        "status": np.array([by_name[sample["name"]]["status"] if sample["name"] in by_name else "missing"
+                            for sample in samples]),
+    }
+    for quantity in QUANTITIES:
+        if any(quantity in run["blocks"] for run in runs):
+            time, values, columns = stack_runs(runs, quantity)
+            result["time"] = time
+            result[quantity] = values
+            result[f"{quantity}_columns"] = np.array(columns)
+    return result, runs
+
+
+def run_study(case_folder, specs, samples, method="memory", study="study", workers=1, disturbance_type="line_fault",
+              channel_option="All", runtime=20, **options):
+    """
+    Run every sample of a study and return (result set, metrics table), see aggregate()
+    and metrics.compute_metrics(). Extra options are passed to run_case_simulation.
+    """
+    sample_list = build_samples(case_folder, specs, samples, method, study)
+    logger.info(f"Sensitivity study {study} of {case_folder}: {len(sample_list)} samples of "
+                f"{', '.join(spec['label'] for spec in specs)} ({method})")
+    jobs = [{"case_folder": case_folder, "disturbance_type": disturbance_type, "channel_option": channel_option,
+             "runtime": runtime, "sample": sample, **options} for sample in sample_list]
+    # Samples are read back from their stored runs; keep the frames only if nothing is stored
+    records = run_sweep(jobs, workers=workers, keep_results=options.get("result_format", "npz") is None)
+
+    result, runs = aggregate(records, sample_list)
+    ran = [run for run in runs if run["blocks"]]
+    table = compute_metrics(ran) if ran else pd.DataFrame()
+    return result, table
+
+
+def save_study(result, table, path):
+    """Save the result set (.npz) and its metrics table (CSV next to it)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, **result)
+    table.to_csv(f"{os.path.splitext(path)[0]}_metrics.csv", index_label="sample")
+    logger.success(f"Sensitivity results saved: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dynamic parameter sensitivity / Monte Carlo runner")
+    parser.add_argument("case_folder")
+    parser.add_argument("--param", dest="params", action="append", required=True, type=parse_parameter,
+                        help="MODEL[@BUS[:ID]].NAME=v1,v2,... (grid) or =low:high (with --lhs), repeatable")
+    parser.add_argument("--lhs", type=int, metavar="N", help="draw N Latin hypercube samples instead of the full grid")
+    parser.add_argument("--seed", type=int, help="random seed of the Latin hypercube")
+    parser.add_argument("--method", choices=["memory", "dyr"], default="memory",
+                        help="change the constants on the restored snapshot, or generate .dyr variants")
+    parser.add_argument("--study", default="study", help="name of the study (prefix of the sample names)")
+    parser.add_argument("--disturbance", default="line_fault", help="disturbance type")
+    parser.add_argument("--runtime", type=float, default=20, help="simulated time (s)")
+    parser.add_argument("--channels", default="All", help="channel option, see channel_selection.py")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel PSS/E worker processes")
+    parser.add_argument("--out", help=f"result set (default: {STUDY_DIR}/<case>_<study>.npz)")
+    args = parser.parse_args()
+
+    if args.lhs is None:
+        ranged = [spec["label"] for spec in args.params if "range" in spec]
+        if ranged:
+            parser.error(f"ranges need --lhs: {', '.join(ranged)}")
+        samples = grid_samples(args.params)
+    else:
+        samples = latin_hypercube(args.params, args.lhs, args.seed)
+
+    result, table = run_study(args.case_folder, args.params, samples, method=args.method, study=args.study,
+                              workers=args.workers, disturbance_type=args.disturbance,
+                              channel_option=args.channels, runtime=args.runtime)
+    save_study(result, table, args.out or f"{STUDY_DIR}/{args.case_folder}_{args.study}.npz")
+
+
+if __name__ == "__main__":
+    main()
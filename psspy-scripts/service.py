@@ -0,0 +1,277 @@
+"""
+Sweep Service
+A long-lived pool of PSS/E worker processes that keeps its sessions warm and
+accepts simulation jobs over a local socket (multiprocessing.connection), so
+scheduling a job costs a message round trip instead of a PSS/E start-up.
+Status and result records are streamed back to the caller as jobs finish.
+
+    python service.py --workers 4                  # start the service
+    python main.py --service localhost:6010        # run a sweep on it
+    python service.py --backend fake               # fake PSS/E backend, no PSS/E needed
+
+Messages are tuples; the client sends ("submit", jobs), ("ping",) or ("shutdown",)
+and receives ("queued", i, label) per job, ("result", i, record) as each job
+finishes and ("done", succeeded, failed) at the end of a submission.
+
+Messages are pickled, so connections are authenticated with a shared key: the
+PSSPY_SERVICE_KEY environment variable, or else a random key the service writes
+to ~/.psspy_service_key (readable only by its owner) and clients read from there.
+"""
+
+import argparse
+import os
+import secrets
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+from loguru import logger
+import sweep
+from helpers import BACKENDS, backend_name, use_backend
+from sweep import job_label, log_record
+
+DEFAULT_ADDRESS = ("localhost", 6010)
+AUTHKEY_ENV = "PSSPY_SERVICE_KEY"
+KEY_FILE_ENV = "PSSPY_SERVICE_KEY_FILE"
+KEY_FILE = os.path.join(os.path.expanduser("~"), ".psspy_service_key")
+
+# Seconds a new connection gets to complete the key handshake
+HANDSHAKE_TIMEOUT = 10.0
+
+
+def parse_address(text):
+    """'host:port' (or just 'port') to a (host, port) address"""
+    host, _, port = text.rpartition(":")
+    return host or DEFAULT_ADDRESS[0], int(port)
+
+
+def key_file():
+    """Path of the service key file ($PSSPY_SERVICE_KEY_FILE or ~/.psspy_service_key)"""
+    return os.environ.get(KEY_FILE_ENV) or KEY_FILE
+
+
+def _authkey(authkey=None, create=False):
+    """
+    Connection key: the argument, $PSSPY_SERVICE_KEY or the key file. With create (the
+    service) a missing key file is created with a random key, readable only by the user.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV)
+    if authkey is None:
+        path = key_file()
+        if create and not os.path.exists(path):
+            with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+                f.write(secrets.token_hex(32))
+            logger.info(f"Service key written to {path}")
+        if not os.path.exists(path):
+            raise RuntimeError(f"No service key: set {AUTHKEY_ENV} or start the service to create {path}")
+        if os.name == "posix" and os.stat(path).st_mode & 0o077:
+            raise RuntimeError(f"Service key file {path} is accessible by other users, restrict it with chmod 600")
+        with open(path) as f:
+            authkey = f.read().strip()
+    if not authkey:
+        raise RuntimeError("The service key is empty")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class _Deadline:
+    """Connection whose reads fail with TimeoutError once no data arrives before a deadline"""
+
+    def __init__(self, conn, timeout):
+        self._conn = conn
+        self._timeout = timeout
+
+    def send_bytes(self, data):
+        self._conn.send_bytes(data)
+
+    def recv_bytes(self, maxlength=None):
+        if not self._conn.poll(self._timeout):
+            raise TimeoutError("no answer to the key handshake")
+        return self._conn.recv_bytes(maxlength)
+
+
+def _handshake(conn, authkey, timeout=HANDSHAKE_TIMEOUT):
+    """Server side of the multiprocessing.connection key handshake (as Listener.accept does it), with a timeout"""
+    conn = _Deadline(conn, timeout)
+    deliver_challenge(conn, authkey)
+    answer_challenge(conn, authkey)
+
+
+class SweepService:
+    """Worker pool plus socket listener; each client connection is served by its own thread"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, workers=1, authkey=None, backend=None, scratch_root="scratch"):
+        self.address = address
+        self.workers = workers
+        self.authkey = _authkey(authkey, create=True)
+        self.backend = backend
+        self.scratch_root = scratch_root
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def serve_forever(self):
+        """Start the workers (each initializes PSS/E once) and serve clients until a shutdown request"""
+        if self.backend is not None:
+            use_backend(self.backend)  # inherited by the worker processes
+        self._pool = self._new_pool()
+        try:
+            # The handshake runs in each connection's thread, so a client that fails or
+            # stalls it cannot stop the accept loop or hold up other clients
+            with Listener(self.address) as listener:
+                logger.info(f"Sweep service listening on {self.address[0]}:{self.address[1]} "
+                            f"({self.workers} {backend_name()} workers)")
+                while not self._stopping.is_set():
+                    try:
+                        conn = listener.accept()
+                    except OSError as e:
+                        logger.warning(f"Failed to accept a connection: {e}")
+                        continue
+                    threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+        logger.info("Sweep service stopped")
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=sweep._init_worker,
+                                   initargs=(self.scratch_root,))
+
+    def _replace_broken_pool(self, pool):
+        """Start a new pool after a worker died and broke pool (once, whichever client notices first)"""
+        with self._pool_lock:
+            if self._pool is pool:
+                logger.warning("A worker process died, restarting the worker pool")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+            return self._pool
+
+    def _submit(self, job):
+        """Queue a job on the current pool, returning (future, pool)"""
+        pool = self._pool
+        try:
+            return pool.submit(sweep._run_job_in_worker, job), pool
+        except BrokenProcessPool:
+            pool = self._replace_broken_pool(pool)
+            return pool.submit(sweep._run_job_in_worker, job), pool
+
+    def _serve_client(self, conn):
+        with conn:
+            try:
+                _handshake(conn, self.authkey)
+            except (AuthenticationError, TimeoutError, EOFError, OSError) as e:
+                if not self._stopping.is_set():
+                    logger.warning(f"Rejected connection: {e or type(e).__name__}")
+                return
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if message[0] == "submit":
+                    self._run_submission(conn, message[1])
+                elif message[0] == "ping":
+                    conn.send(("pong", self.workers, backend_name()))
+                elif message[0] == "shutdown":
+                    conn.send(("bye",))
+                    self._shutdown()
+                    return
+                else:
+                    conn.send(("error", f"unknown request {message[0]!r}"))
+
+    def _run_submission(self, conn, jobs):
+        """Queue the jobs on the shared pool and stream their records back in completion order"""
+        futures = {}
+        for i, job in enumerate(jobs):
+            future, pool = self._submit(job)
+            futures[future] = i, pool
+            conn.send(("queued", i, job_label(job)))
+
+        failed = 0
+        for future in as_completed(futures):
+            i, pool = futures[future]
+            try:
+                record = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. PSS/E crashed): every job still on that pool fails, later ones get a new pool
+                self._replace_broken_pool(pool)
+                record = dict(jobs[i], status="failed", error=str(e) or "worker process died", path=None,
+                              results=None, elapsed=0.0)
+            except Exception as e:
+                record = dict(jobs[i], status="failed", error=str(e), path=None, results=None, elapsed=0.0)
+            failed += record["status"] != "ok"
+            log_record(record)
+            try:
+                conn.send(("result", i, record))
+            except OSError:
+                logger.warning("Client disconnected, remaining results of its submission are dropped")
+                return
+        conn.send(("done", len(jobs) - failed, failed))
+
+    def _shutdown(self):
+        self._stopping.set()
+        # Wake the listener blocked in accept()
+        try:
+            socket.create_connection(self.address, timeout=HANDSHAKE_TIMEOUT).close()
+        except OSError:
+            pass
+
+
+def submit_jobs(jobs, address=DEFAULT_ADDRESS, authkey=None):
+    """Send jobs to a running service and yield its messages as they arrive, up to ("done", ...)"""
+    with Client(address, authkey=_authkey(authkey)) as conn:
+        conn.send(("submit", list(jobs)))
+        while True:
+            message = conn.recv()
+            yield message
+            if message[0] in ("done", "error"):
+                return
+
+
+def run_remote(jobs, address=DEFAULT_ADDRESS, authkey=None, on_result=None):
+    """
+    Run jobs on a running service; a drop-in for sweep.run_sweep that returns the
+    result records in completion order and calls on_result(record) as each arrives
+    """
+    records = []
+    for message in submit_jobs(jobs, address, authkey):
+        if message[0] == "result":
+            record = message[2]
+            log_record(record)
+            records.append(record)
+            if on_result is not None:
+                on_result(record)
+        elif message[0] == "done":
+            logger.info(f"Sweep finished on service: {message[1]} succeeded, {message[2]} failed")
+        elif message[0] == "error":
+            logger.error(f"Service error: {message[1]}")
+    return records
+
+
+def request(message, address=DEFAULT_ADDRESS, authkey=None):
+    """Send a single control message (("ping",) or ("shutdown",)) and return the reply"""
+    with Client(address, authkey=_authkey(authkey)) as conn:
+        conn.send(message)
+        return conn.recv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve simulation jobs from a pool of warm PSS/E workers")
+    parser.add_argument("--address", type=parse_address, default=DEFAULT_ADDRESS, help="host:port (default localhost:6010)")
+    parser.add_argument("--workers", type=int, default=1, help="number of PSS/E worker processes")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="simulation backend of the workers (default: psse or $PSSPY_BACKEND)")
+    parser.add_argument("--ping", action="store_true", help="check a running service and exit")
+    parser.add_argument("--shutdown", action="store_true", help="stop a running service and exit")
+    args = parser.parse_args()
+
+    if args.ping or args.shutdown:
+        reply = request(("ping",) if args.ping else ("shutdown",), args.address)
+        logger.info(f"Service replied: {reply}")
+        return
+    SweepService(args.address, workers=args.workers, backend=args.backend).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
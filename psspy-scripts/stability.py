@@ -0,0 +1,92 @@
+"""
+Stability Monitor
+Classifies a dynamic run from the latest channel values at the end of each run
+segment, so a run can stop early once it is clearly unstable or has settled
+"""
+
+from collections import deque
+import numpy as np
+
+STABLE = "stable"
+UNSTABLE = "unstable"
+SETTLED = "settled"
+
+
+class StabilityMonitor:
+    """
+    Tracks machine speed deviations (p.u.), rotor angles (degrees) and bus voltages (p.u.).
+
+    A run is unstable when the rotor angle spread or a speed deviation exceeds its
+    limit, or a bus voltage stays outside [v_min, v_max] for longer than
+    v_violation_time. It is settled when, over the last settle_window seconds after
+    the disturbance, no speed deviation moved more than speed_tolerance and no
+    voltage more than voltage_tolerance. Otherwise it is stable at the end of the run.
+    """
+
+    def __init__(self, start_time=1.0, interval=0.1, max_angle_spread=180.0, max_speed_deviation=0.05,
+                 v_min=0.7, v_max=1.3, v_violation_time=1.0, settle_window=3.0,
+                 speed_tolerance=1e-4, voltage_tolerance=1e-3):
+        self.start_time = start_time
+        self.interval = interval
+        self.max_angle_spread = max_angle_spread
+        self.max_speed_deviation = max_speed_deviation
+        self.v_min = v_min
+        self.v_max = v_max
+        self.v_violation_time = v_violation_time
+        self.settle_window = settle_window
+        self.speed_tolerance = speed_tolerance
+        self.voltage_tolerance = voltage_tolerance
+
+        self.status = None
+        self.stop_time = None
+        self.reason = None
+        self._violation_since = None
+        self._history = deque()
+
+    def _stop(self, status, time, reason):
+        self.status, self.stop_time, self.reason = status, time, reason
+        return status
+
+    def update(self, time, speed_deviation=(), angle=(), voltage=()):
+        """Check the values at a segment boundary; returns UNSTABLE or SETTLED to stop, else None"""
+        speed_deviation = np.asarray(speed_deviation, dtype=np.float64)
+        angle = np.asarray(angle, dtype=np.float64)
+        voltage = np.asarray(voltage, dtype=np.float64)
+
+        if not (np.all(np.isfinite(speed_deviation)) and np.all(np.isfinite(angle)) and np.all(np.isfinite(voltage))):
+            return self._stop(UNSTABLE, time, "non-finite channel values")
+        if angle.size > 1 and np.ptp(angle) > self.max_angle_spread:
+            return self._stop(UNSTABLE, time, f"rotor angle spread {np.ptp(angle):.1f} deg")
+        if speed_deviation.size and np.max(np.abs(speed_deviation)) > self.max_speed_deviation:
+            return self._stop(UNSTABLE, time, f"speed deviation {np.max(np.abs(speed_deviation)):.4f} p.u.")
+
+        if voltage.size and (np.min(voltage) < self.v_min or np.max(voltage) > self.v_max):
+            if self._violation_since is None:
+                self._violation_since = time
+            elif time - self._violation_since >= self.v_violation_time:
+                return self._stop(UNSTABLE, time, f"voltage outside [{self.v_min}, {self.v_max}] p.u.")
+        else:
+            self._violation_since = None
+
+        if time <= self.start_time:
+            return None
+
+        # Settling: every channel stayed within tolerance over the trailing window
+        self._history.append((time, speed_deviation, voltage))
+        while len(self._history) > 1 and time - self._history[1][0] >= self.settle_window:
+            self._history.popleft()
+        if time - self._history[0][0] < self.settle_window:
+            return None
+        speeds = np.array([entry[1] for entry in self._history])
+        voltages = np.array([entry[2] for entry in self._history])
+        speed_moved = np.max(np.ptp(speeds, axis=0)) if speeds.size else 0.0
+        voltage_moved = np.max(np.ptp(voltages, axis=0)) if voltages.size else 0.0
+        if speed_moved < self.speed_tolerance and voltage_moved < self.voltage_tolerance:
+            return self._stop(SETTLED, time, f"settled over the last {self.settle_window} s")
+        return None
+
+    def finish(self, time):
+        """Classification when the run reached its full runtime"""
+        if self.status is None:
+            self._stop(STABLE, time, "reached the end of the run")
+        return self.status
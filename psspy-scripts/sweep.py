@@ -0,0 +1,130 @@
+"""
+Parallel Sweep Executor
+Runs (contingency, case) simulation jobs across a pool of worker processes,
+each owning its own PSS/E session and scratch folder for channel files
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from loguru import logger
+import profiling
+
+# Scratch folder of the current worker process (set by _init_worker)
+_worker_scratch_dir = None
+
+
+def build_jobs(contingencies, cases, channel_option="All", runtime=20, **options):
+    """
+    Expand every (contingency, case) pair into a simulation job.
+    Extra options are passed through to run_case_simulation for every job.
+    """
+    jobs = []
+    for contingency in contingencies:
+        for case in cases:
+            jobs.append({
+                "case_folder": case,
+                "disturbance_type": contingency["type"],
+                "channel_option": channel_option,
+                "runtime": runtime,
+                **options,
+            })
+    return jobs
+
+
+def job_label(job):
+    """Short human readable name for a job"""
+    case = job['case_folder']
+    if job.get("scenario") is not None:
+        case = f"{case}@{job['scenario']['name']}"
+    if job.get("sample") is not None:
+        case = f"{case}#{job['sample']['name']}"
+    if job.get("contingency") is not None:
+        return f"{job['contingency']['name']}/{case}"
+    return f"{job['disturbance_type']}/{case}"
+
+
+def log_record(record):
+    """Log the outcome of a finished job"""
+    if record["status"] == "ok":
+        logger.success(f"[{job_label(record)}] finished in {record['elapsed']:.2f} seconds")
+    else:
+        logger.error(f"[{job_label(record)}] failed: {record['error']}")
+
+
+def run_job(job, scratch_dir=None, keep_results=False):
+    """
+    Run a single job and return a result record; failures are recorded, never raised.
+    The record carries the path of the stored run, and its result frames only with
+    keep_results, so records stay small when sent back from workers and collected.
+    """
+    from helpers import run_case_simulation, stored_run_path
+
+    record = dict(job, status="failed", error=None, path=None, results=None, elapsed=0.0)
+    t0 = time.time()
+    try:
+        with profiling.tagged(job=job_label(job)), profiling.phase("job"):
+            results = run_case_simulation(**job, scratch_dir=scratch_dir)
+        profiling.flush_counters(job=job_label(job))
+        if results is not None:
+            record["status"] = "ok"
+            record["path"] = stored_run_path(**job)
+            if keep_results:
+                record["results"] = results
+        else:
+            record["error"] = "simulation failed, see log for details"
+    except Exception as e:
+        record["error"] = str(e)
+    record["elapsed"] = time.time() - t0
+    return record
+
+
+def _init_worker(scratch_root):
+    """Start a private PSS/E session and scratch folder for this worker process"""
+    global _worker_scratch_dir
+    import helpers
+    helpers.init_psse(200000)
+
+    _worker_scratch_dir = os.path.join(scratch_root, f"worker_{os.getpid()}")
+    os.makedirs(_worker_scratch_dir, exist_ok=True)
+
+
+def _run_job_in_worker(job, keep_results=False):
+    """Pool entry point: run a job using the worker's scratch folder"""
+    return run_job(job, scratch_dir=_worker_scratch_dir, keep_results=keep_results)
+
+
+def run_sweep(jobs, workers=1, scratch_root="scratch", on_result=None, keep_results=False):
+    """
+    Run all jobs and return their result records in completion order.
+    With workers > 1 jobs are distributed over a process pool; a failed job
+    does not stop the others. on_result(record) is called as each job finishes.
+    Records hold the stored run path; keep_results also keeps every result frame.
+    """
+    records = []
+
+    def collect(record):
+        log_record(record)
+        records.append(record)
+        if on_result is not None:
+            on_result(record)
+
+    if workers <= 1:
+        for job in jobs:
+            collect(run_job(job, keep_results=keep_results))
+    else:
+        logger.info(f"Running {len(jobs)} jobs on {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(scratch_root,)) as pool:
+            futures = {pool.submit(_run_job_in_worker, job, keep_results): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. PSS/E crashed); keep going with the rest
+                    record = dict(job, status="failed", error=str(e), path=None, results=None, elapsed=0.0)
+                collect(record)
+
+    failed = sum(1 for record in records if record["status"] != "ok")
+    logger.info(f"Sweep finished: {len(records) - failed} succeeded, {failed} failed")
+    return records
@@ -0,0 +1,26 @@
+import os
+import shutil
+import sys
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scripts are flat modules imported from the psspy-scripts folder
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    A private copy of case_data as the working directory (results/, cache/ and scratch/
+    are created there) with the fake backend synthesizing runs, no PSS/E needed.
+    Returns the workspace path.
+    """
+    shutil.copytree(os.path.join(SCRIPTS_DIR, "case_data"), tmp_path / "case_data",
+                    ignore=shutil.ignore_patterns("*.npz", "variants"))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PSSPY_BACKEND", "fake")
+    monkeypatch.setenv("PSSPY_FAKE_REPLAY", "")
+    monkeypatch.delenv("PSSPY_SERVICE_KEY", raising=False)
+    monkeypatch.setenv("PSSPY_SERVICE_KEY_FILE", str(tmp_path / "service_key"))
+    return tmp_path
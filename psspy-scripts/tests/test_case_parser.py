@@ -0,0 +1,40 @@
+"""
+.raw parser tests: the revision 31 bus layout (GL/BL in the bus record) parses to
+the same bus table as the revision 33 case, and other revisions are rejected.
+"""
+
+import os
+import numpy as np
+import pytest
+from case_parser import parse_raw
+
+RAW_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "case_data", "case_NRE", "RTS_Esc487MW.raw")
+
+
+def _rewrite(tmp_path, revision, bus_line=None):
+    """The case with another REV field, and bus records rewritten by bus_line(fields)"""
+    with open(RAW_PATH) as f:
+        lines = f.read().splitlines()
+    lines[0] = lines[0].replace(", 33,", f", {revision},", 1)
+    end = next(i for i, line in enumerate(lines) if "END OF BUS DATA" in line)
+    if bus_line is not None:
+        lines[3:end] = [bus_line(line.split(",")) for line in lines[3:end]]
+    path = tmp_path / f"rev{revision}.raw"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_revision_31_bus_layout(tmp_path):
+    # rev 33: I, NAME, BASKV, IDE, AREA, ZONE, OWNER, VM, VA, ...; rev 31: I, NAME, BASKV, IDE, GL, BL, AREA, ZONE, VM, VA, OWNER
+    path = _rewrite(tmp_path, 31, lambda f: ",".join(f[:4] + ["0.000", "-0.500"] + f[4:6] + f[7:9] + [f[6]]))
+    expected = parse_raw(RAW_PATH)
+    case = parse_raw(path)
+    np.testing.assert_array_equal(case["buses"], expected["buses"])
+    np.testing.assert_array_equal(case["generators"], expected["generators"])
+
+
+@pytest.mark.parametrize("revision", [30, 34])
+def test_unsupported_revision_is_rejected(tmp_path, revision):
+    with pytest.raises(ValueError, match=f"revision {revision}"):
+        parse_raw(_rewrite(tmp_path, revision))
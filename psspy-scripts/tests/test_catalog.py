@@ -0,0 +1,41 @@
+"""
+Catalog tests: runs are found by the paths a sweep reports however those are
+spelled, and trace queries over many runs stay within SQLite's variable limit.
+"""
+
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from catalog import Catalog
+from result_store import save_run
+
+TIME = np.arange(0.0, 1.0, 0.1)
+
+
+@pytest.fixture
+def catalog(workspace):
+    """A catalog of three stored runs of case_NRE, one per contingency"""
+    for i in range(3):
+        os.makedirs(f"results/trip_{i}/case_NRE")
+        frame = pd.DataFrame({"BUS1": np.full(len(TIME), 1.0 - 0.01 * i)}, index=TIME)
+        save_run(f"results/trip_{i}/case_NRE/case_NRE_outage_All_1s", {"VOLT": frame},
+                 {"case": "case_NRE", "contingency": f"trip_{i}", "disturbance": "outage", "runtime": 1})
+    with Catalog() as catalog:
+        catalog.update()
+        yield catalog
+
+
+def test_find_by_path_in_any_spelling(catalog):
+    runs = catalog.find(path=["results/trip_0/case_NRE/case_NRE_outage_All_1s.npz",
+                              "./results/trip_2/case_NRE/../case_NRE/case_NRE_outage_All_1s.npz"])
+    assert [run["contingency"] for run in runs] == ["trip_0", "trip_2"]
+    assert catalog.find(path=[]) == []
+
+
+def test_traces_bind_run_ids_as_one_parameter(catalog):
+    catalog._db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 2)
+    traces = catalog.traces("VOLT")
+    assert traces.shape == (3, len(TIME), 1)
+    np.testing.assert_allclose(traces[2][:, 0], 0.98, rtol=1e-6)
@@ -0,0 +1,39 @@
+"""
+Channel file reading tests on the fake backend: read_channel_data goes through the
+backend's dyntools and keeps only the selected channels. These cannot show anything
+about files written by PSS/E, which are only read through its own dyntools.
+"""
+
+import numpy as np
+import helpers
+from channel_file import read_channel_data
+
+
+def _channel_file(tmp_path):
+    """A 3-channel file with 50 steps in the fake backend's layout; returns (path, time, values)"""
+    helpers.load_psse()
+    from fake_channel_file import write_channel_header, write_channel_records
+    time = np.linspace(0.0, 0.49, 50)
+    values = np.column_stack([np.sin(time), np.cos(time), time ** 2]).astype(np.float32)
+    path = str(tmp_path / "run.outx")
+    with open(path, "wb") as f:
+        write_channel_header(f, {1: "VOLT 1 [BUS1 345.00]", 2: "VOLT 2 [BUS2 345.00]", 3: "SPD 1[BUS1 1]"}, 3,
+                             ("IEEE 9 bus", "test"))
+        write_channel_records(f, time, values)
+    return path, time, values
+
+
+def test_reads_through_the_backend_dyntools(workspace):
+    path, time, values = _channel_file(workspace)
+    title, identifiers, data = read_channel_data(path)
+    assert title == "IEEE 9 bus\ntest"
+    assert identifiers == {0: "Time(s)", 1: "VOLT 1 [BUS1 345.00]", 2: "VOLT 2 [BUS2 345.00]", 3: "SPD 1[BUS1 1]"}
+    np.testing.assert_allclose(data["time"], time, rtol=1e-6)
+    np.testing.assert_array_equal(np.column_stack([data[channel] for channel in (1, 2, 3)]), values)
+
+
+def test_selected_channels_only(workspace):
+    path, _, values = _channel_file(workspace)
+    _, identifiers, data = read_channel_data(path, channels=[3])
+    assert sorted(identifiers) == [0, 3] and sorted(data, key=str) == [3, "time"]
+    np.testing.assert_array_equal(data[3], values[:, 2])
@@ -0,0 +1,60 @@
+"""
+PSS/E vs Sienna comparison tests on a synthetic pair: matching trajectories pass
+every tolerance, SPEED included (stored PSS/E speed is absolute, the Sienna export
+the deviation ω - 1), and a real difference is reported as an outlier.
+"""
+
+import numpy as np
+import pandas as pd
+from catalog import Catalog
+from comparison import compare_all
+from result_store import save_run
+
+TIME = np.round(np.arange(0.0, 5.0, 0.01), 10)
+SWING = np.where(TIME >= 1.0, 0.002 * np.exp(-(TIME - 1.0)) * np.sin(6.0 * (TIME - 1.0)), 0.0)
+
+
+def _trajectories():
+    """Deviation-based SPEED, VOLT and POWR of two machines/buses"""
+    columns = ["GEN_BUS1", "GEN_BUS2"]
+    return {
+        "SPEED": pd.DataFrame(np.column_stack([SWING, -SWING]), index=TIME, columns=columns),
+        "VOLT": pd.DataFrame(np.column_stack([1.0 - 5 * SWING, 1.02 + 5 * SWING]), index=TIME, columns=["BUS1", "BUS2"]),
+        "POWR": pd.DataFrame(np.column_stack([0.7 + SWING, 1.6 - SWING]), index=TIME, columns=columns),
+    }
+
+
+def _compare(tmp_path, sienna):
+    """Store the PSS/E side of _trajectories() as a base run, write sienna as the export and compare"""
+    psse = _trajectories()
+    psse["SPEED"] = psse["SPEED"] + 1.0  # stored runs hold absolute speed (channels.QUANTITY_OFFSETS)
+    folder = tmp_path / "results" / "line_trip_5-7" / "case_NRE"
+    folder.mkdir(parents=True)
+    save_run(str(folder / "case_NRE_line_fault_All_5s"), psse, {
+        "case": "case_NRE", "contingency": "line_trip_5-7", "disturbance": "line_fault", "runtime": 5,
+        "decimation": 1, "created": "2025-01-01T00:00:00",
+    })
+    sienna_dir = tmp_path / "sienna_results" / "line_trip_5-7" / "case_NRE"
+    sienna_dir.mkdir(parents=True)
+    for quantity, frame in sienna.items():
+        frame.rename_axis("TIME").to_csv(sienna_dir / f"{quantity}.csv")
+
+    with Catalog(str(tmp_path / "catalog.sqlite"), str(tmp_path / "results")) as catalog:
+        catalog.update()
+        return compare_all(catalog, str(tmp_path / "sienna_results"))
+
+
+def test_matching_trajectories_pass(tmp_path):
+    table = _compare(tmp_path, _trajectories())
+    assert set(table["quantity"]) == {"SPEED", "VOLT", "POWR"}
+    assert (table["outlier"] == "").all()
+    assert table.loc[table["quantity"] == "SPEED", "rmse"].max() < 1e-6
+
+
+def test_speed_difference_is_an_outlier(tmp_path):
+    sienna = _trajectories()
+    sienna["SPEED"] = sienna["SPEED"] * 4.0
+    table = _compare(tmp_path, sienna)
+    speed = table[table["quantity"] == "SPEED"]
+    assert (speed["outlier"] != "").all()
+    assert (table.loc[table["quantity"] != "SPEED", "outlier"] == "").all()
@@ -0,0 +1,95 @@
+"""
+Contingency enumeration tests: the bridge-based islanding search against a
+connectivity check of every outage combination, and dynamic models in the
+duplicate-machine signature.
+"""
+
+import itertools
+import os
+import random
+import re
+import pytest
+from contingencies import count_islands, enumerate_contingencies, islanding_outages
+
+CASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "case_data", "case_NRE")
+
+
+def _brute_force(buses, elements):
+    base = count_islands(buses, elements)
+    outages = set()
+    for size in (1, 2):
+        for combination in itertools.combinations(range(len(elements)), size):
+            if size == 2 and any(frozenset((i,)) in outages for i in combination):
+                continue
+            if count_islands(buses, elements, [elements[i] for i in combination]) > base:
+                outages.add(frozenset(combination))
+    return outages
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_islanding_outages_match_connectivity_check(seed):
+    rng = random.Random(seed)
+    buses = list(range(1, rng.randint(2, 9) + 1))
+    elements = []
+    for _ in range(rng.randint(1, 14)):
+        a, b = rng.sample(buses, 2)
+        kind = rng.random()
+        if kind < 0.15:
+            elements.append({"kind": "three_winding", "from_bus": a, "to_bus": b, "third_bus": rng.choice(buses)})
+        elif kind < 0.25:
+            elements.append({"kind": "machine", "bus": a})
+        else:
+            elements.append({"kind": "branch", "from_bus": a, "to_bus": b})
+    assert islanding_outages(buses, elements, depth=2) == _brute_force(buses, elements)
+
+
+def test_parallel_branches_island_only_together():
+    buses = [1, 2, 3]
+    elements = [{"kind": "branch", "from_bus": 1, "to_bus": 2}, {"kind": "branch", "from_bus": 1, "to_bus": 2},
+                {"kind": "branch", "from_bus": 2, "to_bus": 3}]
+    assert islanding_outages(buses, elements, depth=2) == {frozenset((2,)), frozenset((0, 1))}
+
+
+@pytest.fixture
+def two_machine_case(tmp_path):
+    """case_NRE with a second, electrically identical machine '2' at bus 1; returns (raw path, bus 1 dyr records)"""
+    with open(os.path.join(CASE_DIR, "RTS_Esc487MW.raw")) as f:
+        lines = f.read().splitlines(keepends=True)
+    first = next(i for i, line in enumerate(lines) if "BEGIN GENERATOR DATA" in line) + 1
+    lines.insert(first + 1, lines[first].replace("'1 '", "'2 '", 1))
+    raw_path = tmp_path / "case.raw"
+    raw_path.write_text("".join(lines))
+
+    with open(os.path.join(CASE_DIR, "RTS_CtrlsModified_STAB1.dyr")) as f:
+        records = f.read().split("/")
+    bus_1 = [record.strip() for record in records if record.split() and record.split()[0] == "1"]
+    return str(raw_path), bus_1
+
+
+def _machine_names(raw_path, dyr_path=None):
+    return [contingency["name"] for contingency in enumerate_contingencies(raw_path, dyr_path=dyr_path)
+            if contingency["elements"][0]["kind"] == "machine"]
+
+
+def _as_machine_2(record):
+    return re.sub(r"^(\d+\s+'\w+'\s+)1", r"\g<1>2", record)
+
+
+def _write_dyr(path, records):
+    path.write_text("".join(f"{record} /\n" for record in records))
+    return str(path)
+
+
+def test_identical_machines_are_duplicates(two_machine_case, tmp_path):
+    raw_path, bus_1 = two_machine_case
+    same = bus_1 + [_as_machine_2(record) for record in bus_1]
+    assert len(_machine_names(raw_path)) == 3
+    assert len(_machine_names(raw_path, _write_dyr(tmp_path / "same.dyr", same))) == 3
+
+
+def test_machines_with_other_dynamics_are_not_duplicates(two_machine_case, tmp_path):
+    raw_path, bus_1 = two_machine_case
+    other = [_as_machine_2(record) for record in bus_1]
+    other[0] = other[0].replace("6.0000", "3.0000", 1)  # GENROU inertia
+    names = _machine_names(raw_path, _write_dyr(tmp_path / "other.dyr", bus_1 + other))
+    assert len(names) == 4
@@ -0,0 +1,61 @@
+"""
+Stability metric tests on synthetic runs: voltage stretches below the threshold,
+frequency nadir and RoCoF, and batching of the accumulator by stack bytes.
+"""
+
+import numpy as np
+import pytest
+from metrics import MetricsAccumulator, compute_metrics, stack_bytes, voltage_metrics, DEFAULTS
+
+TIME = np.round(np.arange(0.0, 5.0, 0.1), 10)
+
+
+def _run(run_id, volt, freq=None):
+    blocks = {"VOLT": ([f"BUS{j + 1}" for j in range(volt.shape[1])], volt)}
+    if freq is not None:
+        blocks["FREQ"] = (["BUS1"], freq[:, None])
+    return {"id": run_id, "time": TIME, "blocks": blocks, "metadata": {"case": "test"}}
+
+
+def test_longest_stretch_below_threshold_not_total():
+    volt = np.ones((len(TIME), 2))
+    # BUS1: two dips of 0.5 s and 0.3 s (0.8 s in total); BUS2: one dip of 0.6 s
+    volt[(TIME >= 1.0) & (TIME < 1.5), 0] = 0.8
+    volt[(TIME >= 2.0) & (TIME < 2.3), 0] = 0.8
+    volt[(TIME >= 3.0) & (TIME < 3.6), 1] = 0.85
+    min_voltage, min_bus, time_below = voltage_metrics(TIME, volt[None], ["BUS1", "BUS2"], DEFAULTS)
+    assert min_voltage[0] == pytest.approx(0.8) and min_bus[0] == "BUS1"
+    assert time_below[0] == pytest.approx(0.6)
+
+
+def test_no_time_below_threshold():
+    _, _, time_below = voltage_metrics(TIME, np.ones((1, len(TIME), 3)), ["A", "B", "C"], DEFAULTS)
+    assert time_below[0] == 0.0
+
+
+def test_frequency_nadir_and_rocof():
+    freq = np.ones(len(TIME))
+    freq[TIME >= 1.0] = 1.0 - 0.01 * np.minimum(TIME[TIME >= 1.0] - 1.0, 1.0)  # 0.6 Hz/s ramp for 1 s
+    table = compute_metrics([_run("a", np.ones((len(TIME), 1)), freq)])
+    assert table.loc["a", "freq_nadir_hz"] == pytest.approx(59.4)
+    assert table.loc["a", "rocof_hz_s"] == pytest.approx(0.6)
+    assert table.loc["a", "case"] == "test"
+
+
+def test_accumulator_batches_by_bytes(monkeypatch):
+    import metrics
+    batches = []
+    compute = metrics.compute_metrics
+
+    def counting(runs, **settings):
+        batches.append(len(runs))
+        return compute(runs, **settings)
+    monkeypatch.setattr(metrics, "compute_metrics", counting)
+
+    runs = [_run(f"r{i}", np.ones((len(TIME), 4))) for i in range(10)]
+    accumulator = MetricsAccumulator(max_bytes=3 * stack_bytes(runs[0]))
+    for run in runs:
+        accumulator.add(run)
+    table = accumulator.table()
+    assert batches == [3, 3, 3, 1]
+    assert list(table.index) == [run["id"] for run in runs]
@@ -0,0 +1,78 @@
+"""
+Result cache tests on the fake backend: a cache hit still writes the requested
+outputs and returns the same frames as a fresh run, each run is stored once, and
+backend settings (the fake replay mode) are part of the key.
+"""
+
+import glob
+import os
+import numpy as np
+import pandas as pd
+import helpers
+import result_cache
+from helpers import run_case_simulation, stored_run_path
+
+JOB = {"case_folder": "case_NRE", "disturbance_type": "line_fault", "runtime": 3}
+
+
+def _no_simulation(monkeypatch):
+    """Fail any further simulation, so only cache hits succeed"""
+    def simulate(*args, **kwargs):
+        raise AssertionError("simulated although cached")
+    monkeypatch.setattr(helpers, "run_psse_simulation", simulate)
+
+
+def test_cache_hit_rewrites_outputs_and_matches_fresh_run(workspace, monkeypatch):
+    fresh = run_case_simulation(**JOB)
+    path = stored_run_path(**JOB)
+    os.remove(path)
+    _no_simulation(monkeypatch)
+
+    cached = run_case_simulation(**JOB, export_csv=True)
+    assert cached is not None and os.path.exists(path)
+    assert glob.glob(os.path.join(os.path.dirname(path), "*.csv"))
+    for fresh_frame, cached_frame in zip(fresh, cached):
+        pd.testing.assert_frame_equal(cached_frame, fresh_frame, check_exact=False, rtol=1e-6)
+        assert (cached_frame.dtypes == np.float64).all()
+
+
+def test_cache_hit_honours_the_result_format(workspace, monkeypatch):
+    run_case_simulation(**JOB)
+    _no_simulation(monkeypatch)
+    assert run_case_simulation(**JOB, result_format="hdf5") is not None
+    assert os.path.exists(stored_run_path(**JOB, result_format="hdf5"))
+
+
+def test_run_is_stored_once(workspace):
+    run_case_simulation(**JOB)
+    entries = glob.glob("cache/results/*.npz")
+    assert len(entries) == 1
+    assert os.path.samefile(entries[0], stored_run_path(**JOB))
+
+
+def test_fake_replay_mode_is_part_of_the_key(workspace, monkeypatch):
+    synthesize = helpers._backend_params()
+    monkeypatch.setenv("PSSPY_FAKE_REPLAY", "results")
+    assert helpers._backend_params() != synthesize
+    monkeypatch.delenv("PSSPY_FAKE_REPLAY")
+    assert helpers._backend_params() != synthesize
+
+
+def test_cache_hit_leaves_the_stored_run_unchanged(workspace, monkeypatch):
+    run_case_simulation(**JOB)
+    path = stored_run_path(**JOB)
+    os.utime(path, ns=(10 ** 18, 10 ** 18))
+    _no_simulation(monkeypatch)
+    run_case_simulation(**JOB)
+    assert os.stat(path).st_mtime_ns == 10 ** 18
+
+
+def test_eviction_follows_last_use(workspace):
+    run_case_simulation(**JOB)
+    run_case_simulation(**dict(JOB, disturbance_type="gen_change"))
+    entries = sorted(glob.glob("cache/results/*.npz"))
+    for age, entry in enumerate(entries):
+        os.utime(result_cache._used_path(entry), (1e9 - age, 1e9 - age))  # the first entry was used last
+    assert result_cache.evict(max_bytes=os.path.getsize(entries[0])) == 1
+    assert glob.glob("cache/results/*.npz") == entries[:1]
+    assert not os.path.exists(result_cache._used_path(entries[1]))
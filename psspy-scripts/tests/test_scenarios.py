@@ -0,0 +1,49 @@
+"""
+Load scenario tests on the fake backend: a level is warm-started from the previous
+level's solution only when it is a variant of the same network, otherwise it keeps
+the initial voltages stored in its own file.
+"""
+
+import json
+import os
+import shutil
+import numpy as np
+import helpers
+from case_parser import read_raw
+from scenarios import same_network
+
+SCENARIOS = os.path.join(os.path.dirname(__file__), "..", "..", "raw_data", "scenarios")
+
+
+def _scenarios(folder):
+    """418 MW and 763 MW levels of case_NRE, and a 900 MW file that is the 763 MW one without its last branch"""
+    folder.mkdir()
+    for level in (418, 763):
+        shutil.copy(os.path.join(SCENARIOS, f"RTS_Esc{level}MW.raw"), folder)
+    with open(folder / "RTS_Esc763MW.raw", encoding="latin-1") as f:
+        lines = f.read().splitlines()
+    end = next(i for i, line in enumerate(lines) if line.startswith("0 / END OF BRANCH DATA"))
+    (folder / "RTS_Esc900MW.raw").write_text("\n".join(lines[:end - 1] + lines[end:]) + "\n", encoding="latin-1")
+    return [str(folder / f"RTS_Esc{level}MW.raw") for level in (418, 763, 900)]
+
+
+def _converted_vm(path):
+    with open(path) as f:
+        return np.array(json.load(f)["case"]["buses"]["vm"])
+
+
+def test_same_network(workspace):
+    low, high, other = _scenarios(workspace / "scenarios")
+    assert same_network(low, high)
+    assert not same_network(high, other)
+
+
+def test_only_variants_are_warm_started(workspace):
+    raws = _scenarios(workspace / "scenarios")
+    pairs = helpers.get_scenario_snapshots("case_NRE", raws, helpers.get_case_files("case_NRE")[1], "All")
+    low, high, other = (_converted_vm(cnv) for cnv, _ in pairs)
+    own = [read_raw(raw)["buses"]["vm"] for raw in raws]
+    assert not np.allclose(own[0], own[1])
+    np.testing.assert_allclose(low, own[0])
+    np.testing.assert_allclose(high, own[0])  # warm-started from the 418 MW solution
+    np.testing.assert_allclose(other, own[2])  # a different network keeps its own voltages
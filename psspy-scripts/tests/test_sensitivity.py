@@ -0,0 +1,44 @@
+"""
+Sensitivity sample tests: the "memory" method (change_plmod_con) and the "dyr"
+method (a rewritten .dyr file) change the same CON, also for models whose records
+start with integer ICONs.
+"""
+
+import pytest
+import helpers
+from case_parser import DYR_ICON_COUNTS, dyr_records
+from sensitivity import build_samples, parse_parameter
+
+
+def _changed(source, variant):
+    """(model, position after the machine id, new value) of every parameter that differs"""
+    changed = []
+    for (_, model, _, before), (_, _, _, after) in zip(dyr_records(source), dyr_records(variant)):
+        changed += [(model, k, new) for k, (old, new) in enumerate(zip(before, after)) if old != new]
+    return changed
+
+
+@pytest.mark.parametrize("model", ["REGCA1", "REECB1", "REPCA1"])
+def test_memory_and_dyr_change_the_same_con(workspace, model):
+    specs = [parse_parameter(f"{model}.1=123.5")]
+    memory = build_samples("case_RE", specs, [[123.5]], method="memory")
+    dyr = build_samples("case_RE", specs, [[123.5]], method="dyr")
+
+    helpers.load_psse()
+    import psspy  # type: ignore
+    psspy.case("case_data/case_RE/" + helpers.get_case_files("case_RE")[0])
+    assert helpers.apply_parameter_changes(memory[0]["changes"]) == 0
+    (_, _, _, con, value), = psspy._session.parameters  # CON numbered from 1
+
+    source = "case_data/case_RE/" + helpers.get_case_files("case_RE")[1]
+    assert _changed(source, f"case_data/case_RE/{dyr[0]['dyr_file']}") == [
+        (model, DYR_ICON_COUNTS[model] + con - 1, value)]
+
+
+def test_regca1_con_follows_its_icon(workspace):
+    specs = [parse_parameter("REGCA1.0=0.05")]
+    sample, = build_samples("case_RE", specs, [[0.05]], method="dyr")
+    source = "case_data/case_RE/" + helpers.get_case_files("case_RE")[1]
+    before = {model: parameters for _, model, _, parameters in dyr_records(source)}["REGCA1"]
+    assert before[:2] == [0, 0.02]  # LVPLSW, then Tg as CON 0
+    assert _changed(source, f"case_data/case_RE/{sample['dyr_file']}") == [("REGCA1", 1, 0.05)]
@@ -0,0 +1,97 @@
+"""
+Sweep service tests on the fake backend: the connection key must come from the
+environment or a private key file, jobs run through the service like a local
+sweep, and a crashed worker does not break the service for later submissions.
+"""
+
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import pytest
+from multiprocessing import AuthenticationError
+from service import SweepService, _authkey, request, run_remote
+from sweep import build_jobs
+
+JOBS = build_jobs([{"type": "line_fault"}, {"type": "gen_change"}], ["case_NRE"], runtime=3)
+
+
+class Crash:
+    """Job option that kills the worker process unpickling it, like a PSS/E crash"""
+
+    def __init__(self):
+        self.armed = True
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if multiprocessing.parent_process() is not None:
+            os._exit(1)
+
+
+def _free_address():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return "localhost", sock.getsockname()[1]
+
+
+@pytest.fixture
+def service(workspace):
+    """A running two-worker service on a free port; returns its address"""
+    address = _free_address()
+    server = SweepService(address, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            request(("ping",), address)
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield address
+    request(("shutdown",), address)
+    thread.join(timeout=30)
+
+
+def test_no_key_refuses_to_connect(workspace):
+    with pytest.raises(RuntimeError, match="No service key"):
+        _authkey()
+
+
+def test_service_creates_a_private_key_file(workspace):
+    key = _authkey(create=True)
+    path = os.environ["PSSPY_SERVICE_KEY_FILE"]
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert _authkey() == key and len(key) == 64
+
+
+def test_shared_key_file_is_rejected(workspace):
+    _authkey(create=True)
+    os.chmod(os.environ["PSSPY_SERVICE_KEY_FILE"], 0o644)
+    with pytest.raises(RuntimeError, match="other users"):
+        _authkey()
+
+
+def test_jobs_run_on_the_service(service):
+    assert request(("ping",), service) == ("pong", 2, "fake")
+    records = run_remote(JOBS, service)
+    assert sorted(record["status"] for record in records) == ["ok", "ok"]
+    assert all(os.path.exists(record["path"]) for record in records)
+
+
+def test_wrong_key_does_not_stop_the_service(service):
+    with pytest.raises(AuthenticationError):
+        request(("ping",), service, authkey=b"not the key")
+    assert request(("ping",), service)[0] == "pong"
+
+
+def test_silent_connection_does_not_block_other_clients(service):
+    with socket.create_connection(service):  # never answers the handshake
+        assert request(("ping",), service)[0] == "pong"
+
+
+def test_worker_crash_does_not_break_the_service(service):
+    crashed = run_remote([dict(JOBS[0], crash=Crash())], service)
+    assert crashed[0]["status"] == "failed"
+    records = run_remote(JOBS, service)
+    assert [record["status"] for record in records] == ["ok", "ok"]
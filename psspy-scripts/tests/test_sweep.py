@@ -0,0 +1,55 @@
+"""
+Sweep executor tests on the fake backend: records carry stored run paths (frames
+only on request), serial and pooled sweeps store the same data, and a failing
+job is recorded without stopping the others.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from result_store import load_run
+from sweep import build_jobs, run_sweep
+
+CONTINGENCIES = [{"type": "line_fault"}, {"type": "gen_change"}]
+
+
+def _jobs(**options):
+    return build_jobs(CONTINGENCIES, ["case_NRE", "case_RE"], runtime=3, **options)
+
+
+def _stored(records):
+    runs = {record["path"]: load_run(record["path"]) for record in records}
+    return {path: {quantity: np.asarray(run.array(quantity)) for quantity in run.quantities} for path, run in runs.items()}
+
+
+def test_records_carry_paths_not_frames(workspace):
+    seen = []
+    records = run_sweep(_jobs(), on_result=seen.append)
+    assert len(records) == 4 and seen == records
+    for record in records:
+        assert record["status"] == "ok" and record["results"] is None
+        assert os.path.exists(record["path"])
+        assert load_run(record["path"]).metadata["backend"] == "fake"
+
+
+def test_keep_results_returns_float64_frames(workspace):
+    record, = run_sweep(_jobs()[:1], keep_results=True)
+    frames = record["results"]
+    assert len(frames) == 4
+    assert all(isinstance(frame, pd.DataFrame) and (frame.dtypes == np.float64).all() for frame in frames)
+
+
+def test_pooled_sweep_matches_serial(workspace):
+    serial = _stored(run_sweep(_jobs()))
+    pooled = run_sweep(_jobs(force=True), workers=2)
+    assert all(record["status"] == "ok" for record in pooled)
+    for path, blocks in _stored(pooled).items():
+        for quantity, values in blocks.items():
+            np.testing.assert_array_equal(values, serial[path][quantity])
+
+
+def test_failed_job_does_not_stop_the_sweep(workspace):
+    jobs = _jobs()[:1] + [dict(_jobs()[0], case_folder="case_missing")]
+    records = {record["case_folder"]: record for record in run_sweep(jobs)}
+    assert records["case_NRE"]["status"] == "ok"
+    assert records["case_missing"]["status"] == "failed" and records["case_missing"]["path"] is None
@@ -18,6 +18,28 @@ const PSY = PowerSystems
 const PSID = PowerSimulationsDynamics
 const PF = PowerFlows
 
+# Trajectories for psspy-scripts/comparison.py: sienna_results/<contingency>/<case>/<QUANTITY>.csv,
+# columns named like the PSS/E result CSVs (POWR in p.u. on the system base, as exported by PSS/E;
+# SPEED as the speed deviation ω - 1, compared against the stored PSS/E speed minus its offset)
+function export_sienna_results(results, folder; buses = 1:9, generators = 1:3)
+    mkpath(folder)
+    time = get_voltage_magnitude_series(results, first(buses))[1]
+    volt = DataFrame(TIME = time)
+    for b in buses
+        volt[!, "BUS$b"] = get_voltage_magnitude_series(results, b)[2]
+    end
+    speed = DataFrame(TIME = time)
+    powr = DataFrame(TIME = time)
+    for g in generators
+        # Speed deviation (ω - 1 p.u.), the quantity PSS/E records in its SPD channels
+        speed[!, "GEN_BUS$g"] = get_state_series(results, ("generator-$g-1", :ω))[2] .- 1.0
+        powr[!, "GEN_BUS$g"] = get_activepower_series(results, "generator-$g-1")[2]
+    end
+    CSV.write(joinpath(folder, "VOLT.csv"), volt)
+    CSV.write(joinpath(folder, "SPEED.csv"), speed)
+    CSV.write(joinpath(folder, "POWR.csv"), powr)
+end
+
 ######################
 ### Data Exploring ###
 ######################
@@ -56,6 +78,7 @@ show_states_initial_value(sim)
 PSID.execute!(sim, IDA(), dtmax = 0.02, abstol = 1e-6, reltol = 1e-6, saveat = 0.01)
 
 results = read_results(sim)
+export_sienna_results(results, "sienna_results/line_trip_5-7/case_NRE")
 
 voltage_sienna_plots_line_trip = [scatter(x = get_voltage_magnitude_series(results, bus_number)[1], y = get_voltage_magnitude_series(results, bus_number)[2], name = "Sienna: BUS$bus_number", line = attr(color = "black", dash = "dot") ) for bus_number in 1:9]; #line = attr(color = "black", dash = "dot")
 speed_sienna_plots_line_trip = [
@@ -127,6 +150,7 @@ show_states_initial_value(sim)
 PSID.execute!(sim, IDA(), dtmax = 0.02, abstol = 1e-6, reltol = 1e-6, saveat = 0.02)
 
 results = read_results(sim)
+export_sienna_results(results, "sienna_results/gen2_power_change_187-217MW/case_NRE")
 
 gen2_base_power = get_component(StaticInjection, sys, "generator-2-1").base_power
 t_sienna, p_gen2_sienna = get_activepower_series(results, "generator-2-1")